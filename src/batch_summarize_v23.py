@@ -24,8 +24,15 @@ try:
 except ImportError as e:
     print("无法导入 summarize_v23.summarize_log，请确认 summarize_v23.py 与本脚本同目录。", file=sys.stderr)
     raise
+from mahjong_hand_analyzer import yaku_cache_info
+from utils.corpus_manifest import manifest_files
 
 def scan_files(folder: str, pattern: str, recursive: bool):
+    # game-logs/ 下的牌谱直接查询牌谱清单，不再遍历目录
+    if pattern == "*.json":
+        files = manifest_files(folder, recursive)
+        if files is not None:
+            return files
     if recursive:
         pattern_path = os.path.join(folder, "**", pattern)
         return [p for p in glob.glob(pattern_path, recursive=True) if os.path.isfile(p)]
@@ -79,6 +86,7 @@ def main():
         "files_succeeded": len(results),
         "files_failed": len(errors),
         "player_total_games": player_total_games_sorted,
+        "yaku_cache": yaku_cache_info(),  # 役判定缓存命中统计
         "results": results,
         "errors": errors,
     }
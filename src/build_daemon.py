@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻构建进程
+
+普通的 generate_website.py 每次运行都要重新导入模块、读取和解析全部牌谱。
+常驻进程把这些都留在内存里：已导入的模块、解析后的牌谱（utils.log_cache）、
+对局总结和荣誉牌谱缓存、时间戳索引、牌谱清单和别名表，
+通过本地 Unix socket 接收构建命令，热构建通常在一秒左右完成。
+
+每次构建前先更新牌谱清单：牌谱、别名和页面模板都没有变化时直接跳过；
+src/ 下的 Python 代码有变化时常驻进程退出，由客户端重新启动一个新进程再构建。
+
+用法:
+    python3 src/build_daemon.py build          # 请求构建（常驻进程未运行时自动启动）
+    python3 src/build_daemon.py build --force  # 即使输入没有变化也重新生成全部页面
+    python3 src/build_daemon.py status
+    python3 src/build_daemon.py stop
+    python3 src/build_daemon.py serve          # 在前台运行常驻进程
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import contextlib
+import subprocess
+import traceback
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(SRC_DIR)
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from utils.file_cache import cache_path, content_hash
+
+SOCKET_PATH = cache_path('build_daemon.sock')
+LOG_PATH = cache_path('build_daemon.log')
+# 等待新启动的常驻进程开始监听的时间（秒）
+START_TIMEOUT = 30
+
+# 页面模板和CSS/JS（按修改时间缓存，变化后不需要重启进程）
+TEMPLATE_DIRS = (os.path.join(SRC_DIR, 'templates'), os.path.join(REPO_ROOT, 'templates'))
+ALIAS_FILE = os.path.join(SRC_DIR, 'player_aliases.json')
+
+
+def _tree_fingerprint(roots, suffixes):
+    """目录下指定后缀文件的 (路径, 修改时间, 大小) 列表"""
+    entries = []
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if d != '__pycache__' and not d.startswith('.'))
+            for name in sorted(filenames):
+                if name.endswith(suffixes):
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((path, st.st_mtime_ns, st.st_size))
+    return entries
+
+
+def code_fingerprint():
+    """src/ 下的 Python 代码（变化时需要重启常驻进程）"""
+    return _tree_fingerprint([SRC_DIR], ('.py',))
+
+
+def template_fingerprint():
+    """页面模板和静态资源"""
+    return _tree_fingerprint(TEMPLATE_DIRS, ('.html', '.css', '.js'))
+
+
+def alias_fingerprint():
+    try:
+        return content_hash(ALIAS_FILE)
+    except OSError:
+        return ''
+
+
+# ---------- 常驻进程 ----------
+
+class _LineSink:
+    """把构建日志逐行转发给客户端（客户端断开后继续构建，只是不再转发）"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._buffer = ''
+
+    def write(self, text):
+        self._buffer += text
+        while '\n' in self._buffer:
+            line, self._buffer = self._buffer.split('\n', 1)
+            self.send({'log': line})
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self._buffer:
+            self.send({'log': self._buffer})
+            self._buffer = ''
+
+    def send(self, message):
+        if self.conn is None:
+            return
+        try:
+            self.conn.sendall((json.dumps(message, ensure_ascii=False) + '\n').encode('utf-8'))
+        except OSError:
+            self.conn = None
+
+
+class BuildDaemon:
+    """持有热缓存的构建进程"""
+
+    def __init__(self, socket_path=SOCKET_PATH, idle_timeout=None):
+        self.socket_path = socket_path
+        self.idle_timeout = idle_timeout
+        self.started_at = time.time()
+        self.builds = 0
+        self.last_build = None      # {'finished', 'seconds', 'ok', 'skipped'}
+        self._code = code_fingerprint()
+        self._templates = None
+        self._aliases = None
+        self._running = True
+
+        # 常驻进程启动时就导入生成器，第一次构建不再付出导入的代价
+        os.chdir(REPO_ROOT)
+        import generate_website  # noqa: F401
+
+    def _inputs_changed(self, log):
+        """更新牌谱清单并检查构建输入（牌谱、别名、模板）是否有变化"""
+        from utils.corpus_manifest import get_manifest
+        from utils.log_cache import forget_missing
+        import summarize_v23
+
+        changes = get_manifest().refresh()
+        forget_missing()
+
+        aliases = alias_fingerprint()
+        if aliases != self._aliases:
+            # summarize_v23 在导入时加载的别名表（显示名用）
+            summarize_v23.PLAYER_ALIAS_MAP = summarize_v23.load_player_aliases()
+        templates = template_fingerprint()
+
+        changed = []
+        if self.last_build is None:
+            changed.append("首次构建")
+        elif not self.last_build['ok']:
+            changed.append("上次构建失败")
+        else:
+            if changes['added'] or changes['updated'] or changes['removed']:
+                changed.append(f"牌谱 新增 {changes['added']}，更新 {changes['updated']}，删除 {changes['removed']}")
+            if aliases != self._aliases:
+                changed.append("玩家别名")
+            if templates != self._templates:
+                changed.append("页面模板")
+        self._aliases = aliases
+        self._templates = templates
+        for item in changed:
+            log(f"  输入变化: {item}")
+        return bool(changed)
+
+    def build(self, sink, force=False):
+        """执行一次构建，返回结果消息"""
+        start = time.perf_counter()
+        if code_fingerprint() != self._code:
+            self._running = False
+            return {'done': True, 'ok': False, 'restart': True, 'error': "代码已修改，常驻进程需要重启"}
+
+        ok = True
+        skipped = False
+        error = None
+        with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+            try:
+                if self._inputs_changed(lambda line: print(line, file=sys.stderr)) or force:
+                    import generate_website
+                    os.makedirs("docs", exist_ok=True)
+                    # 构建清单决定具体重新生成哪些页面（--force 时全部重新生成）
+                    generate_website.main(force=force)
+                else:
+                    skipped = True
+                    print("牌谱、别名和模板都没有变化，跳过构建", file=sys.stderr)
+            except Exception as e:
+                ok = False
+                error = f"{type(e).__name__}: {e}"
+                traceback.print_exc()
+        sink.close()
+
+        seconds = round(time.perf_counter() - start, 3)
+        self.builds += 1
+        self.last_build = {'finished': time.time(), 'seconds': seconds, 'ok': ok, 'skipped': skipped}
+        return {'done': True, 'ok': ok, 'skipped': skipped, 'seconds': seconds, 'error': error}
+
+    def status(self):
+        from utils.log_cache import log_cache_info
+        return {
+            'done': True, 'ok': True,
+            'pid': os.getpid(),
+            'uptime': round(time.time() - self.started_at, 1),
+            'builds': self.builds,
+            'last_build': self.last_build,
+            'cached_logs': log_cache_info()['files'],
+        }
+
+    def handle(self, conn):
+        with conn:
+            try:
+                request = json.loads(conn.makefile('r', encoding='utf-8').readline() or '{}')
+            except ValueError:
+                request = {}
+            sink = _LineSink(conn)
+            cmd = request.get('cmd')
+            if cmd == 'build':
+                sink.send(self.build(sink, force=bool(request.get('force'))))
+            elif cmd == 'status':
+                sink.send(self.status())
+            elif cmd == 'stop':
+                self._running = False
+                sink.send({'done': True, 'ok': True})
+            else:
+                sink.send({'done': True, 'ok': False, 'error': f"未知命令: {cmd}"})
+
+    def serve(self):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        server.listen(8)
+        socket_inode = os.stat(self.socket_path).st_ino
+        if self.idle_timeout:
+            server.settimeout(self.idle_timeout)
+        print(f"常驻构建进程已启动 (pid {os.getpid()})，监听 {self.socket_path}", file=sys.stderr, flush=True)
+        try:
+            while self._running:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    print("空闲超时，退出", file=sys.stderr, flush=True)
+                    break
+                self.handle(conn)
+        finally:
+            server.close()
+            # 重启时新进程可能已经在同一路径上监听，只删除自己创建的 socket 文件
+            with contextlib.suppress(OSError):
+                if os.stat(self.socket_path).st_ino == socket_inode:
+                    os.remove(self.socket_path)
+        print("常驻构建进程已退出", file=sys.stderr, flush=True)
+
+
+# ---------- 客户端 ----------
+
+def request(message, socket_path=SOCKET_PATH, on_log=None):
+    """
+    发送一条命令并等待结果
+
+    返回:
+        dict: 结果消息；常驻进程没有运行时返回None
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        client.close()
+        return None
+    with client:
+        client.sendall((json.dumps(message) + '\n').encode('utf-8'))
+        for line in client.makefile('r', encoding='utf-8'):
+            reply = json.loads(line)
+            if 'log' in reply:
+                if on_log:
+                    on_log(reply['log'])
+                continue
+            return reply
+    return {'done': True, 'ok': False, 'error': "常驻进程在构建中途退出"}
+
+
+def start_daemon(socket_path=SOCKET_PATH, idle_timeout=None):
+    """在后台启动常驻进程并等待它开始监听，返回是否成功"""
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+    cmd = [sys.executable, os.path.abspath(__file__), 'serve', '--socket', socket_path]
+    if idle_timeout:
+        cmd += ['--idle-timeout', str(idle_timeout)]
+    with open(LOG_PATH, 'a', encoding='utf-8') as log:
+        subprocess.Popen(cmd, cwd=REPO_ROOT, stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                         start_new_session=True)
+
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if request({'cmd': 'status'}, socket_path) is not None:
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def _print_log(line):
+    print(line, file=sys.stderr, flush=True)
+
+
+def run_build(args):
+    message = {'cmd': 'build', 'force': args.force}
+    for attempt in range(2):
+        reply = request(message, args.socket, on_log=_print_log)
+        if reply is None or reply.get('restart'):
+            if reply is not None:
+                print(f"⟳ {reply['error']}", file=sys.stderr)
+                # 等旧进程释放 socket
+                time.sleep(0.2)
+            if not start_daemon(args.socket, args.idle_timeout):
+                break
+            continue
+        if reply['ok']:
+            state = "输入无变化，已跳过" if reply.get('skipped') else "构建完成"
+            print(f"✓ {state} ({reply['seconds']:.2f}s)", file=sys.stderr)
+            return 0
+        print(f"❌ 构建失败: {reply.get('error')}", file=sys.stderr)
+        return 1
+
+    # 常驻进程无法启动：在当前进程中冷构建
+    print(f"⚠️  常驻构建进程无法启动（日志: {LOG_PATH}），直接构建", file=sys.stderr)
+    os.chdir(REPO_ROOT)
+    import generate_website
+    os.makedirs("docs", exist_ok=True)
+    generate_website.main()
+    return 0
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="常驻构建进程：保持热缓存，按需重新生成网站")
+    ap.add_argument("command", choices=["build", "status", "stop", "serve", "start"], help="要执行的命令")
+    ap.add_argument("--force", action="store_true", help="build: 即使输入没有变化也重新生成全部页面")
+    ap.add_argument("--socket", default=SOCKET_PATH, help="本地 socket 路径")
+    ap.add_argument("--idle-timeout", type=float, default=None, help="常驻进程空闲多少秒后自动退出（默认不退出）")
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.command == 'serve':
+        BuildDaemon(args.socket, args.idle_timeout).serve()
+        return 0
+    if args.command == 'build':
+        return run_build(args)
+    if args.command == 'start':
+        if request({'cmd': 'status'}, args.socket) is not None:
+            print("常驻构建进程已在运行", file=sys.stderr)
+            return 0
+        if start_daemon(args.socket, args.idle_timeout):
+            print("✓ 常驻构建进程已启动", file=sys.stderr)
+            return 0
+        print(f"❌ 常驻构建进程启动失败，详见 {LOG_PATH}", file=sys.stderr)
+        return 1
+
+    reply = request({'cmd': args.command}, args.socket)
+    if reply is None:
+        print("常驻构建进程没有运行", file=sys.stderr)
+        return 0 if args.command == 'stop' else 1
+    if args.command == 'status':
+        print(json.dumps(reply, ensure_ascii=False, indent=2))
+    else:
+        print("✓ 常驻构建进程已停止", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
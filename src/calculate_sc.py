@@ -7,15 +7,37 @@
 1. 重新模拟log累计素点、立直棒，计算应有的sc
 2. 将结果与牌谱内现有sc逐项对比（素点必须完全一致，R值允许0.01误差）
 3. 若缺少sc字段，则报错并把牌谱移到error文件夹
+
+验证通过的牌谱按内容哈希记录在 .cache/sc_verified.json 中，内容未变的牌谱直接跳过；
+其余牌谱在进程池中并行验证。
+
+用法：
+  python src/calculate_sc.py
+  python src/calculate_sc.py --report sc_report.json   # 输出机器可读的验证报告
+  python src/calculate_sc.py --no-cache -j 1 -v        # 不使用缓存，单进程输出详细过程
 """
 
 import os
+import sys
 import json
 import glob
 import shutil
+import argparse
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from utils.file_cache import cache_path, content_hash, hash_bytes, load_json_cache, save_json_cache
+from utils.corpus_manifest import manifest_files, manifest_content_hashes, invalidate_manifest
 
 ERROR_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'error'))
 
+# 验证缓存：{内容哈希: 验证通过的sc}
+SC_CACHE_FILE = cache_path('sc_verified.json')
+SC_CACHE_VERSION = 1
+
+# 待验证文件少于该数量时不启动进程池（进程启动开销大于收益）
+MIN_FILES_FOR_POOL = 32
+
 def move_file_to_error(filepath, reason):
     """将问题牌谱移动到error文件夹"""
     os.makedirs(ERROR_FOLDER, exist_ok=True)
@@ -33,15 +55,17 @@ def move_file_to_error(filepath, reason):
         counter += 1
 
     shutil.move(filepath, target_path)
+    invalidate_manifest()
     rel_target = os.path.relpath(target_path)
     print(f"   → 已移动到 {rel_target}")
 
-def calculate_sc_from_log(log_data):
+def calculate_sc_from_log(log_data, verbose=True):
     """
     从log数据计算sc字段
 
     参数:
         log_data: 包含log的JSON数据
+        verbose: 是否打印计算过程
 
     返回:
         sc数组，格式：[玩家0分数, 玩家0R值, 玩家1分数, 玩家1R值, ...]
@@ -95,9 +119,10 @@ def calculate_sc_from_log(log_data):
     expected_total = 25000 * 4  # 100000
     total_riichi = sum(riichi_count)
 
-    print(f"  立直次数: {riichi_count} (总计: {total_riichi}次)")
-    print(f"  累加后分数: {scores}")
-    print(f"  分数总和: {total} (预期: {expected_total}, 差值: {total - expected_total})")
+    if verbose:
+        print(f"  立直次数: {riichi_count} (总计: {total_riichi}次)")
+        print(f"  累加后分数: {scores}")
+        print(f"  分数总和: {total} (预期: {expected_total}, 差值: {total - expected_total})")
 
     if total != expected_total:
         # 有剩余立直棒，归第一名所有
@@ -107,8 +132,9 @@ def calculate_sc_from_log(log_data):
         first_place_idx = scores.index(max(scores))
         scores[first_place_idx] += riichi_sticks_value
 
-        print(f"  场上剩余立直棒价值: {riichi_sticks_value}点，归第一名 (玩家{first_place_idx})")
-        print(f"  调整后分数: {scores}")
+        if verbose:
+            print(f"  场上剩余立直棒价值: {riichi_sticks_value}点，归第一名 (玩家{first_place_idx})")
+            print(f"  调整后分数: {scores}")
 
     # 5. 计算R值变化
     # R值 = (分数 - 25000) / 1000 + 马点
@@ -167,9 +193,10 @@ def calculate_sc_from_log(log_data):
         r_change = base_r + uma_values[i]
         r_values.append(r_change)
 
-    print(f"  名次: {ranks}")
-    print(f"  马点: {uma_values}")
-    print(f"  R值变化: {r_values}")
+    if verbose:
+        print(f"  名次: {ranks}")
+        print(f"  马点: {uma_values}")
+        print(f"  R值变化: {r_values}")
 
     # sc格式：[分数, R值变化, 分数, R值变化, ...]
     sc = []
@@ -180,117 +207,245 @@ def calculate_sc_from_log(log_data):
     return sc
 
 
+def compare_sc(original_sc, calculated_sc):
+    """
+    比较原sc与计算得到的sc（分数必须完全相同，R值允许0.01的误差）
+
+    返回:
+        错误信息列表，为空表示一致
+    """
+    if len(original_sc) != len(calculated_sc):
+        return [
+            f"❌ 错误：sc字段长度不匹配！原={len(original_sc)}, 计算={len(calculated_sc)}",
+            f"   原sc: {original_sc}",
+            f"   计算sc: {calculated_sc}",
+        ]
+
+    messages = []
+    for i in range(len(original_sc)):
+        if i % 2 == 0:
+            # 分数，必须完全相同
+            if original_sc[i] != calculated_sc[i]:
+                messages.append(f"❌ 错误：玩家{i//2}分数不匹配！原={original_sc[i]}, 计算={calculated_sc[i]}")
+        else:
+            # R值，允许小误差
+            if abs(original_sc[i] - calculated_sc[i]) > 0.01:
+                messages.append(f"❌ 错误：玩家{i//2}R值不匹配！原={original_sc[i]}, 计算={calculated_sc[i]}")
+
+    if messages:
+        messages.append(f"   原sc: {original_sc}")
+        messages.append(f"   计算sc: {calculated_sc}")
+    return messages
+
+
+def verify_file(filepath, verbose=False):
+    """
+    验证单个文件的sc字段（不移动文件、不打印结果，可在子进程中运行）
+
+    返回:
+        dict: {
+            'path': 文件路径,
+            'hash': 文件内容哈希,
+            'status': 'verified' / 'missing_sc' / 'mismatch' / 'uncomputable' / 'read_error',
+            'messages': 错误信息列表,
+            'sc': 计算得到的sc（无法计算时为None）
+        }
+    """
+    result = {'path': filepath, 'hash': None, 'status': 'verified', 'messages': [], 'sc': None}
+
+    try:
+        with open(filepath, 'rb') as f:
+            raw = f.read()
+        result['hash'] = hash_bytes(raw)
+        data = json.loads(raw.decode('utf-8'))
+    except (OSError, ValueError) as e:
+        result['status'] = 'read_error'
+        result['messages'].append(f"❌ 读取失败: {e}")
+        return result
+
+    if 'sc' not in data:
+        result['status'] = 'missing_sc'
+        result['messages'].append("❌ 缺少 sc 字段，移动到 error 文件夹")
+        return result
+
+    calculated_sc = calculate_sc_from_log(data, verbose=verbose)
+    if calculated_sc is None:
+        result['status'] = 'uncomputable'
+        result['messages'].append("❌ 无法计算sc字段")
+        return result
+
+    result['sc'] = calculated_sc
+    mismatch = compare_sc(data['sc'], calculated_sc)
+    if mismatch:
+        result['status'] = 'mismatch'
+        result['messages'].extend(mismatch)
+
+    return result
+
+
 def process_file(filepath):
     """处理单个文件，计算并验证sc字段"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
     filename = os.path.basename(filepath)
-
     print(f"\n处理: {filename}")
 
-    if 'sc' not in data:
-        print(f"❌ {filename}: 缺少 sc 字段，移动到 error 文件夹")
+    result = verify_file(filepath, verbose=True)
+    for message in result['messages']:
+        print(message)
+
+    if result['status'] == 'missing_sc':
         move_file_to_error(filepath, "missing sc")
         return False
+    if result['status'] != 'verified':
+        return False
 
-    # 计算sc
-    calculated_sc = calculate_sc_from_log(data)
+    print(f"✓ sc字段验证通过，无需更新")
+    return True
 
-    if calculated_sc is None:
-        print(f"❌ 无法计算sc字段")
-        return False
 
-    # 检查是否已有sc字段
-    if 'sc' in data:
-        original_sc = data['sc']
-
-        # 比较是否一致（允许小误差）
-        if len(original_sc) != len(calculated_sc):
-            print(f"❌ 错误：sc字段长度不匹配！原={len(original_sc)}, 计算={len(calculated_sc)}")
-            print(f"   原sc: {original_sc}")
-            print(f"   计算sc: {calculated_sc}")
-            return False
-
-        # 比较每个值（分数必须完全相同，R值允许0.01的误差）
-        mismatch = False
-        for i in range(len(original_sc)):
-            if i % 2 == 0:
-                # 分数，必须完全相同
-                if original_sc[i] != calculated_sc[i]:
-                    mismatch = True
-                    print(f"❌ 错误：玩家{i//2}分数不匹配！原={original_sc[i]}, 计算={calculated_sc[i]}")
-            else:
-                # R值，允许小误差
-                if abs(original_sc[i] - calculated_sc[i]) > 0.01:
-                    mismatch = True
-                    print(f"❌ 错误：玩家{i//2}R值不匹配！原={original_sc[i]}, 计算={calculated_sc[i]}")
-
-        if mismatch:
-            print(f"   原sc: {original_sc}")
-            print(f"   计算sc: {calculated_sc}")
-            return False
-        else:
-            print(f"✓ sc字段验证通过，无需更新")
-            return True
+def find_json_files(folder):
+    """递归查找文件夹内所有JSON文件（game-logs/ 下的文件夹查询牌谱清单）"""
+    json_files = manifest_files(folder)
+    if json_files is not None:
+        return json_files
+    json_files = []
+    for root, dirs, files in os.walk(folder):
+        for f in files:
+            if f.endswith('.json'):
+                json_files.append(os.path.join(root, f))
+    return sorted(json_files)
 
-    return True
+
+def verify_files(filepaths, jobs):
+    """
+    验证一组文件，文件较多且 jobs > 1 时使用进程池
+
+    返回:
+        与 filepaths 顺序一致的验证结果列表
+    """
+    if jobs <= 1 or len(filepaths) < MIN_FILES_FOR_POOL:
+        return [verify_file(fp) for fp in filepaths]
+
+    # 进程池（multiprocessing、socket 等）只在需要并行时才导入
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(filepaths) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(verify_file, filepaths, chunksize=chunksize))
 
 
-def main():
+def main(argv=None):
     """主函数"""
+    ap = argparse.ArgumentParser(description="计算并验证所有牌谱的sc字段")
+    ap.add_argument("folders", nargs="*", default=['game-logs/m-league', 'game-logs/ema'],
+                    help="要检查的牌谱文件夹（默认 game-logs/m-league 和 game-logs/ema）")
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="并行验证的进程数")
+    ap.add_argument("--no-cache", action="store_true", help="忽略验证缓存，重新验证所有文件")
+    ap.add_argument("--report", default=None, help="输出JSON格式的验证报告到指定文件")
+    ap.add_argument("-v", "--verbose", action="store_true", help="逐个文件打印计算过程（单进程运行）")
+    args = ap.parse_args(argv)
+
     print("计算和验证所有牌谱的sc字段...")
     print("="*80)
 
-    # 扫描所有牌谱文件
-    folders = ['game-logs/m-league', 'game-logs/ema']
+    cache = {} if args.no_cache else load_json_cache(SC_CACHE_FILE, SC_CACHE_VERSION)
 
-    total_verified = 0  # 验证通过
+    total_verified = 0  # 验证通过（含缓存命中）
+    total_cached = 0    # 缓存命中
     total_errors = 0    # 计算错误或不匹配
+    report_files = []
+    report_folders = {}
 
-    for folder in folders:
+    for folder in args.folders:
         if not os.path.exists(folder):
             continue
 
         print(f"\n检查文件夹: {folder}")
         print("="*80)
 
-        # 递归查找所有JSON文件
-        json_files = []
-        for root, dirs, files in os.walk(folder):
-            for f in files:
-                if f.endswith('.json'):
-                    json_files.append(os.path.join(root, f))
+        json_files = find_json_files(folder)
 
-        # 处理每个文件
         folder_verified = 0
+        folder_cached = 0
         folder_errors = 0
 
-        for filepath in json_files:
-            result = process_file(filepath)
+        if args.verbose:
+            # 详细模式：逐个文件打印计算过程，不使用缓存跳过
+            for filepath in json_files:
+                if process_file(filepath):
+                    folder_verified += 1
+                else:
+                    folder_errors += 1
+        else:
+            # 先按内容哈希查缓存，只验证内容有变化或未验证过的文件
+            # 牌谱清单中已有未变文件的内容哈希，不需要重新读取
+            known_hashes = manifest_content_hashes(folder)
+            pending = []
+            for filepath in json_files:
+                digest = known_hashes.get(filepath)
+                if digest is None:
+                    try:
+                        digest = content_hash(filepath)
+                    except OSError:
+                        digest = None
+                if digest is not None and digest in cache:
+                    folder_cached += 1
+                    report_files.append({'path': filepath, 'hash': digest, 'status': 'cached', 'messages': []})
+                else:
+                    pending.append(filepath)
+
+            for result in verify_files(pending, args.jobs):
+                filepath = result['path']
+                report_files.append({k: result[k] for k in ('path', 'hash', 'status', 'messages')})
+
+                if result['status'] == 'verified':
+                    cache[result['hash']] = result['sc']
+                    folder_verified += 1
+                    continue
 
-            if result:
-                folder_verified += 1
-                total_verified += 1
-            else:
                 folder_errors += 1
-                total_errors += 1
+                print(f"\n处理: {os.path.basename(filepath)}")
+                for message in result['messages']:
+                    print(message)
+                if result['status'] == 'missing_sc':
+                    move_file_to_error(filepath, "missing sc")
+
+            folder_verified += folder_cached
+
+        total_verified += folder_verified
+        total_cached += folder_cached
+        total_errors += folder_errors
+        report_folders[folder] = {'verified': folder_verified, 'cached': folder_cached, 'errors': folder_errors}
 
         print(f"\n{folder} 统计:")
-        print(f"  验证通过: {folder_verified} 个文件")
+        print(f"  验证通过: {folder_verified} 个文件（其中缓存命中 {folder_cached} 个）")
         print(f"  错误: {folder_errors} 个文件")
 
+    if not args.verbose:
+        save_json_cache(SC_CACHE_FILE, cache, SC_CACHE_VERSION)
+
     print(f"\n{'='*80}")
     print(f"总计统计:")
     print(f"{'='*80}")
-    print(f"  验证通过（无需更新）: {total_verified} 个文件")
+    print(f"  验证通过（无需更新）: {total_verified} 个文件（其中缓存命中 {total_cached} 个）")
     print(f"  错误: {total_errors} 个文件")
     print(f"{'='*80}")
 
+    if args.report:
+        report = {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'total_verified': total_verified,
+            'total_cached': total_cached,
+            'total_errors': total_errors,
+            'folders': report_folders,
+            'files': report_files,
+        }
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"已写入验证报告：{os.path.abspath(args.report)}")
+
     # 如果有错误，返回非零退出码
     if total_errors > 0:
         print(f"\n⚠️  发现 {total_errors} 个文件存在错误，请检查！")
-        import sys
         sys.exit(1)
 
 
@@ -3,8 +3,8 @@
 """比较两种R值计算的差异"""
 
 import json
-from generate_website import extract_recent_games, sort_files_by_date
-from player_stats import calculate_player_stats, scan_files
+from player_stats import calculate_player_stats, extract_recent_games, scan_files
+from utils.helpers import sort_files_by_date
 from summarize_v23 import summarize_log
 
 # 扫描 M-League 文件
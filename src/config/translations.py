@@ -126,6 +126,7 @@ TRANSLATIONS = {
         'unqualified_players': '新人榜',
         'all_players': '所有玩家',
         'change_curve': '变化曲线',
+        'loading_more_games': '正在加载更早的牌谱…',
         'date_and_games': '日期（半庄数）',
         'sort_by': '排序方式',
         'by_rating': '按Rating排名',
@@ -246,6 +247,7 @@ TRANSLATIONS = {
         'unqualified_players': 'Newcomers',
         'all_players': 'All Players',
         'change_curve': 'Change Curve',
+        'loading_more_games': 'Loading earlier games…',
         'date_and_games': 'Date (Games)',
         'sort_by': 'Sort By',
         'by_rating': 'By Rating',
@@ -2,7 +2,9 @@
 """
 提取荣誉牌谱（役满和三倍满）
 
-用法：
+检测逻辑是网站生成流程中的一个阶段：generate_website.py 在读取每个牌谱时调用 HonorScanner.scan()，
+按文件内容哈希缓存检测结果（.cache/honor_hands.json），并直接写出 docs/honor_games.json。
+命令行用法仍可单独扫描一个文件夹：
   python extract_honor_games.py game-logs/m-league -o honor_games.json
 """
 
@@ -11,10 +13,12 @@ import sys
 import json
 import argparse
 import re
-import copy
 from urllib.parse import quote
 from datetime import datetime, timedelta
 
+from utils.file_cache import cache_path, content_hash, hash_bytes, load_json_cache, save_json_cache
+from utils.corpus_manifest import manifest_files
+
 # 手役英文到日文的翻译
 HAND_DICT = {
     "Mangan": "満貫",
@@ -151,256 +155,513 @@ def extract_game_date(game_data, filename):
             pass
     return extract_date_from_filename(filename)
 
-def convert_round_to_tenhou(round_data, game_data, title_suffix=None):
-    """将单局数据转换为天凤格式"""
-    # 翻译和了信息中的手役和役种
-    if isinstance(round_data[-1], list) and len(round_data[-1]) > 0:
-        if round_data[-1][0] == '和了':
-            win_info = round_data[-1][2]
-
-            # 翻译手役（如 "Yakuman 32000点∀" -> "役満32000点∀"）
-            if len(win_info) > 3:
-                point_desc = win_info[3]
-                for en_hand, jp_hand in HAND_DICT.items():
-                    if point_desc.startswith(en_hand):
-                        point_desc = jp_hand + point_desc[len(en_hand):]
-                        break
-                win_info[3] = point_desc
-
-            # 翻译役种列表（从第5个元素开始）
-            new_yaku_list = win_info[:4]  # 前4个元素保持不变
-            for i in range(4, len(win_info)):
-                yaku_str = win_info[i]
-                # 分离役种名和番数
-                if '(' in yaku_str:
-                    yaku_name = yaku_str.split('(')[0]
-                    yaku_han = '(' + yaku_str.split('(')[1]
-                    # 翻译役种名
-                    if yaku_name in YAKU_DICT:
-                        new_yaku_list.append(YAKU_DICT[yaku_name] + yaku_han)
-                    else:
-                        new_yaku_list.append(yaku_str)
-                else:
-                    new_yaku_list.append(yaku_str)
+def translate_win_info(win_info):
+    """
+    翻译和了信息中的手役和役种（返回新列表，不修改原数据）
+
+    例如 "Yakuman 32000点∀" -> "役満32000点∀"，"Riichi(1han)" -> "立直(1han)"
+    """
+    translated = list(win_info[:4])  # 前4个元素保持不变（手役描述除外）
+
+    # 翻译手役
+    if len(translated) > 3:
+        point_desc = translated[3]
+        for en_hand, jp_hand in HAND_DICT.items():
+            if point_desc.startswith(en_hand):
+                translated[3] = jp_hand + point_desc[len(en_hand):]
+                break
+
+    # 翻译役种列表（从第5个元素开始）
+    for yaku_str in win_info[4:]:
+        # 分离役种名和番数
+        if '(' in yaku_str:
+            yaku_name = yaku_str.split('(')[0]
+            yaku_han = '(' + yaku_str.split('(')[1]
+            if yaku_name in YAKU_DICT:
+                translated.append(YAKU_DICT[yaku_name] + yaku_han)
+                continue
+        translated.append(yaku_str)
+
+    return translated
+
+
+def _is_win(result):
+    return isinstance(result, list) and len(result) > 0 and result[0] == '和了'
+
+
+def _translated_round(round_data):
+    """和了信息翻译后的单局数据（浅拷贝：只新建最后的和了元素，其余元素与原数据共用）"""
+    result = round_data[-1]
+    if not _is_win(result):
+        return round_data
+    return round_data[:-1] + [[result[0], result[1], translate_win_info(result[2])] + result[3:]]
+
 
-            round_data[-1][2] = new_yaku_list
+def _tenhou_rule(game_data, rule_disp):
+    rule_info = dict(game_data.get("rule", {}))
+    rule_info["disp"] = rule_disp
+    return rule_info
 
-    # 构建天凤格式的JSON（只包含单局）
-    rule_info = copy.deepcopy(game_data.get("rule", {}))
-    rule_info["disp"] = "M League Rule"
 
-    tenhou_data = {
-        "title": ["Santi League -- M League Rule", title_suffix or "M League Replay"],
+def convert_round_to_tenhou(round_data, game_data, title_suffix=None, rule_disp="M League Rule"):
+    """将单局数据转换为天凤格式（不修改传入的数据）"""
+    return {
+        "title": [f"Santi League -- {rule_disp}", title_suffix or "M League Replay"],
         "name": game_data.get("name", []),
-        "rule": rule_info,
-        "log": [round_data]
+        "rule": _tenhou_rule(game_data, rule_disp),
+        "log": [_translated_round(round_data)]
     }
 
-    return tenhou_data
 
-def generate_tenhou_url(round_data, game_data, title_suffix=None):
-    """生成天凤牌谱再生URL"""
-    # 转换为天凤格式
-    tenhou_data = convert_round_to_tenhou(round_data, game_data, title_suffix=title_suffix)
-    # 生成URL：https://tenhou.net/5/#json=<json_data>
-    # 注意：直接拼接JSON字符串，不需要URL编码
-    json_str = json.dumps(tenhou_data, ensure_ascii=False, separators=(',', ':'))
-    return f"https://tenhou.net/5/#json={json_str}"
+# 紧凑JSON编码器（复用同一个实例，输出与 json.dumps(..., ensure_ascii=False, separators=(',', ':')) 相同）
+_encode_json = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+def encode_tenhou_url(title, names, rule, round_data, translate=False):
+    """
+    直接从原始牌谱结构拼出天凤牌谱再生URL：https://tenhou.net/5/#json=<json>
+
+    各部分分别序列化后拼接，不构造中间的天凤数据结构，也不需要深拷贝牌谱；
+    translate 为 True 时只为最后的和了元素生成翻译后的新列表。
+    JSON字符串直接拼接，不需要URL编码
+
+    参数:
+        title: 天凤标题 [标题, 副标题]
+        names: 玩家名列表
+        rule: 规则字典
+        round_data: 单局数据（不会被修改）
+        translate: 是否翻译和了信息中的手役和役种
+    """
+    result = round_data[-1] if round_data else None
+    if translate and _is_win(result):
+        items = [_encode_json(item) for item in round_data[:-1]]
+        items.append(_encode_json([result[0], result[1], translate_win_info(result[2])] + result[3:]))
+        round_json = '[' + ','.join(items) + ']'
+    else:
+        round_json = _encode_json(round_data)
+    return ''.join((
+        'https://tenhou.net/5/#json={"title":', _encode_json(title),
+        ',"name":', _encode_json(names),
+        ',"rule":', _encode_json(rule),
+        ',"log":[', round_json, ']}'
+    ))
+
+
+def generate_tenhou_url(round_data, game_data, title_suffix=None, rule_disp="M League Rule"):
+    """生成天凤牌谱再生URL（不修改 round_data）"""
+    return encode_tenhou_url(
+        [f"Santi League -- {rule_disp}", title_suffix or "M League Replay"],
+        game_data.get("name", []),
+        _tenhou_rule(game_data, rule_disp),
+        round_data,
+        translate=True
+    )
+
+def _win_records(game_data, filename, rule_disp):
+    """四麻牌谱中的役满、三倍满和稀有役种和了"""
+    records = []
+    players = game_data.get('name', [])
+    date_str = extract_game_date(game_data, filename)
+
+    for round_idx, round_data in enumerate(game_data['log']):
+        # 获取局数信息
+        round_info = round_data[0]
+        round_name = parse_round_name(round_info)
+
+        # 检查最后一个元素是否是和了
+        last_element = round_data[-1]
+        if not (isinstance(last_element, list) and len(last_element) > 0 and last_element[0] == '和了'):
+            continue
+
+        win_info = last_element[2]
+        point_desc = win_info[3] if len(win_info) > 3 else ''
+
+        winner_idx = win_info[0]
+        winner = players[winner_idx] if winner_idx < len(players) else 'Unknown'
+
+        # 提取役种
+        yaku_list = win_info[4:] if len(win_info) > 4 else []
+        yaku_str = ', '.join(yaku_list)
+
+        # 判断自摸或荣和
+        deltas = last_element[1] if len(last_element) > 1 else []
+        is_tsumo = False
+        if isinstance(deltas, list):
+            negatives = sum(1 for d in deltas if isinstance(d, (int, float)) and d < 0)
+            is_tsumo = negatives >= 3
+
+        finish_text = '自摸' if is_tsumo else '荣和'
+
+        # 检查是否包含稀有役种
+        rare_yaku_found = []
+        for yaku in yaku_list:
+            base = yaku.split('(')[0]
+            if base in RARE_YAKU:
+                rare_yaku_found.append(base)
+
+        # 检查是否是役满或三倍满
+        is_yakuman_or_sanbaiman = '役満' in point_desc or 'Yakuman' in point_desc or 'Sanbaiman' in point_desc
+
+        # 分类处理
+        if is_yakuman_or_sanbaiman:
+            # 役满和三倍满
+            # 特殊处理：Kazoe Yakuman 应该显示为三倍满
+            if 'Kazoe Yakuman' in point_desc:
+                main_desc = '三倍满'
+                honor_type = 'sanbaiman'
+            elif '役満' in point_desc or 'Yakuman' in point_desc:
+                honor_type = 'yakuman'
+                base_name = None
+                for yaku in yaku_list:
+                    base = yaku.split('(')[0]
+                    if base in YAKU_NAME_CN:
+                        base_name = YAKU_NAME_CN[base]
+                        break
+                if base_name:
+                    main_desc = f"{base_name}役满"
+                else:
+                    main_desc = "役满"
+            else:
+                main_desc = '三倍满'
+                honor_type = 'sanbaiman'
+        elif rare_yaku_found:
+            # 稀有役种（不是役满或三倍满）
+            main_rare_yaku = rare_yaku_found[0]
+            main_desc = YAKU_NAME_CN.get(main_rare_yaku, '稀有役种')
+            honor_type = 'rare_yaku'
+        else:
+            continue
+
+        title_suffix = f"{winner}的{main_desc}{finish_text}"
+
+        # 生成天凤URL（直接从原始数据序列化，不修改也不复制牌谱）
+        tenhou_url = generate_tenhou_url(round_data, game_data, title_suffix=title_suffix, rule_disp=rule_disp)
+
+        honor_game = {
+            'date': date_str,
+            'filename': filename,
+            'round': round_name,
+            'round_idx': round_idx,
+            'winner': winner,
+            'point_desc': point_desc,
+            'yaku': yaku_str,
+            'yaku_list': yaku_list,
+            'is_tsumo': is_tsumo,
+            'title_suffix': title_suffix,
+            'tenhou_url': tenhou_url,
+            'type': honor_type
+        }
+        if honor_type == 'rare_yaku':
+            honor_game['rare_yaku'] = rare_yaku_found
+        records.append(honor_game)
+
+    return records
+
+
+def _sanma_records(game_data, filename):
+    """三麻牌谱中的役满和了"""
+    from player_stats import YAKU_TRANSLATION
+
+    records = []
+
+    # 提取文件名中的日期信息
+    date_match = re.match(r'(\d+)_(\d+)_(\d+)_(.+)\.json', filename)
+    if date_match:
+        month, day, year, event_type = date_match.groups()
+        date_str_zh = f"{year}年{month}月{day}日"
+        date_str_en = f"{year}-{month}-{day}"
+    else:
+        date_str_zh = filename
+        date_str_en = filename
+
+    # 遍历所有局
+    for round_idx, round_data in enumerate(game_data.get("log", []), 1):
+        if len(round_data) < 10:
+            continue
+
+        result = round_data[-1]
+        if not isinstance(result, list) or len(result) < 3:
+            continue
+
+        # 检查是否是和了
+        if result[0] != "和了":
+            continue
+
+        # 获取役种列表
+        yaku_info = result[2]
+        if len(yaku_info) < 5:
+            continue
+
+        yaku_list = yaku_info[4:]  # 役种从第5个元素开始
+        fan_info = yaku_info[3] if len(yaku_info) > 3 else ""
+
+        # 检查是否包含役满 (检查yaku_list和fan_info)
+        has_yakuman = (any('役満' in str(yaku) or 'Yakuman' in str(yaku) for yaku in yaku_list) or
+                       '役満' in str(fan_info) or 'Yakuman' in str(fan_info))
+        if not has_yakuman:
+            continue
+
+        winner_seat = yaku_info[0]
+
+        # 获取玩家名字
+        name_list = game_data.get("name", [])
+        winner_name = name_list[winner_seat] if winner_seat < len(name_list) else f"玩家{winner_seat+1}"
+
+        # 确定场风和局数
+        round_info = round_data[0]
+        if len(round_info) >= 3:
+            wind = round_info[0]  # 0=东, 1=南
+            dealer = round_info[1]  # 庄家位置
+            honba = round_info[2]  # 本场数
+            wind_str = "东" if wind == 0 else "南"
+            round_str = f"{wind_str}{dealer+1}局{honba}本场"
+        else:
+            round_str = f"第{round_idx}局"
+
+        # 获取役种描述用于标题，翻译成中文
+        yaku_names = []
+        for y in yaku_list:
+            yaku_name_en = str(y).split('(')[0]
+            yaku_names.append(YAKU_TRANSLATION.get(yaku_name_en, yaku_name_en))
+        yaku_desc = ', '.join(yaku_names)
+
+        # 构建嵌入式JSON天凤URL
+        tenhou_url = encode_tenhou_url(
+            ["Santi League -- Sanma", f"{winner_name}的{yaku_desc}"],
+            name_list,
+            {"disp": "三人麻雀"},
+            round_data
+        )
+
+        records.append({
+            'date': date_str_zh,
+            'date_en': date_str_en,
+            'round': round_str,
+            'winner': winner_name,
+            'yaku_list': yaku_list,
+            'fan_info': fan_info,
+            'tenhou_url': tenhou_url,
+            'type': 'yakuman'
+        })
+
+    return records
+
+
+# 各联赛的荣誉牌谱检测方式：(检测函数, 天凤牌谱中显示的规则名)
+HONOR_RULES = {
+    'm-league': (_win_records, 'M League Rule'),
+    'ema': (_win_records, 'EMA Rule'),
+    'sanma': (_sanma_records, None),
+}
+
+
+def detect_honor_hands(game_data, filename, league='m-league'):
+    """
+    检测单个牌谱文件中的荣誉牌谱
+
+    参数:
+        game_data: 牌谱JSON数据
+        filename: 牌谱文件名（日期回退和记录用）
+        league: 联赛，决定检测规则（见 HONOR_RULES）
+
+    返回:
+        list: 荣誉牌谱记录（按局的顺序）
+    """
+    detector, rule_disp = HONOR_RULES[league]
+    if rule_disp is None:
+        return detector(game_data, filename)
+    return detector(game_data, filename, rule_disp)
+
+
+# 检测结果按文件内容哈希缓存，所有联赛共用一个缓存文件；
+# 检测代码（本文件和 mahjong_hand_analyzer.py）变化时整个缓存失效
+HONOR_CACHE_FILE = cache_path('honor_hands.json')
+HONOR_CACHE_VERSION = 1
+
+_honor_cache = None
+_honor_cache_version = None
+_honor_cache_used = set()
+_honor_cache_dirty = False
+
+
+def _honor_code_version():
+    global _honor_cache_version
+    if _honor_cache_version is None:
+        here = os.path.dirname(os.path.abspath(__file__))
+        sources = (os.path.abspath(__file__), os.path.join(here, 'mahjong_hand_analyzer.py'))
+        fingerprint = hash_bytes(''.join(content_hash(p) for p in sources).encode())
+        _honor_cache_version = f"{HONOR_CACHE_VERSION}:{fingerprint}"
+    return _honor_cache_version
+
 
-def extract_honor_games(folder, recursive=True):
-    """提取所有役满、三倍满和稀有役种的牌谱"""
-    yakuman_sanbaiman_games = []  # 役满和三倍满
-    rare_yaku_games = []  # 稀有役种
+def _get_honor_cache():
+    global _honor_cache
+    if _honor_cache is None:
+        _honor_cache = load_json_cache(HONOR_CACHE_FILE, _honor_code_version())
+    return _honor_cache
 
-    # 扫描所有JSON文件
-    if recursive:
+
+def save_honor_cache(prune=False):
+    """
+    保存荣誉牌谱检测缓存
+
+    参数:
+        prune: 是否只保留本次运行用到的条目（完整构建扫描了所有联赛时使用）
+    """
+    global _honor_cache_dirty
+    if _honor_cache is None:
+        return
+    if prune:
+        stale = [key for key in _honor_cache if key not in _honor_cache_used]
+        for key in stale:
+            del _honor_cache[key]
+        _honor_cache_dirty = _honor_cache_dirty or bool(stale)
+        _honor_cache_used.clear()  # build_daemon 多次构建时每次重新记录
+    if _honor_cache_dirty:
+        save_json_cache(HONOR_CACHE_FILE, _honor_cache, _honor_code_version())
+        _honor_cache_dirty = False
+
+
+class HonorScanner:
+    """
+    荣誉牌谱检测阶段
+
+    在联赛的主扫描流程中对每个已读取的牌谱调用 scan()，
+    内容未变的文件直接使用缓存的检测结果，不需要单独再扫描一遍全部牌谱
+    """
+
+    def __init__(self, league='m-league'):
+        self.league = league
+        self._records = {}  # {文件路径: [记录, ...]}，按扫描顺序
+
+    def scan(self, filepath, game_data, digest):
+        """
+        检测一个牌谱文件
+
+        参数:
+            filepath: 牌谱路径
+            game_data: 已解析的牌谱JSON
+            digest: 文件内容哈希（utils.file_cache.hash_bytes / content_hash）
+
+        返回:
+            list: 该文件的荣誉牌谱记录
+        """
+        global _honor_cache_dirty
+        filename = os.path.basename(filepath)
+        # 记录中包含文件名（以及文件名回退的日期），文件名也是缓存键的一部分
+        key = f"{self.league}:{digest}:{filename}"
+        cache = _get_honor_cache()
+        records = cache.get(key)
+        if records is None:
+            records = detect_honor_hands(game_data, filename, self.league)
+            cache[key] = records
+            _honor_cache_dirty = True
+        _honor_cache_used.add(key)
+        self._records[filepath] = records
+        return records
+
+    def games(self):
+        """所有记录（按扫描顺序）"""
+        return [record for records in self._records.values() for record in records]
+
+    def grouped(self):
+        """
+        按类型分组的记录，各组按日期排序（最新的在前，同一天按文件路径和局的顺序）
+
+        返回:
+            dict: {'yakuman_sanbaiman': [...], 'rare_yaku': [...]}
+        """
+        yakuman_sanbaiman_games = []
+        rare_yaku_games = []
+        for filepath in sorted(self._records):
+            for record in self._records[filepath]:
+                if record['type'] == 'rare_yaku':
+                    rare_yaku_games.append(record)
+                else:
+                    yakuman_sanbaiman_games.append(record)
+
+        yakuman_sanbaiman_games.sort(key=lambda x: x['date'], reverse=True)
+        rare_yaku_games.sort(key=lambda x: x['date'], reverse=True)
+        return {
+            'yakuman_sanbaiman': yakuman_sanbaiman_games,
+            'rare_yaku': rare_yaku_games
+        }
+
+
+def honor_games_document(result):
+    """
+    分组结果 → honor_games.json 的数据结构（页面生成器也直接使用这个结构）
+
+    参数:
+        result: HonorScanner.grouped() / extract_honor_games() 的返回值
+    """
+    yakuman_sanbaiman_games = result['yakuman_sanbaiman']
+    rare_yaku_games = result['rare_yaku']
+    yakuman_count = sum(1 for g in yakuman_sanbaiman_games if g['type'] == 'yakuman')
+    sanbaiman_count = sum(1 for g in yakuman_sanbaiman_games if g['type'] == 'sanbaiman')
+    rare_yaku_count = len(rare_yaku_games)
+    return {
+        'total': len(yakuman_sanbaiman_games) + rare_yaku_count,
+        'yakuman_count': yakuman_count,
+        'sanbaiman_count': sanbaiman_count,
+        'rare_yaku_count': rare_yaku_count,
+        'yakuman_sanbaiman_games': yakuman_sanbaiman_games,
+        'rare_yaku_games': rare_yaku_games
+    }
+
+
+def extract_honor_games(folder, recursive=True, league='m-league'):
+    """提取所有役满、三倍满和稀有役种的牌谱（单独扫描一个文件夹，使用同一个检测阶段和缓存）"""
+    # 扫描所有JSON文件（game-logs/ 下的文件夹查询牌谱清单）
+    files = manifest_files(folder, recursive)
+    if files is None and recursive:
         files = []
         for root, dirs, filenames in os.walk(folder):
             for filename in filenames:
                 if filename.endswith('.json'):
                     files.append(os.path.join(root, filename))
-    else:
+    elif files is None:
         files = [os.path.join(folder, f) for f in os.listdir(folder) if f.endswith('.json')]
 
     print(f"正在扫描 {len(files)} 个文件...", file=sys.stderr)
 
+    scanner = HonorScanner(league)
     for filepath in sorted(files):
-        filename = os.path.basename(filepath)
-
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                game_data = json.load(f)
+            with open(filepath, 'rb') as f:
+                raw = f.read()
+            game_data = json.loads(raw)
         except Exception as e:
             print(f"读取文件失败: {filepath} - {e}", file=sys.stderr)
             continue
 
-        players = game_data.get('name', [])
-        date_str = extract_game_date(game_data, filename)
-
-        for round_idx, round_data in enumerate(game_data['log']):
-            # 获取局数信息
-            round_info = round_data[0]
-            round_name = parse_round_name(round_info)
-
-            # 检查最后一个元素是否是和了
-            last_element = round_data[-1]
-            if isinstance(last_element, list) and len(last_element) > 0:
-                if last_element[0] == '和了':
-                    win_info = last_element[2]
-                    point_desc = win_info[3] if len(win_info) > 3 else ''
-
-                    winner_idx = win_info[0]
-                    winner = players[winner_idx] if winner_idx < len(players) else 'Unknown'
-
-                    # 提取役种
-                    yaku_list = win_info[4:] if len(win_info) > 4 else []
-                    yaku_str = ', '.join(yaku_list)
-
-                    # 判断自摸或荣和
-                    deltas = last_element[1] if len(last_element) > 1 else []
-                    is_tsumo = False
-                    if isinstance(deltas, list):
-                        negatives = sum(1 for d in deltas if isinstance(d, (int, float)) and d < 0)
-                        is_tsumo = negatives >= 3
-
-                    finish_text = '自摸' if is_tsumo else '荣和'
-
-                    # 检查是否包含稀有役种
-                    has_rare_yaku = False
-                    rare_yaku_found = []
-                    for yaku in yaku_list:
-                        base = yaku.split('(')[0]
-                        if base in RARE_YAKU:
-                            has_rare_yaku = True
-                            rare_yaku_found.append(base)
-
-                    # 检查是否是役满或三倍满
-                    is_yakuman_or_sanbaiman = '役満' in point_desc or 'Yakuman' in point_desc or 'Sanbaiman' in point_desc
-
-                    # 分类处理
-                    if is_yakuman_or_sanbaiman:
-                        # 役满和三倍满
-                        # 特殊处理：Kazoe Yakuman 应该显示为三倍满
-                        if 'Kazoe Yakuman' in point_desc:
-                            main_desc = '三倍满'
-                            honor_type = 'sanbaiman'
-                        elif '役満' in point_desc or 'Yakuman' in point_desc:
-                            honor_type = 'yakuman'
-                            base_name = None
-                            for yaku in yaku_list:
-                                base = yaku.split('(')[0]
-                                if base in YAKU_NAME_CN:
-                                    base_name = YAKU_NAME_CN[base]
-                                    break
-                            if base_name:
-                                main_desc = f"{base_name}役满"
-                            else:
-                                main_desc = "役满"
-                        else:
-                            main_desc = '三倍满'
-                            honor_type = 'sanbaiman'
-
-                        title_suffix = f"{winner}的{main_desc}{finish_text}"
-
-                        # 生成天凤URL（需要深拷贝以避免修改原始数据）
-                        round_data_copy = copy.deepcopy(round_data)
-                        tenhou_url = generate_tenhou_url(round_data_copy, game_data, title_suffix=title_suffix)
-
-                        honor_game = {
-                            'date': date_str,
-                            'filename': filename,
-                            'round': round_name,
-                            'round_idx': round_idx,
-                            'winner': winner,
-                            'point_desc': point_desc,
-                            'yaku': yaku_str,
-                            'yaku_list': yaku_list,
-                            'is_tsumo': is_tsumo,
-                            'title_suffix': title_suffix,
-                            'tenhou_url': tenhou_url,
-                            'type': honor_type
-                        }
-
-                        yakuman_sanbaiman_games.append(honor_game)
-                        print(f"✓ [役满/三倍满] {date_str} {round_name} {winner} - {point_desc}", file=sys.stderr)
-
-                    elif has_rare_yaku:
-                        # 稀有役种（不是役满或三倍满）
-                        # 找出主要的稀有役
-                        main_rare_yaku = rare_yaku_found[0] if rare_yaku_found else None
-                        if main_rare_yaku and main_rare_yaku in YAKU_NAME_CN:
-                            main_desc = YAKU_NAME_CN[main_rare_yaku]
-                        else:
-                            main_desc = '稀有役种'
-
-                        title_suffix = f"{winner}的{main_desc}{finish_text}"
-
-                        # 生成天凤URL
-                        round_data_copy = copy.deepcopy(round_data)
-                        tenhou_url = generate_tenhou_url(round_data_copy, game_data, title_suffix=title_suffix)
-
-                        honor_game = {
-                            'date': date_str,
-                            'filename': filename,
-                            'round': round_name,
-                            'round_idx': round_idx,
-                            'winner': winner,
-                            'point_desc': point_desc,
-                            'yaku': yaku_str,
-                            'yaku_list': yaku_list,
-                            'is_tsumo': is_tsumo,
-                            'title_suffix': title_suffix,
-                            'tenhou_url': tenhou_url,
-                            'type': 'rare_yaku',
-                            'rare_yaku': rare_yaku_found
-                        }
-
-                        rare_yaku_games.append(honor_game)
-                        print(f"✓ [稀有役种] {date_str} {round_name} {winner} - {main_desc}", file=sys.stderr)
-
-    # 按日期排序（最新的在前）
-    yakuman_sanbaiman_games.sort(key=lambda x: x['date'], reverse=True)
-    rare_yaku_games.sort(key=lambda x: x['date'], reverse=True)
+        for record in scanner.scan(filepath, game_data, hash_bytes(raw)):
+            if record['type'] == 'rare_yaku':
+                print(f"✓ [稀有役种] {record['date']} {record['round']} {record['winner']} - {record['title_suffix']}", file=sys.stderr)
+            else:
+                print(f"✓ [役满/三倍满] {record['date']} {record['round']} {record['winner']} - {record['point_desc']}", file=sys.stderr)
 
-    return {
-        'yakuman_sanbaiman': yakuman_sanbaiman_games,
-        'rare_yaku': rare_yaku_games
-    }
+    save_honor_cache()
+    return scanner.grouped()
 
 def main():
     ap = argparse.ArgumentParser(description="提取役满、三倍满和稀有役种的牌谱")
     ap.add_argument("folder", help="包含牌谱 JSON 的文件夹路径")
     ap.add_argument("-o", "--output", default="honor_games.json", help="输出文件路径")
     ap.add_argument("--no-recursive", action="store_true", help="不递归扫描子目录")
+    ap.add_argument("--league", default="m-league", choices=sorted(HONOR_RULES), help="联赛（决定检测规则）")
     args = ap.parse_args()
 
     folder = os.path.abspath(args.folder)
-    result = extract_honor_games(folder, recursive=not args.no_recursive)
-
-    yakuman_sanbaiman_games = result['yakuman_sanbaiman']
-    rare_yaku_games = result['rare_yaku']
+    output = honor_games_document(extract_honor_games(folder, recursive=not args.no_recursive, league=args.league))
 
     # 统计信息
-    yakuman_count = sum(1 for g in yakuman_sanbaiman_games if g['type'] == 'yakuman')
-    sanbaiman_count = sum(1 for g in yakuman_sanbaiman_games if g['type'] == 'sanbaiman')
-    rare_yaku_count = len(rare_yaku_games)
-    total = len(yakuman_sanbaiman_games) + rare_yaku_count
-
-    print(f"\n找到 {total} 个荣誉牌谱", file=sys.stderr)
-    print(f"- 役满: {yakuman_count} 个", file=sys.stderr)
-    print(f"- 三倍满: {sanbaiman_count} 个", file=sys.stderr)
-    print(f"- 稀有役种: {rare_yaku_count} 个", file=sys.stderr)
-
-    # 保存结果（新的数据结构）
-    output = {
-        'total': total,
-        'yakuman_count': yakuman_count,
-        'sanbaiman_count': sanbaiman_count,
-        'rare_yaku_count': rare_yaku_count,
-        'yakuman_sanbaiman_games': yakuman_sanbaiman_games,
-        'rare_yaku_games': rare_yaku_games
-    }
+    print(f"\n找到 {output['total']} 个荣誉牌谱", file=sys.stderr)
+    print(f"- 役满: {output['yakuman_count']} 个", file=sys.stderr)
+    print(f"- 三倍满: {output['sanbaiman_count']} 个", file=sys.stderr)
+    print(f"- 稀有役种: {output['rare_yaku_count']} 个", file=sys.stderr)
 
+    # 保存结果
     with open(args.output, 'w', encoding='utf-8') as f:
         json.dump(output, f, ensure_ascii=False, indent=2)
 
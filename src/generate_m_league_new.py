@@ -11,6 +11,7 @@ import html as html_module
 
 # 导入现有功能
 from player_stats import calculate_player_stats, scan_files, summarize_log, YAKU_TRANSLATION
+from utils.fragment_builder import FragmentBuilder
 from template_renderer import render_m_league_tabs
 from generate_m_league_tabs import generate_ranking_content
 from generate_website import (
@@ -39,11 +40,11 @@ def generate_recent_games_content(recent_games, stats_data, t, lang='zh'):
     player_list.sort(key=lambda x: -x['games'])
 
     # 构建玩家选项卡
-    player_tabs = ""
+    player_tabs = FragmentBuilder()
     all_text = t.get('all_players', '所有玩家')
-    player_tabs += f'<button class="player-filter-btn active" data-player="all">{all_text}</button>\n'
+    player_tabs.add(f'<button class="player-filter-btn active" data-player="all">{all_text}</button>\n')
     for player in player_list:
-        player_tabs += f'<button class="player-filter-btn" data-player="{player["name"]}">{player["name"]} ({player["games"]}{t.get("games", "局")})</button>\n'
+        player_tabs.add(f'<button class="player-filter-btn" data-player="{player["name"]}">{player["name"]} ({player["games"]}{t.get("games", "局")})</button>\n')
 
     # 构建游戏数据（JSON格式，供JavaScript使用）
     games_data = []
@@ -99,7 +100,7 @@ def generate_recent_games_content(recent_games, stats_data, t, lang='zh'):
 
     <!-- 玩家筛选选项卡 -->
     <div class="player-filter-tabs" style="margin-bottom: 20px; display: flex; flex-wrap: wrap; gap: 8px;">
-        {player_tabs}
+        {player_tabs.build()}
     </div>
 
     <!-- 牌谱表格 -->
@@ -354,7 +355,7 @@ def generate_honor_games_content(honor_games, t, lang='zh'):
     if not honor_games or len(honor_games) == 0:
         return f"<p style='text-align: center; color: #999; padding: 40px;'>{t.get('no_honor_games', '暂无荣誉牌谱')}</p>"
 
-    honor_cards = ""
+    honor_cards = FragmentBuilder()
     for game in honor_games:
         # 翻译役种，对宝牌保留飜数
         yaku_list = game.get('yaku_list', [])
@@ -418,7 +419,7 @@ def generate_honor_games_content(honor_games, t, lang='zh'):
         # HTML转义URL中的特殊字符
         escaped_url = html_module.escape(game['tenhou_url'], quote=True)
 
-        honor_cards += f"""
+        honor_cards.add(f"""
         <div class="honor-card {game_type_class}">
             <div class="honor-type">{game_type_text}</div>
             <div class="honor-info">
@@ -429,11 +430,11 @@ def generate_honor_games_content(honor_games, t, lang='zh'):
             </div>
             <a href="{escaped_url}" target="_blank" class="honor-replay-btn">{t['view_replay']}</a>
         </div>
-        """
+        """)
 
     html_content = f"""
     <div class="honor-games-grid">
-        {honor_cards}
+        {honor_cards.build()}
     </div>
     """
 
@@ -452,7 +453,7 @@ def generate_player_details_html(name, data, t, lang='zh', league_avg=None):
     tsumo_only_win_hands = data.get('tsumo_only_win_hands', 0)
 
     # 手役统计（前10）
-    yaku_html = ""
+    yaku_html = FragmentBuilder()
     if data.get('yaku_count'):
         yaku_sorted = sorted(data['yaku_count'].items(), key=lambda x: -x[1])[:10]
         for yaku, count in yaku_sorted:
@@ -464,13 +465,13 @@ def generate_player_details_html(name, data, t, lang='zh', league_avg=None):
             rate = data['yaku_rate'].get(yaku, 0)
             avg_rate = league_avg.get('yaku_rate', {}).get(yaku, 0) if league_avg else 0
             avg_text = f' <span class="league-avg">({t["average"]}{avg_rate}%)</span>' if avg_rate > 0 else ''
-            yaku_html += f"<li>{yaku_name}: {count}{t['times']} ({rate}%){avg_text}</li>"
+            yaku_html.add(f"<li>{yaku_name}: {count}{t['times']} ({rate}%){avg_text}</li>")
 
     # 对战情况表格
-    vs_players_html = ""
+    vs_players_html = FragmentBuilder()
     if data.get('vs_players'):
         vs_sorted = sorted(data['vs_players'].items(), key=lambda x: -x[1]['games'])
-        vs_players_html = f"""
+        vs_players_html = FragmentBuilder(f"""
         <table class="vs-table">
             <thead>
                 <tr>
@@ -484,7 +485,7 @@ def generate_player_details_html(name, data, t, lang='zh', league_avg=None):
                 </tr>
             </thead>
             <tbody>
-        """
+        """)
 
         for vs_player, vs_data in vs_sorted:
             vs_win_rate = vs_data['win_rate']
@@ -496,7 +497,7 @@ def generate_player_details_html(name, data, t, lang='zh', league_avg=None):
             score_diff = vs_data['score_diff']
             score_diff_class = 'positive' if score_diff > 0 else 'negative' if score_diff < 0 else ''
 
-            vs_players_html += f"""
+            vs_players_html.add(f"""
                 <tr>
                     <td>{vs_player}</td>
                     <td>{vs_data['games']}</td>
@@ -506,11 +507,11 @@ def generate_player_details_html(name, data, t, lang='zh', league_avg=None):
                     <td class="{net_class}">{net_points:+}</td>
                     <td class="{score_diff_class}">{score_diff:+}</td>
                 </tr>
-            """
-        vs_players_html += """
+            """)
+        vs_players_html.add("""
             </tbody>
         </table>
-        """
+        """)
 
     html = f"""
     <div class="player-card" id="player-{player_id}">
@@ -668,13 +669,13 @@ def generate_player_details_html(name, data, t, lang='zh', league_avg=None):
 
         {f'''<div class="section">
             <h4>{t['vs_stats']}</h4>
-            {vs_players_html}
+            {vs_players_html.build()}
         </div>''' if vs_players_html else ''}
 
         {f'''<div class="section">
             <h4>{t['yaku_stats']}</h4>
             <ul class="yaku-list">
-                {yaku_html}
+                {yaku_html.build()}
             </ul>
         </div>''' if yaku_html else ''}
 
@@ -753,9 +754,9 @@ def generate_m_league_tabs_page(lang='zh'):
     sorted_players = sorted(stats_dict.items(), key=lambda x: (-x[1]["games"], x[0]))
 
     # 生成下拉选项
-    player_options = ""
+    player_options = FragmentBuilder()
     for name, data in sorted_players:
-        player_options += f'<option value="{name}">{name} ({data["games"]}局)</option>\n'
+        player_options.add(f'<option value="{name}">{name} ({data["games"]}局)</option>\n')
 
     # 生成每个玩家的详细HTML
     players_data = {}
@@ -799,7 +800,7 @@ def generate_m_league_tabs_page(lang='zh'):
         recent_content=recent_content,
         honor_content=honor_content,
         ranking_content=ranking_content,
-        player_options=player_options,
+        player_options=player_options.build(),
         players_data=players_data,
         select_player_label=t['select_player'],
         choose_player=t['choose_player'],
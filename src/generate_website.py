@@ -3,16 +3,21 @@
 生成静态网站
 
 用法：
-  python generate_website.py
+  python generate_website.py           # 只重新生成输入有变化的页面
+  python generate_website.py --force   # 重新生成全部页面
+  python generate_website.py --watch   # 监视 game-logs/，只重新生成受影响的页面（参数见 watch_logs.py）
 """
 
 import os
 import sys
 import json
 import re
+import glob
+import traceback
 import html as html_module
-from datetime import datetime, timedelta
-from player_stats import calculate_player_stats, scan_files, summarize_log, YAKU_TRANSLATION
+from datetime import datetime
+from player_stats import calculate_player_stats, extract_recent_games, scan_files, summarize_log, YAKU_TRANSLATION
+from mahjong_hand_analyzer import yaku_cache_info
 
 # 导入别名处理函数
 try:
@@ -30,9 +35,12 @@ from generate_m_league_tabs import generate_ranking_content
 
 # 导入新的模块化组件
 from config.translations import TRANSLATIONS, YAKU_TRANSLATION_EN
+from utils.fragment_builder import FragmentBuilder
 from generators.page_generators import generate_index_page, generate_ema_page, generate_sanma_honor_page
 from generators.content_generators import (
     generate_recent_games_content_for_tabs,
+    build_recent_games_records,
+    recent_games_shard_key,
     generate_honor_games_content_for_tabs,
     generate_player_details_html_for_tabs,
     generate_leaderboard_content,
@@ -44,6 +52,11 @@ from generators.content_generators import (
     generate_flush_leaderboard_content
 )
 from utils.helpers import sort_files_by_date
+from utils.output_stage import optimize_outputs
+from utils.log_cache import read_log
+from extract_honor_games import HonorScanner, honor_games_document, save_honor_cache
+from summarize_v23 import cached_summarize_log, save_summary_cache
+from utils.build_graph import BuildManifest
 
 # 为了向后兼容，保留原有的TRANSLATIONS变量
 # TRANSLATIONS现在从config.translations导入
@@ -96,191 +109,91 @@ def extract_latest_date(files):
     return None
 
 
-def extract_recent_games(files, results, count=5, all_results=None, uma_config=None, origin_points=25000):
+def write_recent_games_shards(recent_games, output_dir):
     """
-    提取最近的N个牌谱信息，包含R值计算详情
+    把牌谱历史按月份拆分成JSON分片，供牌谱历史标签页按需加载
 
-    参数:
-    - uma_config: Uma配置字典，例如 {1: 15000, 2: 5000, 3: -5000, 4: -15000} (EMA)
-                 默认为 {1: 45000, 2: 5000, 3: -15000, 4: -35000} (M-League)
-    - origin_points: 起始分数/返点，M-League为25000，EMA为30000
-
-    返回格式: [
-        {
-            'date': '2025年1月15日',
-            'players_detail': [
-                {
-                    'name': '玩家名',
-                    'rank': 1,
-                    'final_points': 30000,
-                    'r_before': 1500.0,
-                    'games_before': 10,
-                    'score_change': 50.0,  # (uma + 素点差) / 1000
-                    'r_correction': 0.0,   # (桌平均R - 玩家R) / 40
-                    'games_correction': 0.8,  # 试合数补正系数
-                    'r_change': 40.0,
-                    'r_after': 1540.0
-                },
-                ...
-            ],
-            'table_avg_r': 1500.0
-        },
-        ...
-    ]
-    """
-    from collections import defaultdict
-    from player_stats import calculate_tenhou_r_value
-
-    # 设置默认UMA配置（M-League）
-    if uma_config is None:
-        uma_config = {1: 45000, 2: 5000, 3: -15000, 4: -35000}
+    输出文件:
+    - <YYYY-MM>.json: 该月的牌谱记录（最新在前）
+    - rating.json: 所有玩家的Rating历史（打开Rating曲线时才加载）
+    - index.json: 分片索引 {'total': 总局数, 'shards': [{'month', 'file', 'count'}, ...]}（最新月份在前）
 
-    # 创建文件和结果的映射，按时间顺序排序
-    file_result_pairs = []
-    files_without_timestamp = []
+    目录中已不对应任何月份的旧分片会被删除
 
-    for fp, result in zip(files, results):
-        # 尝试从JSON中读取完整的时间戳
-        timestamp = None
-        error_reason = None
+    返回:
+        dict: 分片索引（没有牌谱时返回None）
+    """
+    if not recent_games:
+        return None
 
-        try:
-            with open(fp, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                title = data.get('title', [])
-                if isinstance(title, list) and len(title) > 1:
-                    timestamp_str = title[1]
-                    # 解析时间戳："MM/DD/YYYY, HH:MM:SS AM/PM"
-                    if timestamp_str[-1] == 'M':
-                        timestamp = datetime.strptime(timestamp_str, "%m/%d/%Y, %I:%M:%S %p")
-                    else:
-                        timestamp = datetime.strptime(timestamp_str, "%d/%m/%Y, %H:%M:%S")
-                else:
-                    error_reason = "title字段不存在或格式错误"
-        except json.JSONDecodeError as e:
-            error_reason = f"JSON解析失败: {str(e)}"
-        except ValueError as e:
-            error_reason = f"时间戳格式错误: {str(e)}"
-        except Exception as e:
-            error_reason = f"读取失败: {str(e)}"
-
-        # 如果无法从JSON获取时间戳，记录错误
-        if timestamp is None:
-            files_without_timestamp.append({
-                'path': fp,
-                'filename': os.path.basename(fp),
-                'reason': error_reason or "未知原因"
-            })
-        else:
-            file_result_pairs.append((timestamp, fp, result))
-
-    # 如果有文件缺失时间戳，抛出异常
-    if files_without_timestamp:
-        error_msg = f"\n{'='*80}\n❌ 错误：发现 {len(files_without_timestamp)} 个牌谱文件缺失时间戳\n{'='*80}\n"
-        for i, file_info in enumerate(files_without_timestamp, 1):
-            error_msg += f"\n{i}. 文件：{file_info['filename']}\n"
-            error_msg += f"   路径：{file_info['path']}\n"
-            error_msg += f"   原因：{file_info['reason']}\n"
-        error_msg += f"\n{'='*80}\n"
-        error_msg += "请确保所有牌谱JSON文件都包含有效的时间戳：json['title'][1]\n"
-        error_msg += "格式：\"MM/DD/YYYY, HH:MM:SS AM/PM\"\n"
-        error_msg += f"{'='*80}\n"
-        raise ValueError(error_msg)
-
-    # 按时间升序排序（从旧到新）
-    file_result_pairs.sort(key=lambda x: x[0])
-
-    # 追踪所有玩家的R值和场数
-    player_r_values = defaultdict(lambda: 1500.0)
-    player_games = defaultdict(int)
-
-    # 加载玩家别名配置
+    os.makedirs(output_dir, exist_ok=True)
     alias_map = load_player_aliases()
 
-    # 计算所有游戏的R值（为了得到最近几场的R值状态）
-    all_game_details = []
+    # recent_games 最新在前，按月份分组时保持原顺序
+    shards = {}
+    for game in recent_games:
+        shards.setdefault(recent_games_shard_key(game), []).append(game)
 
-    for timestamp, fp, result in file_result_pairs:
-        summary = result.get('summary', [])
+    index = {'total': len(recent_games), 'shards': []}
+    player_rating_history = {}
+    for month, games in shards.items():
+        games_data, rating_history = build_recent_games_records(games, alias_map)
+        for name, history in rating_history.items():
+            player_rating_history.setdefault(name, []).extend(history)
 
-        # 计算这局的桌平均R值
-        # 使用归一化后的玩家名来计算桌平均R
-        table_players = [p.get('name', '') for p in summary if p.get('name')]
-        normalized_table_players = [normalize_player_name(name, alias_map) for name in table_players]
-        table_avg_r = sum(player_r_values[name] for name in normalized_table_players) / len(normalized_table_players) if normalized_table_players else 1500.0
+        filename = f"{month}.json"
+        with open(os.path.join(output_dir, filename), "w", encoding="utf-8") as f:
+            json.dump(games_data, f, ensure_ascii=False, separators=(',', ':'))
+        index['shards'].append({'month': month, 'file': filename, 'count': len(games)})
 
-        # 计算每个玩家的R值变化
-        players_detail = []
-        for player_stat in summary:
-            name = player_stat.get('name', '')
-            if not name:
-                continue
+    with open(os.path.join(output_dir, "rating.json"), "w", encoding="utf-8") as f:
+        json.dump(player_rating_history, f, ensure_ascii=False, separators=(',', ':'))
+    with open(os.path.join(output_dir, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
 
-            # 归一化玩家名用于R值追踪（别名合并统计）
-            normalized_name = normalize_player_name(name, alias_map)
+    # 清理已不存在的月份分片（连同预压缩副本）
+    keep = {shard['file'] for shard in index['shards']} | {"rating.json", "index.json"}
+    for filename in os.listdir(output_dir):
+        base = re.sub(r'\.(gz|br)$', '', filename)
+        if base.endswith(".json") and base not in keep:
+            os.remove(os.path.join(output_dir, filename))
 
-            rank = player_stat.get('rank', 4)
-            final_points = player_stat.get('final_points', 25000)
-            games_before = player_games[normalized_name]
-            r_before = player_r_values[normalized_name]
+    return index
 
-            # 使用平均uma（如果有的话），否则回退到按名次查表
-            avg_uma = player_stat.get('avg_uma')
-            if avg_uma is not None:
-                uma = avg_uma
-            else:
-                # 回退方案：按名次查表
-                uma = uma_config.get(rank, 0)
 
-            score_diff = final_points - origin_points
-            score_change = (uma + score_diff) / 1000.0
+def collect_generated_outputs(docs_dir="docs", sections=None, seasons=None):
+    """
+    列出本次构建生成的页面、静态资源和数据文件（docs/ 中手工维护的页面不在其中）
 
-            # 计算R值补正
-            r_correction = (table_avg_r - r_before) / 40.0
+    Args:
+        sections: 只列出这些页面分组的输出（默认全部）
+        seasons: 只列出这些 S-League 赛季的页面（S-League 主页总是包含在内）
 
-            # 计算试合数补正
-            if games_before < 400:
-                games_correction = 1 - games_before * 0.002
-            else:
-                games_correction = 0.2
-
-            # 计算R值变动（传入uma_config、origin_points和avg_uma）
-            r_change = calculate_tenhou_r_value(rank, games_before, r_before, table_avg_r, final_points, uma_config, origin_points, avg_uma=uma)
-            r_after = r_before + r_change
-
-            players_detail.append({
-                'name': name,
-                'rank': rank,
-                'final_points': final_points,
-                'r_before': round(r_before, 2),
-                'games_before': games_before,
-                'score_change': round(score_change, 1),
-                'r_correction': round(r_correction, 2),
-                'games_correction': round(games_correction, 3),
-                'r_change': round(r_change, 2),
-                'r_after': round(r_after, 2)
-            })
-
-            # 更新玩家R值和场数（使用归一化后的名字）
-            player_r_values[normalized_name] = r_after
-            player_games[normalized_name] += 1
-
-        # 按名次排序
-        players_detail.sort(key=lambda x: x['rank'])
-
-        # 调整时区：UTC+0 -> UTC+2
-        display_timestamp = timestamp + timedelta(hours=2)
-
-        all_game_details.append({
-            'date': display_timestamp.strftime("%Y年%m月%d日 %H:%M"),
-            'date_en': display_timestamp.strftime("%Y-%m-%d %H:%M"),
-            'players_detail': players_detail,
-            'table_avg_r': round(table_avg_r, 2)
-        })
-
-    # 返回最近的N场，反转顺序让最新的在前面
-    recent = all_game_details[-count:] if len(all_game_details) >= count else all_game_details
-    return list(reversed(recent))
+    返回:
+        list: 文件路径列表
+    """
+    def wanted(section):
+        return sections is None or section in sections
+
+    pages = [page for page, section in (("index", "index"), ("m-league", "m-league"),
+                                        ("ema", "ema"), ("sanma-honor", "sanma")) if wanted(section)]
+    outputs = []
+    for page in pages:
+        outputs.append(os.path.join(docs_dir, f"{page}.html"))
+        outputs.append(os.path.join(docs_dir, f"{page}-en.html"))
+    if wanted("s-league"):
+        for path in sorted(glob.glob(os.path.join(docs_dir, "s-league", "*.html"))):
+            page = os.path.basename(path)[:-len(".html")]
+            if page.endswith("-en"):
+                page = page[:-len("-en")]
+            if seasons is None or page == "index" or page in seasons:
+                outputs.append(path)
+    outputs.extend(sorted(glob.glob(os.path.join(docs_dir, "assets", "*.css"))))
+    outputs.extend(sorted(glob.glob(os.path.join(docs_dir, "assets", "*.js"))))
+    for league in ("m-league", "ema"):
+        if wanted(league):
+            outputs.extend(sorted(glob.glob(os.path.join(docs_dir, "games", league, "*.json"))))
+    return [p for p in outputs if os.path.exists(p)]
 
 
 def generate_index_html(lang='zh'):
@@ -316,7 +229,7 @@ def generate_stats_html(title, stats_data, league_name, latest_date=None, lang='
     # 最近牌谱部分 - 横向表格
     recent_section = ""
     if recent_games and len(recent_games) > 0:
-        table_rows = ""
+        table_rows = FragmentBuilder()
         for game_idx, game in enumerate(recent_games, 1):
             date_str = game['date'] if lang == 'zh' else game['date_en']
             table_avg_r = game.get('table_avg_r', 0)
@@ -325,10 +238,10 @@ def generate_stats_html(title, stats_data, league_name, latest_date=None, lang='
             players_data = game.get('players_detail', [])
 
             # 构建玩家数据单元格
-            player_cells = ""
+            player_cells = FragmentBuilder()
             for p in players_data:
                 rank_class = f"rank-{p['rank']}"
-                player_cells += f"""
+                player_cells.add(f"""
                     <td class="player-name {rank_class}">{p['name']}</td>
                     <td class="r-value">{p['r_before']}</td>
                     <td class="games-count">{p['games_before']}</td>
@@ -337,15 +250,15 @@ def generate_stats_html(title, stats_data, league_name, latest_date=None, lang='
                     <td class="games-coef">{p['games_correction']:.3f}</td>
                     <td class="r-change">{p['r_change']:+.2f}</td>
                     <td class="r-value">{p['r_after']}</td>
-                """
+                """)
 
-            table_rows += f"""
+            table_rows.add(f"""
                 <tr>
                     <td class="game-date">{date_str}</td>
                     <td class="table-avg-r">{table_avg_r:.2f}</td>
-                    {player_cells}
+                    {player_cells.build()}
                 </tr>
-            """
+            """)
 
         recent_section = f"""
         <div class="recent-games-section">
@@ -400,7 +313,7 @@ def generate_stats_html(title, stats_data, league_name, latest_date=None, lang='
                         </tr>
                     </thead>
                     <tbody>
-                        {table_rows}
+                        {table_rows.build()}
                     </tbody>
                 </table>
             </div>
@@ -410,7 +323,7 @@ def generate_stats_html(title, stats_data, league_name, latest_date=None, lang='
     # 荣誉牌谱部分
     honor_section = ""
     if honor_games and len(honor_games) > 0:
-        honor_cards = ""
+        honor_cards = FragmentBuilder()
         for game in honor_games:
             # 翻译役种
             yaku_list = game.get('yaku_list', [])
@@ -426,7 +339,7 @@ def generate_stats_html(title, stats_data, league_name, latest_date=None, lang='
             # HTML转义URL中的特殊字符
             escaped_url = html_module.escape(game['tenhou_url'], quote=True)
 
-            honor_cards += f"""
+            honor_cards.add(f"""
             <div class="honor-card {game_type_class}">
                 <div class="honor-type">{game_type_text}</div>
                 <div class="honor-info">
@@ -437,23 +350,23 @@ def generate_stats_html(title, stats_data, league_name, latest_date=None, lang='
                 </div>
                 <a href="{escaped_url}" target="_blank" class="honor-replay-btn">{t['view_replay']}</a>
             </div>
-            """
+            """)
 
         honor_section = f"""
         <div class="honor-games-section">
             <h2>{t['honor_games']}</h2>
             <div class="honor-games-grid">
-                {honor_cards}
+                {honor_cards.build()}
             </div>
         </div>
         """
 
     # 生成表格行
-    table_rows = ""
+    table_rows = FragmentBuilder()
     for name, data in sorted_players:
         # 使用锚点链接
         player_id = name.replace(" ", "_").replace("(", "").replace(")", "")
-        table_rows += f"""
+        table_rows.add(f"""
         <tr>
             <td class="player-name"><a href="#player-{player_id}" class="player-link">{name}</a></td>
             <td>{data['games']}</td>
@@ -467,10 +380,10 @@ def generate_stats_html(title, stats_data, league_name, latest_date=None, lang='
             <td>{data['riichi_rate']:.1f}%</td>
             <td>{data['furo_rate']:.1f}%</td>
         </tr>
-        """
+        """)
 
     # 生成详细统计卡片
-    detail_cards = ""
+    detail_cards = FragmentBuilder()
     for name, data in sorted_players:
         player_id = name.replace(" ", "_").replace("(", "").replace(")", "")
         riichi_win_hands = data['riichi_win_hands']
@@ -479,7 +392,7 @@ def generate_stats_html(title, stats_data, league_name, latest_date=None, lang='
         tsumo_only_win_hands = data.get('tsumo_only_win_hands', 0)
 
         # 手役统计（前10）
-        yaku_html = ""
+        yaku_html = FragmentBuilder()
         if data.get('yaku_count'):
             yaku_sorted = sorted(data['yaku_count'].items(), key=lambda x: -x[1])[:10]
             for yaku, count in yaku_sorted:
@@ -493,14 +406,14 @@ def generate_stats_html(title, stats_data, league_name, latest_date=None, lang='
                 rate = data['yaku_rate'].get(yaku, 0)
                 avg_rate = league_avg.get('yaku_rate', {}).get(yaku, 0) if league_avg else 0
                 avg_text = f' <span class="league-avg">({t["average"]}{avg_rate}%)</span>' if avg_rate > 0 else ''
-                yaku_html += f"<li>{yaku_name}: {count}{t['times']} ({rate}%){avg_text}</li>"
+                yaku_html.add(f"<li>{yaku_name}: {count}{t['times']} ({rate}%){avg_text}</li>")
 
         # 对战情况表格
-        vs_players_html = ""
+        vs_players_html = FragmentBuilder()
         if data.get('vs_players'):
             # 按对战场数排序
             vs_sorted = sorted(data['vs_players'].items(), key=lambda x: -x[1]['games'])
-            vs_players_html = f"""
+            vs_players_html = FragmentBuilder(f"""
             <table class="vs-table">
                 <thead>
                     <tr>
@@ -514,14 +427,14 @@ def generate_stats_html(title, stats_data, league_name, latest_date=None, lang='
                     </tr>
                 </thead>
                 <tbody>
-            """
+            """)
             for opponent, vs_data in vs_sorted:
                 net_points = vs_data['net_points']
                 net_class = 'positive' if net_points > 0 else 'negative' if net_points < 0 else 'neutral'
                 score_diff = vs_data['score_diff']
                 score_diff_class = 'positive' if score_diff > 0 else 'negative' if score_diff < 0 else 'neutral'
                 opponent_id = opponent.replace(" ", "_").replace("(", "").replace(")", "")
-                vs_players_html += f"""
+                vs_players_html.add(f"""
                     <tr>
                         <td class="opponent-name"><a href="#player-{opponent_id}" class="opponent-link">{opponent}</a></td>
                         <td>{vs_data['games']}</td>
@@ -531,13 +444,13 @@ def generate_stats_html(title, stats_data, league_name, latest_date=None, lang='
                         <td class="{net_class}">{net_points:+}</td>
                         <td class="{score_diff_class}">{score_diff:+}</td>
                     </tr>
-                """
-            vs_players_html += """
+                """)
+            vs_players_html.add("""
                 </tbody>
             </table>
-            """
+            """)
 
-        detail_cards += f"""
+        detail_cards.add(f"""
         <div class="player-card" id="player-{player_id}">
             <h3>{name}</h3>
             <div class="stats-grid">
@@ -693,13 +606,13 @@ def generate_stats_html(title, stats_data, league_name, latest_date=None, lang='
 
             {f'''<div class="section">
                 <h4>{t['vs_stats']}</h4>
-                {vs_players_html}
+                {vs_players_html.build()}
             </div>''' if vs_players_html else ''}
 
             {f'''<div class="section">
                 <h4>{t['yaku_stats']}</h4>
                 <ul class="yaku-list">
-                    {yaku_html}
+                    {yaku_html.build()}
                 </ul>
             </div>''' if yaku_html else ''}
 
@@ -708,7 +621,7 @@ def generate_stats_html(title, stats_data, league_name, latest_date=None, lang='
                 <p>{t['draw_count']}: {data['ryuukyoku_hands']} {t['times']}, {t['tenpai']} {data['ryuukyoku_tenpai']} {t['times']} ({data['tenpai_rate']:.1f}%) <span class="league-avg">({t['average']}{league_avg.get('tenpai_rate', 0):.1f}%)</span></p>
             </div>''' if data['ryuukyoku_hands'] > 0 else ''}
         </div>
-        """
+        """)
 
     html = f"""<!DOCTYPE html>
 <html lang="{lang_code}">
@@ -1454,13 +1367,13 @@ def generate_stats_html(title, stats_data, league_name, latest_date=None, lang='
                     </tr>
                 </thead>
                 <tbody>
-                    {table_rows}
+                    {table_rows.build()}
                 </tbody>
             </table>
         </div>
 
         <h2>{t['detailed_stats']}</h2>
-        {detail_cards}
+        {detail_cards.build()}
     </div>
 </body>
 </html>
@@ -1470,17 +1383,22 @@ def generate_stats_html(title, stats_data, league_name, latest_date=None, lang='
 
 
 
-def generate_league_tabs_page(stats_dict, league_avg, honor_games, recent_games, sorted_files, results, latest_date, lang='zh', league_name='m-league'):
+def generate_league_tabs_page(stats_dict, league_avg, honor_games, recent_games, sorted_files, results, latest_date, lang='zh', league_name='m-league', out=None,
+                              games_index=None, games_data_url=None):
     """
     生成联赛标签页页面（通用函数，支持M-League和EMA）
 
     参数:
     - league_name: 'm-league' 或 'ema'
+    - out: 输出文件对象（可选，指定后页面直接流式写入文件并返回None）
+    - games_index / games_data_url: 牌谱历史分片索引及其目录URL（见 write_recent_games_shards），
+      不指定时所有牌谱内嵌在页面中
     """
     t = TRANSLATIONS[lang]
 
     # 生成各个标签页的内容
-    recent_content = generate_recent_games_content_for_tabs(recent_games, stats_dict, t, lang)
+    recent_content = generate_recent_games_content_for_tabs(recent_games, stats_dict, t, lang,
+                                                            games_index=games_index, games_data_url=games_data_url)
     honor_content = generate_honor_games_content_for_tabs(honor_games, t, lang)
     ranking_content = generate_ranking_content(stats_dict, t, league_avg)
 
@@ -1497,9 +1415,9 @@ def generate_league_tabs_page(stats_dict, league_avg, honor_games, recent_games,
     sorted_players = sorted(stats_dict.items(), key=lambda x: (-x[1]["games"], x[0]))
 
     # 生成下拉选项
-    player_options = ""
+    player_options = FragmentBuilder()
     for name, data in sorted_players:
-        player_options += f'<option value="{name}">{name} ({data["games"]}局)</option>\n'
+        player_options.add(f'<option value="{name}">{name} ({data["games"]}局)</option>\n')
 
     # 生成每个玩家的详细HTML
     players_data = {}
@@ -1559,126 +1477,41 @@ def generate_league_tabs_page(stats_dict, league_avg, honor_games, recent_games,
         honor_content=honor_content,
         ranking_content=ranking_content,
         leaderboard_content=leaderboard_content,
-        player_options=player_options,
+        player_options=player_options.build(),
         players_data=players_data,
         select_player_label=t['select_player'],
         choose_player=t['choose_player'],
-        select_player_prompt=t['select_player_prompt']
+        select_player_prompt=t['select_player_prompt'],
+        out=out
     )
 
     return html_content
 
 
-def generate_m_league_tabs_page(stats_dict, league_avg, honor_games, recent_games, sorted_files, results, latest_date, lang='zh'):
+def generate_m_league_tabs_page(stats_dict, league_avg, honor_games, recent_games, sorted_files, results, latest_date, lang='zh', out=None,
+                                games_index=None, games_data_url=None):
     """生成M-League标签页页面（向后兼容的包装函数）"""
-    return generate_league_tabs_page(stats_dict, league_avg, honor_games, recent_games, sorted_files, results, latest_date, lang, league_name='m-league')
+    return generate_league_tabs_page(stats_dict, league_avg, honor_games, recent_games, sorted_files, results, latest_date, lang, league_name='m-league', out=out,
+                                     games_index=games_index, games_data_url=games_data_url)
 
 
 def extract_sanma_yakuman(sanma_folder):
-    """从三麻文件夹中提取所有役满"""
-    yakuman_games = []
-
+    """从三麻文件夹中提取所有役满（使用统一的荣誉牌谱检测阶段，结果按文件内容哈希缓存）"""
     files = scan_files(sanma_folder, "*.json", recursive=True)
     if not files:
-        return yakuman_games
+        return []
 
     sorted_files = sort_files_by_date(files)
 
+    honor_scanner = HonorScanner('sanma')
     for fp in sorted_files:
         try:
-            with open(fp, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            # 提取文件名中的日期信息
-            filename = os.path.basename(fp)
-            date_match = re.match(r'(\d+)_(\d+)_(\d+)_(.+)\.json', filename)
-            if date_match:
-                month, day, year, event_type = date_match.groups()
-                date_str_zh = f"{year}年{month}月{day}日"
-                date_str_en = f"{year}-{month}-{day}"
-            else:
-                date_str_zh = filename
-                date_str_en = filename
-
-            # 遍历所有局
-            for round_idx, round_data in enumerate(data.get("log", []), 1):
-                if len(round_data) < 10:
-                    continue
-
-                result = round_data[-1]
-                if not isinstance(result, list) or len(result) < 3:
-                    continue
-
-                # 检查是否是和了
-                if result[0] != "和了":
-                    continue
-
-                # 获取役种列表
-                yaku_info = result[2]
-                if len(yaku_info) < 5:
-                    continue
-
-                yaku_list = yaku_info[4:]  # 役种从第5个元素开始
-                fan_info = yaku_info[3] if len(yaku_info) > 3 else ""  # 先获取fan_info
-
-                # 检查是否包含役满 (检查yaku_list和fan_info)
-                has_yakuman = (any('役満' in str(yaku) or 'Yakuman' in str(yaku) for yaku in yaku_list) or
-                              '役満' in str(fan_info) or 'Yakuman' in str(fan_info))
-
-                if has_yakuman:
-                    winner_seat = yaku_info[0]
-
-                    # 获取玩家名字
-                    name_list = data.get("name", [])
-                    winner_name = name_list[winner_seat] if winner_seat < len(name_list) else f"玩家{winner_seat+1}"
-
-                    # 确定场风和局数
-                    round_info = round_data[0]
-                    if len(round_info) >= 3:
-                        wind = round_info[0]  # 0=东, 1=南
-                        dealer = round_info[1]  # 庄家位置
-                        honba = round_info[2]  # 本场数
-                        wind_str = "东" if wind == 0 else "南"
-                        round_str = f"{wind_str}{dealer+1}局{honba}本场"
-                    else:
-                        round_str = f"第{round_idx}局"
-
-                    # 构建嵌入式JSON天凤URL
-                    # 获取役种描述用于标题，翻译成中文
-                    yaku_names = []
-                    for y in yaku_list:
-                        yaku_name_en = str(y).split('(')[0]
-                        yaku_name_zh = YAKU_TRANSLATION.get(yaku_name_en, yaku_name_en)
-                        yaku_names.append(yaku_name_zh)
-                    yaku_desc = ', '.join(yaku_names)
-
-                    # 构建JSON数据
-                    json_data = {
-                        "title": ["Santi League -- Sanma", f"{winner_name}的{yaku_desc}"],
-                        "name": name_list,
-                        "rule": {"disp": "三人麻雀"},
-                        "log": [round_data]
-                    }
-
-                    # 转换为JSON字符串（不需要手动HTML转义，模板会自动处理）
-                    json_str = json.dumps(json_data, ensure_ascii=False, separators=(',', ':'))
-                    tenhou_url = f"https://tenhou.net/5/#json={json_str}"
-
-                    yakuman_games.append({
-                        'date': date_str_zh,
-                        'date_en': date_str_en,
-                        'round': round_str,
-                        'winner': winner_name,
-                        'yaku_list': yaku_list,
-                        'fan_info': fan_info,
-                        'tenhou_url': tenhou_url,
-                        'type': 'yakuman'
-                    })
-
+            data, digest = read_log(fp)
+            honor_scanner.scan(fp, data, digest)
         except Exception as ex:
             print(f"  处理三麻文件失败: {fp} - {ex}", file=sys.stderr)
 
-    return yakuman_games
+    return honor_scanner.games()
 
 
 def generate_sanma_honor_html(yakuman_games, lang='zh'):
@@ -1686,9 +1519,8 @@ def generate_sanma_honor_html(yakuman_games, lang='zh'):
     return generate_sanma_honor_page(yakuman_games, lang)
 
 
-def main():
-    print("开始生成静态网站...", file=sys.stderr)
-
+def generate_index_pages():
+    """生成首页（中英文）"""
     # 生成中文首页
     index_html_zh = generate_index_html(lang='zh')
     with open("docs/index.html", "w", encoding="utf-8") as f:
@@ -1701,27 +1533,9 @@ def main():
         f.write(index_html_en)
     print("✓ 已生成 docs/index-en.html (英文)", file=sys.stderr)
 
-    # 加载荣誉牌谱数据
-    honor_games = []
-    honor_games_path = "docs/honor_games.json"
-    if os.path.exists(honor_games_path):
-        try:
-            with open(honor_games_path, "r", encoding="utf-8") as f:
-                honor_data = json.load(f)
-                # 支持新旧两种数据格式
-                if 'yakuman_sanbaiman_games' in honor_data or 'rare_yaku_games' in honor_data:
-                    # 新格式：传递整个字典
-                    honor_games = honor_data
-                    total = honor_data.get('total', 0)
-                    print(f"✓ 已加载 {total} 个荣誉牌谱", file=sys.stderr)
-                else:
-                    # 旧格式：向后兼容
-                    honor_games = honor_data.get('games', [])
-                    print(f"✓ 已加载 {len(honor_games)} 个荣誉牌谱", file=sys.stderr)
-        except Exception as e:
-            print(f"⚠ 加载荣誉牌谱失败: {e}", file=sys.stderr)
 
-    # 生成 M-League 页面
+def generate_m_league_pages():
+    """生成 M-League 页面、荣誉牌谱数据和牌谱分片"""
     print("正在处理 M-League 数据...", file=sys.stderr)
     m_league_folder = "game-logs/m-league"
     files = scan_files(m_league_folder, "*.json", recursive=True)
@@ -1732,21 +1546,29 @@ def main():
 
         results = []
         round_counts = []
+        # 荣誉牌谱在同一次扫描中检测（按文件内容哈希缓存），不再单独扫描全部牌谱
+        honor_scanner = HonorScanner('m-league')
         for fp in sorted_files:
             try:
-                with open(fp, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                summary = summarize_log(data)
+                data, digest = read_log(fp)
+                summary = cached_summarize_log(data, digest)
                 results.append(summary)
                 round_counts.append(len(data.get("log", [])))
+                honor_scanner.scan(fp, data, digest)
             except Exception as ex:
                 print(f"  处理失败: {fp} - {ex}", file=sys.stderr)
 
+        honor_games = honor_games_document(honor_scanner.grouped())
+        with open("docs/honor_games.json", "w", encoding="utf-8") as f:
+            json.dump(honor_games, f, ensure_ascii=False, indent=2)
+        print(f"✓ 已生成 docs/honor_games.json ({honor_games['total']} 个荣誉牌谱)", file=sys.stderr)
+
         # 提取最新日期
         latest_date = extract_latest_date(files)
 
-        # 提取所有牌谱（使用按日期排序的文件）
+        # 提取所有牌谱（使用按日期排序的文件），按月份写成分片，页面只内嵌最新分片
         recent_games = extract_recent_games(sorted_files, results, count=len(sorted_files))
+        games_index = write_recent_games_shards(recent_games, "docs/games/m-league")
 
         stats = calculate_player_stats(results, round_counts)
         stats_dict = dict(stats)
@@ -1755,33 +1577,37 @@ def main():
         league_avg = stats_dict.pop("_league_average", {})
 
         # 生成中文版（使用新的标签页模板）
-        m_league_html_zh = generate_m_league_tabs_page(
-            stats_dict=stats_dict,
-            league_avg=league_avg,
-            honor_games=honor_games,
-            recent_games=recent_games,
-            sorted_files=sorted_files,
-            results=results,
-            latest_date=latest_date,
-            lang='zh'
-        )
         with open("docs/m-league.html", "w", encoding="utf-8") as f:
-            f.write(m_league_html_zh)
+            generate_m_league_tabs_page(
+                stats_dict=stats_dict,
+                league_avg=league_avg,
+                honor_games=honor_games,
+                recent_games=recent_games,
+                sorted_files=sorted_files,
+                results=results,
+                latest_date=latest_date,
+                lang='zh',
+                out=f,
+                games_index=games_index,
+                games_data_url="games/m-league/"
+            )
         print(f"✓ 已生成 docs/m-league.html (中文, 处理了 {len(results)} 个文件)", file=sys.stderr)
 
         # 生成英文版（使用新的标签页模板）
-        m_league_html_en = generate_m_league_tabs_page(
-            stats_dict=stats_dict,
-            league_avg=league_avg,
-            honor_games=honor_games,
-            recent_games=recent_games,
-            sorted_files=sorted_files,
-            results=results,
-            latest_date=latest_date,
-            lang='en'
-        )
         with open("docs/m-league-en.html", "w", encoding="utf-8") as f:
-            f.write(m_league_html_en)
+            generate_m_league_tabs_page(
+                stats_dict=stats_dict,
+                league_avg=league_avg,
+                honor_games=honor_games,
+                recent_games=recent_games,
+                sorted_files=sorted_files,
+                results=results,
+                latest_date=latest_date,
+                lang='en',
+                out=f,
+                games_index=games_index,
+                games_data_url="games/m-league/"
+            )
         print(f"✓ 已生成 docs/m-league-en.html (英文, 处理了 {len(results)} 个文件)", file=sys.stderr)
 
         if latest_date:
@@ -1789,7 +1615,9 @@ def main():
     else:
         print("⚠ 未找到 M-League 数据文件", file=sys.stderr)
 
-    # 生成 EMA 页面
+
+def generate_ema_pages():
+    """生成 EMA 页面（没有数据时生成占位页面）"""
     print("正在处理 EMA 数据...", file=sys.stderr)
     ema_folder = "game-logs/ema"
     ema_files = scan_files(ema_folder, "*.json", recursive=True)
@@ -1803,14 +1631,15 @@ def main():
 
         ema_results = []
         ema_round_counts = []
+        ema_honor_scanner = HonorScanner('ema')
         for fp in sorted_ema_files:
             try:
-                with open(fp, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                # 使用EMA的uma配置
-                summary = summarize_log(data, uma_config=ema_uma_config)
+                data, digest = read_log(fp)
+                # 使用EMA的uma配置（规则无关的总结与其他联赛共用缓存）
+                summary = cached_summarize_log(data, digest, uma_config=ema_uma_config)
                 ema_results.append(summary)
                 ema_round_counts.append(len(data.get("log", [])))
+                ema_honor_scanner.scan(fp, data, digest)
             except Exception as ex:
                 print(f"  处理失败: {fp} - {ex}", file=sys.stderr)
 
@@ -1819,6 +1648,7 @@ def main():
 
         # 提取所有牌谱（使用EMA的Uma配置和起始分数30000）
         ema_recent_games = extract_recent_games(sorted_ema_files, ema_results, count=len(sorted_ema_files), uma_config=ema_uma_config, origin_points=30000)
+        ema_games_index = write_recent_games_shards(ema_recent_games, "docs/games/ema")
 
         # 计算玩家统计数据（使用EMA的Uma配置和起始分数30000）
         ema_stats = calculate_player_stats(ema_results, ema_round_counts, uma_config=ema_uma_config, origin_points=30000)
@@ -1827,39 +1657,43 @@ def main():
         # 提取league_average
         ema_league_avg = ema_stats_dict.pop("_league_average", {})
 
-        # EMA暂时没有荣誉牌谱（可以后续添加）
-        ema_honor_games = []
+        ema_honor_games = honor_games_document(ema_honor_scanner.grouped())
+        print(f"✓ EMA 荣誉牌谱: {ema_honor_games['total']} 个", file=sys.stderr)
 
         # 生成中文版（使用通用的联赛标签页模板）
-        ema_html_zh = generate_league_tabs_page(
-            stats_dict=ema_stats_dict,
-            league_avg=ema_league_avg,
-            honor_games=ema_honor_games,
-            recent_games=ema_recent_games,
-            sorted_files=sorted_ema_files,
-            results=ema_results,
-            latest_date=ema_latest_date,
-            lang='zh',
-            league_name='ema'
-        )
         with open("docs/ema.html", "w", encoding="utf-8") as f:
-            f.write(ema_html_zh)
+            generate_league_tabs_page(
+                stats_dict=ema_stats_dict,
+                league_avg=ema_league_avg,
+                honor_games=ema_honor_games,
+                recent_games=ema_recent_games,
+                sorted_files=sorted_ema_files,
+                results=ema_results,
+                latest_date=ema_latest_date,
+                lang='zh',
+                league_name='ema',
+                out=f,
+                games_index=ema_games_index,
+                games_data_url="games/ema/"
+            )
         print(f"✓ 已生成 docs/ema.html (中文, 处理了 {len(ema_results)} 个文件)", file=sys.stderr)
 
         # 生成英文版（使用通用的联赛标签页模板）
-        ema_html_en = generate_league_tabs_page(
-            stats_dict=ema_stats_dict,
-            league_avg=ema_league_avg,
-            honor_games=ema_honor_games,
-            recent_games=ema_recent_games,
-            sorted_files=sorted_ema_files,
-            results=ema_results,
-            latest_date=ema_latest_date,
-            lang='en',
-            league_name='ema'
-        )
         with open("docs/ema-en.html", "w", encoding="utf-8") as f:
-            f.write(ema_html_en)
+            generate_league_tabs_page(
+                stats_dict=ema_stats_dict,
+                league_avg=ema_league_avg,
+                honor_games=ema_honor_games,
+                recent_games=ema_recent_games,
+                sorted_files=sorted_ema_files,
+                results=ema_results,
+                latest_date=ema_latest_date,
+                lang='en',
+                league_name='ema',
+                out=f,
+                games_index=ema_games_index,
+                games_data_url="games/ema/"
+            )
         print(f"✓ 已生成 docs/ema-en.html (英文, 处理了 {len(ema_results)} 个文件)", file=sys.stderr)
 
         if ema_latest_date:
@@ -1877,7 +1711,9 @@ def main():
             f.write(ema_html_en)
         print("✓ 已生成 docs/ema-en.html (英文)", file=sys.stderr)
 
-    # 生成三麻荣誉牌谱页面
+
+def generate_sanma_pages():
+    """生成三麻荣誉牌谱页面"""
     print("正在处理三麻数据...", file=sys.stderr)
     sanma_folder = "game-logs/sanma"
     if os.path.exists(sanma_folder):
@@ -1898,22 +1734,113 @@ def main():
     else:
         print("⚠ 未找到三麻数据文件夹", file=sys.stderr)
 
-    # 生成 S-League 页面
-    try:
-        from s_league.page_generator import generate_all_s_league_pages
-        generate_all_s_league_pages()
-    except ImportError:
-        print("⚠ S-League模块未安装", file=sys.stderr)
-    except Exception as e:
-        print(f"⚠ S-League生成失败: {e}", file=sys.stderr)
-        import traceback
-        traceback.print_exc()
+
+def generate_s_league_pages(seasons=None):
+    """
+    生成 S-League 页面（seasons 为 None 时生成全部启用的赛季）
+
+    Returns:
+        list: 生成失败的页面（'s-league/<赛季ID>'）；主页生成失败时直接抛出异常
+    """
+    from s_league.page_generator import generate_all_s_league_pages
+    return [f"s-league/{season_id}" for season_id in generate_all_s_league_pages(seasons)]
+
+
+def main(sections=None, seasons=None, force=False):
+    """
+    生成静态网站
+
+    默认只重新生成输入（牌谱、别名、荣誉牌谱判定、模板、翻译、生成代码）有变化的页面，
+    依赖关系和上次构建的指纹见 utils.build_graph
+
+    Args:
+        sections: 只重新生成这些页面分组（PAGE_SECTIONS 的子集），不检查输入是否变化
+        seasons: 重新生成 S-League 时只生成这些赛季（默认全部启用的赛季）
+        force: 重新生成全部页面
+    """
+    build_manifest = BuildManifest()
+    graph = build_manifest.graph
+    if sections is None and not force:
+        stale = build_manifest.stale_pages()
+        if not stale:
+            print("✓ 所有页面的输入都没有变化，不需要重新生成（--force 重新生成全部页面）", file=sys.stderr)
+            return
+        sections = {graph[page]['section'] for page in stale}
+        seasons = {graph[page]['season'] for page in stale} - {None}
+    else:
+        stale = {}
+        build_manifest.compute()
+
+    # 本次重新生成的页面（S-League 主页随任何一个赛季一起生成）
+    pages = [page for page, spec in graph.items()
+             if (sections is None or spec['section'] in sections)
+             and (spec['season'] is None or seasons is None or spec['season'] in seasons)]
+    full_build = len(pages) == len(graph)
+    if full_build:
+        sections = seasons = None
+        print("开始生成静态网站...", file=sys.stderr)
+    else:
+        print(f"开始重新生成: {', '.join(pages)}", file=sys.stderr)
+        for page in pages:
+            if page in stale:
+                print(f"  {page}: {stale[page]}", file=sys.stderr)
+
+    # 生成失败的页面不记入构建清单，下次构建时重新生成
+    failed = set()
+    for section in PAGE_SECTIONS:
+        if not full_build and section not in sections:
+            continue
+        try:
+            if section == 's-league':
+                failed.update(generate_s_league_pages(seasons))
+            else:
+                PAGE_GENERATORS[section]()
+        except Exception as e:
+            print(f"✗ {section} 页面生成失败: {e}", file=sys.stderr)
+            traceback.print_exc()
+            failed.update(page for page in pages if graph[page]['section'] == section)
+
+    if full_build:
+        # 荣誉牌谱检测缓存和对局总结缓存：只保留本次构建扫描到的文件
+        save_honor_cache(prune=True)
+        save_summary_cache(prune=True)
+    else:
+        # 只扫描了部分牌谱文件夹，保留其他文件夹的缓存条目
+        save_honor_cache()
+        save_summary_cache()
+
+    # 输出后处理：压缩HTML/CSS/JS，生成 .gz/.br 预压缩副本并报告页面体积
+    optimize_outputs(collect_generated_outputs(sections=sections, seasons=seasons), merge_report=not full_build)
+    build_manifest.record([page for page in pages if page not in failed], failed)
+
+    cache = yaku_cache_info()
+    print(f"役判定缓存: 命中 {cache['hits']} 次, 未命中 {cache['misses']} 次 (缓存 {cache['size']}/{cache['maxsize']})",
+          file=sys.stderr)
+
+    if failed:
+        # 常驻构建进程和监视模式据此把本次构建报告为失败
+        raise RuntimeError(f"以下页面生成失败，下次构建时重新生成: {', '.join(sorted(failed))}")
 
     print("\n网站生成完成！", file=sys.stderr)
     print("请将 docs 文件夹的内容推送到 GitHub Pages", file=sys.stderr)
 
 
+# 页面分组：每组页面只读取自己的牌谱文件夹，可以单独重新生成
+PAGE_GENERATORS = {
+    'index': generate_index_pages,
+    'm-league': generate_m_league_pages,
+    'ema': generate_ema_pages,
+    'sanma': generate_sanma_pages,
+    's-league': generate_s_league_pages,
+}
+PAGE_SECTIONS = tuple(PAGE_GENERATORS)
+
+
 if __name__ == "__main__":
     # 确保 docs 目录存在
     os.makedirs("docs", exist_ok=True)
-    main()
+    if "--watch" in sys.argv[1:]:
+        # 监视模式：game-logs/ 有变化时只整理新牌谱并重新生成受影响的页面
+        from watch_logs import main as watch_main
+        sys.exit(watch_main([arg for arg in sys.argv[1:] if arg != "--watch"]))
+    main(force="--force" in sys.argv[1:])
@@ -12,6 +12,8 @@ import html as html_module
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.translations import YAKU_TRANSLATION, YAKU_TRANSLATION_EN
+from utils.fragment_builder import FragmentBuilder
+from utils.log_cache import load_log
 
 # 导入别名处理函数
 try:
@@ -53,7 +55,7 @@ def generate_ranking_content(stats_data, t, league_avg):
     unqualified_players.sort(key=lambda x: -x[1]['games'])  # 半庄数降序
 
     # 生成HTML
-    html = f"""
+    html = FragmentBuilder(f"""
     <div style="margin-bottom: 40px;">
         <h2 style="color: #667eea; margin-bottom: 20px;">{t.get('qualified_players', '正式排名')} (≥10{t.get('games', '半庄')})</h2>
         <div style="overflow-x: auto;">
@@ -71,14 +73,14 @@ def generate_ranking_content(stats_data, t, league_avg):
                     </tr>
                 </thead>
                 <tbody>
-    """
+    """)
 
     rank_emojis = ['🥇', '🥈', '🥉']
     for idx, (player_name, data) in enumerate(qualified_players, 1):
         rank_emoji = rank_emojis[idx - 1] if idx <= 3 else ''
         row_bg = '#f8f9fa' if idx % 2 == 0 else 'white'
 
-        html += f"""
+        html.add(f"""
                     <tr style="background: {row_bg};">
                         <td style="padding: 12px; text-align: center; font-weight: bold; font-size: 18px;">{rank_emoji} {idx}</td>
                         <td style="padding: 12px; font-weight: 600;">{player_name}</td>
@@ -89,18 +91,18 @@ def generate_ranking_content(stats_data, t, league_avg):
                         <td style="padding: 12px; text-align: center;">{data['rank_1_rate']:.1f}%</td>
                         <td style="padding: 12px; text-align: center;">{data['win_rate']:.1f}%</td>
                     </tr>
-        """
+        """)
 
-    html += """
+    html.add("""
                 </tbody>
             </table>
         </div>
     </div>
-    """
+    """)
 
     # 未达标玩家
     if unqualified_players:
-        html += f"""
+        html.add(f"""
         <div>
             <h2 style="color: #999; margin-bottom: 20px;">{t.get('unqualified_players', '新人榜')} (<10{t.get('games', '半庄')})</h2>
             <div style="overflow-x: auto;">
@@ -115,10 +117,10 @@ def generate_ranking_content(stats_data, t, league_avg):
                         </tr>
                     </thead>
                     <tbody>
-        """
+        """)
 
         for player_name, data in unqualified_players:
-            html += f"""
+            html.add(f"""
                         <tr style="background: #f8f9fa;">
                             <td style="padding: 12px; font-weight: 600;">{player_name}</td>
                             <td style="padding: 12px; text-align: center; font-weight: bold;">{data['games']}</td>
@@ -126,66 +128,51 @@ def generate_ranking_content(stats_data, t, league_avg):
                             <td style="padding: 12px; text-align: center;">{data['tenhou_r']:.2f}</td>
                             <td style="padding: 12px; text-align: center;">{data['avg_rank']:.2f}</td>
                         </tr>
-            """
+            """)
 
-        html += """
+        html.add("""
                     </tbody>
                 </table>
             </div>
         </div>
-        """
+        """)
 
-    return html
+    return html.build()
 
 
 # ============================================================================
 # 最近牌谱内容生成
 # ============================================================================
 
-def generate_recent_games_content_for_tabs(recent_games, stats_data, t, lang='zh', alias_map=None):
-    """生成最近牌谱内容 - 带玩家筛选和Rating曲线图"""
-    if not recent_games or len(recent_games) == 0:
-        return f"<p style='text-align: center; color: #999; padding: 40px;'>{t.get('no_recent_games', '暂无最近牌谱')}</p>"
+def recent_games_shard_key(game):
+    """牌谱所属的分片（按月份，格式 YYYY-MM）"""
+    return game['date_en'][:7]
 
-    # 加载别名映射（如果没有传入）
-    if alias_map is None:
-        alias_map = load_player_aliases()
 
-    # 收集所有玩家信息并按半庄数排序
-    player_list = []
-    for player_name, data in stats_data.items():
-        if player_name == "_league_average":
-            continue
-        # 从stats_data中提取main_id（如果有的话）
-        main_id = data.get('main_id', player_name)
-        player_list.append({
-            'name': player_name,  # 显示名称（带别名）
-            'main_id': main_id,   # 主ID（用于数据筛选）
-            'games': data['games']
-        })
-    player_list.sort(key=lambda x: -x['games'])
+def build_recent_games_records(recent_games, alias_map=None):
+    """
+    把 extract_recent_games 的结果转换为页面脚本使用的数据
 
-    # 构建玩家选项卡
-    player_tabs = ""
-    all_text = t.get('all_players', '所有玩家')
-    player_tabs += f'<button class="player-filter-btn active" data-player="all">{all_text}</button>\n'
-    for player in player_list:
-        games_text = t.get('games', '局')
-        # 使用main_id作为data-player属性，显示名称作为按钮文本
-        player_tabs += f'<button class="player-filter-btn" data-player="{player["main_id"]}">{player["name"]} ({player["games"]}{games_text})</button>\n'
+    记录中同时保留中英文日期，同一份数据可供中英文页面共用
+
+    返回:
+        (games_data, player_rating_history)
+        - games_data: 每局牌谱的记录列表（顺序与 recent_games 相同）
+        - player_rating_history: {主ID: [{'date', 'date_en', 'games', 'r_value'}, ...]}
+    """
+    if alias_map is None:
+        alias_map = load_player_aliases()
 
-    # 构建游戏数据（JSON格式，供JavaScript使用）
     games_data = []
     player_rating_history = {}  # 每个玩家的rating历史（按主ID存储）
 
     for game in recent_games:
-        date_str = game['date'] if lang == 'zh' else game['date_en']
-        table_avg_r = game.get('table_avg_r', 0)
         players_data = game.get('players_detail', [])
 
         game_data = {
-            'date': date_str,
-            'table_avg_r': table_avg_r,
+            'date': game['date'],
+            'date_en': game['date_en'],
+            'table_avg_r': game.get('table_avg_r', 0),
             'players': []
         }
 
@@ -213,21 +200,80 @@ def generate_recent_games_content_for_tabs(recent_games, stats_data, t, lang='zh
             if main_id not in player_rating_history:
                 player_rating_history[main_id] = []
             player_rating_history[main_id].append({
-                'date': date_str,
+                'date': game['date'],
+                'date_en': game['date_en'],
                 'games': p['games_before'],
                 'r_value': p['r_after']
             })
 
         games_data.append(game_data)
 
+    return games_data, player_rating_history
+
+
+def generate_recent_games_content_for_tabs(recent_games, stats_data, t, lang='zh', alias_map=None,
+                                           games_index=None, games_data_url=None):
+    """
+    生成最近牌谱内容 - 带玩家筛选和Rating曲线图
+
+    参数:
+    - games_index: write_recent_games_shards 返回的分片索引（可选）。
+      指定后页面只内嵌最新分片，滚动到表格底部时再从 games_data_url 加载更早的分片
+    - games_data_url: 分片文件所在目录的URL（相对页面）
+    """
+    if not recent_games or len(recent_games) == 0:
+        return f"<p style='text-align: center; color: #999; padding: 40px;'>{t.get('no_recent_games', '暂无最近牌谱')}</p>"
+
+    # 加载别名映射（如果没有传入）
+    if alias_map is None:
+        alias_map = load_player_aliases()
+
+    # 收集所有玩家信息并按半庄数排序
+    player_list = []
+    for player_name, data in stats_data.items():
+        if player_name == "_league_average":
+            continue
+        # 从stats_data中提取main_id（如果有的话）
+        main_id = data.get('main_id', player_name)
+        player_list.append({
+            'name': player_name,  # 显示名称（带别名）
+            'main_id': main_id,   # 主ID（用于数据筛选）
+            'games': data['games']
+        })
+    player_list.sort(key=lambda x: -x['games'])
+
+    # 构建玩家选项卡
+    player_tabs = FragmentBuilder()
+    all_text = t.get('all_players', '所有玩家')
+    player_tabs.add(f'<button class="player-filter-btn active" data-player="all">{all_text}</button>\n')
+    for player in player_list:
+        games_text = t.get('games', '局')
+        # 使用main_id作为data-player属性，显示名称作为按钮文本
+        player_tabs.add(f'<button class="player-filter-btn" data-player="{player["main_id"]}">{player["name"]} ({player["games"]}{games_text})</button>\n')
+
+    # 构建游戏数据（JSON格式，供JavaScript使用）
+    # 指定了分片索引时只内嵌最新一个分片，更早的分片和Rating历史由页面按需加载
+    if games_index:
+        newest_month = games_index['shards'][0]['month']
+        embedded_games = [g for g in recent_games if recent_games_shard_key(g) == newest_month]
+        pending_shards = [shard['file'] for shard in games_index['shards'][1:]]
+        games_data, _ = build_recent_games_records(embedded_games, alias_map)
+        rating_history_json = 'null'
+    else:
+        pending_shards = []
+        games_data, player_rating_history = build_recent_games_records(recent_games, alias_map)
+        rating_history_json = json.dumps(player_rating_history, ensure_ascii=False)
+
     # 将数据转换为JSON
     games_json = json.dumps(games_data, ensure_ascii=False)
-    rating_history_json = json.dumps(player_rating_history, ensure_ascii=False)
+    pending_shards_json = json.dumps(pending_shards)
+    data_url_json = json.dumps(games_data_url or '')
+    date_field = 'date' if lang == 'zh' else 'date_en'
 
     html_content = f"""
     <!-- 玩家筛选选项卡 -->
     <div class="player-filter-tabs" style="margin-bottom: 20px; display: flex; flex-wrap: wrap; gap: 8px;">
-        {player_tabs}
+        {player_tabs.build()}
     </div>
 
     <!-- Rating曲线图容器 -->
@@ -392,13 +438,86 @@ def generate_recent_games_content_for_tabs(recent_games, stats_data, t, lang='zh
             </tbody>
         </table>
     </div>
+    <div id="gamesLoadMore" style="display: none; text-align: center; color: #999; padding: 16px;">{t.get('loading_more_games', '正在加载更早的牌谱…')}</div>
 
     <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
     <script>
-        // 游戏数据
+        // 游戏数据（最新分片内嵌在页面中，更早的分片按需加载）
         const gamesData = {games_json};
-        const ratingHistory = {rating_history_json};
+        const pendingShards = {pending_shards_json};
+        const GAMES_DATA_URL = {data_url_json};
+        const DATE_FIELD = '{date_field}';
+        let ratingHistory = {rating_history_json};
         let currentChart = null;
+        let currentFilter = 'all';
+        let shardLoading = null;
+        let ratingLoading = null;
+
+        // 加载下一个（更早的）分片，返回是否加载到了新数据
+        function loadNextShard() {{
+            if (shardLoading) return shardLoading;
+            if (pendingShards.length === 0) return Promise.resolve(false);
+
+            // 加载成功后才移出队列，网络错误时下次滚动到底部会重试同一分片
+            const file = pendingShards[0];
+            shardLoading = fetch(GAMES_DATA_URL + file)
+                .then(resp => {{
+                    if (!resp.ok) throw new Error(resp.status);
+                    return resp.json();
+                }})
+                .then(games => {{
+                    pendingShards.shift();
+                    gamesData.push(...games);
+                    appendGameRows(games, currentFilter);
+                    return true;
+                }})
+                .catch(err => {{
+                    console.error('加载牌谱分片失败:', file, err);
+                    return false;
+                }})
+                .finally(() => {{
+                    shardLoading = null;
+                    updateLoadMore();
+                }});
+            return shardLoading;
+        }}
+
+        // 按需加载所有玩家的Rating历史
+        function loadRatingHistory() {{
+            if (ratingHistory) return Promise.resolve(ratingHistory);
+            if (!ratingLoading) {{
+                ratingLoading = fetch(GAMES_DATA_URL + 'rating.json')
+                    .then(resp => resp.json())
+                    .then(data => {{
+                        ratingHistory = data;
+                        return data;
+                    }})
+                    .catch(err => {{
+                        console.error('加载Rating历史失败:', err);
+                        ratingLoading = null;
+                        return {{}};
+                    }});
+            }}
+            return ratingLoading;
+        }}
+
+        function updateLoadMore() {{
+            document.getElementById('gamesLoadMore').style.display = pendingShards.length > 0 ? 'block' : 'none';
+        }}
+
+        // 表格底部可见时继续加载，直到填满可视区域或没有更多分片
+        function isLoadMoreVisible() {{
+            const el = document.getElementById('gamesLoadMore');
+            if (el.offsetParent === null) return false;
+            return el.getBoundingClientRect().top < window.innerHeight + 200;
+        }}
+
+        function loadWhileVisible() {{
+            if (!isLoadMoreVisible()) return;
+            loadNextShard().then(loaded => {{
+                if (loaded) loadWhileVisible();
+            }});
+        }}
 
         // 切换公式显示/隐藏
         function toggleFormula() {{
@@ -416,19 +535,24 @@ def generate_recent_games_content_for_tabs(recent_games, stats_data, t, lang='zh
 
         // 渲染表格
         function renderGamesTable(filterPlayer = 'all') {{
+            document.getElementById('gamesTableBody').innerHTML = '';
+            appendGameRows(gamesData, filterPlayer);
+        }}
+
+        // 把牌谱追加到表格末尾
+        function appendGameRows(games, filterPlayer) {{
             const tbody = document.getElementById('gamesTableBody');
-            tbody.innerHTML = '';
 
             const filteredGames = filterPlayer === 'all'
-                ? gamesData
-                : gamesData.filter(game => game.players.some(p => p.name === filterPlayer));
+                ? games
+                : games.filter(game => game.players.some(p => p.name === filterPlayer));
 
             filteredGames.forEach(game => {{
                 const tr = document.createElement('tr');
 
                 // 添加日期和桌平均R
                 tr.innerHTML = `
-                    <td class="game-date">${{game.date}}</td>
+                    <td class="game-date">${{game[DATE_FIELD]}}</td>
                     <td class="table-avg-r">${{game.table_avg_r.toFixed(2)}}</td>
                 `;
 
@@ -461,7 +585,7 @@ def generate_recent_games_content_for_tabs(recent_games, stats_data, t, lang='zh
             const chartTitle = document.getElementById('chartPlayerName');
             const ctx = document.getElementById('ratingChart').getContext('2d');
 
-            if (!ratingHistory[playerName]) {{
+            if (!ratingHistory || !ratingHistory[playerName]) {{
                 container.style.display = 'none';
                 return;
             }}
@@ -473,7 +597,7 @@ def generate_recent_games_content_for_tabs(recent_games, stats_data, t, lang='zh
             const data = [...ratingHistory[playerName]].reverse();
 
             // 准备图表数据
-            const labels = data.map((d, idx) => `${{d.date}}\\n(${{d.games}}{t.get('games', '局')})`);
+            const labels = data.map((d, idx) => `${{d[DATE_FIELD]}}\\n(${{d.games}}{t.get('games', '局')})`);
             const rValues = data.map(d => d.r_value);
 
             // 销毁旧图表
@@ -509,7 +633,7 @@ def generate_recent_games_content_for_tabs(recent_games, stats_data, t, lang='zh
                             callbacks: {{
                                 title: function(context) {{
                                     const idx = context[0].dataIndex;
-                                    return `${{data[idx].date}} (${{data[idx].games}}{t.get('games', '局')})`;
+                                    return `${{data[idx][DATE_FIELD]}} (${{data[idx].games}}{t.get('games', '局')})`;
                                 }},
                                 label: function(context) {{
                                     return `Rating: ${{context.parsed.y.toFixed(2)}}`;
@@ -582,9 +706,11 @@ def generate_recent_games_content_for_tabs(recent_games, stats_data, t, lang='zh
                 this.classList.add('active');
 
                 const playerName = this.getAttribute('data-player');
+                currentFilter = playerName;
 
                 // 渲染表格
                 renderGamesTable(playerName);
+                loadWhileVisible();
 
                 // 绘制或隐藏图表
                 if (playerName === 'all') {{
@@ -594,13 +720,27 @@ def generate_recent_games_content_for_tabs(recent_games, stats_data, t, lang='zh
                         currentChart = null;
                     }}
                 }} else {{
-                    drawRatingChart(playerName);
+                    loadRatingHistory().then(() => {{
+                        if (currentFilter === playerName) drawRatingChart(playerName);
+                    }});
                 }}
             }});
         }});
 
         // 初始化显示所有牌谱
         renderGamesTable('all');
+        updateLoadMore();
+
+        // 滚动到表格底部时加载更早的分片
+        if (pendingShards.length > 0) {{
+            if ('IntersectionObserver' in window) {{
+                new IntersectionObserver(entries => {{
+                    if (entries.some(e => e.isIntersecting)) loadWhileVisible();
+                }}, {{ rootMargin: '200px' }}).observe(document.getElementById('gamesLoadMore'));
+            }} else {{
+                window.addEventListener('scroll', loadWhileVisible, {{ passive: true }});
+            }}
+        }}
     </script>
 
     <style>
@@ -802,7 +942,7 @@ def generate_player_details_html_for_tabs(name, data, t, lang='zh', league_avg=N
     dama_win_hands = data.get('dama_win_hands', 0)
     tsumo_only_win_hands = data.get('tsumo_only_win_hands', 0)
 
-    yaku_html = ""
+    yaku_html = FragmentBuilder()
     if data.get('yaku_count'):
         yaku_sorted = sorted(data['yaku_count'].items(), key=lambda x: -x[1])[:10]
         for yaku, count in yaku_sorted:
@@ -813,12 +953,12 @@ def generate_player_details_html_for_tabs(name, data, t, lang='zh', league_avg=N
             rate = data['yaku_rate'].get(yaku, 0)
             avg_rate = league_avg.get('yaku_rate', {}).get(yaku, 0) if league_avg else 0
             avg_text = f' <span class="league-avg">({t["average"]}{avg_rate}%)</span>' if avg_rate > 0 else ''
-            yaku_html += f"<li>{yaku_name}: {count}{t['times']} ({rate}%){avg_text}</li>"
+            yaku_html.add(f"<li>{yaku_name}: {count}{t['times']} ({rate}%){avg_text}</li>")
 
-    vs_players_html = ""
+    vs_players_html = FragmentBuilder()
     if data.get('vs_players'):
         vs_sorted = sorted(data['vs_players'].items(), key=lambda x: -x[1]['games'])
-        vs_players_html = f"""
+        vs_players_html = FragmentBuilder(f"""
         <table class="vs-table">
             <thead>
                 <tr>
@@ -832,7 +972,7 @@ def generate_player_details_html_for_tabs(name, data, t, lang='zh', league_avg=N
                 </tr>
             </thead>
             <tbody>
-        """
+        """)
 
         for vs_player, vs_data in vs_sorted:
             vs_win_rate = vs_data['win_rate']
@@ -842,7 +982,7 @@ def generate_player_details_html_for_tabs(name, data, t, lang='zh', league_avg=N
             score_diff = vs_data['score_diff']
             score_diff_class = 'positive' if score_diff > 0 else 'negative' if score_diff < 0 else ''
 
-            vs_players_html += f"""
+            vs_players_html.add(f"""
                 <tr>
                     <td>{vs_player}</td>
                     <td>{vs_data['games']}</td>
@@ -852,8 +992,8 @@ def generate_player_details_html_for_tabs(name, data, t, lang='zh', league_avg=N
                     <td class="{net_class}">{net_points:+}</td>
                     <td class="{score_diff_class}">{score_diff:+}</td>
                 </tr>
-            """
-        vs_players_html += "</tbody></table>"
+            """)
+        vs_players_html.add("</tbody></table>")
 
     html = f"""
     <div class="player-card" id="player-{player_id}">
@@ -1011,13 +1151,13 @@ def generate_player_details_html_for_tabs(name, data, t, lang='zh', league_avg=N
 
         {f'''<div class="section">
             <h4>{t['vs_stats']}</h4>
-            {vs_players_html}
+            {vs_players_html.build()}
         </div>''' if vs_players_html else ''}
 
         {f'''<div class="section">
             <h4>{t['yaku_stats']}</h4>
             <ul class="yaku-list">
-                {yaku_html}
+                {yaku_html.build()}
             </ul>
         </div>''' if yaku_html else ''}
 
@@ -1046,8 +1186,7 @@ def generate_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
     # 遍历所有牌谱文件统计1番手牌和小局数
     for filepath in sorted_files:
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = load_log(filepath)
 
             # 获取玩家列表并归一化为主ID
             raw_names = data.get('name', [])
@@ -1128,7 +1267,7 @@ def generate_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
         header_total = 'Total Rounds Played'
         header_rate = 'Rate'
 
-    html = f'''
+    html = FragmentBuilder(f'''
     <div class="leaderboard-section">
         <h2>1番手牌频率</h2>
         <div class="table-scroll">
@@ -1143,10 +1282,10 @@ def generate_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
                     </tr>
                 </thead>
                 <tbody>
-    '''
+    ''')
 
     for rank, data in enumerate(leaderboard_data, 1):
-        html += f'''
+        html.add(f'''
                     <tr>
                         <td>{rank}</td>
                         <td><strong>{data['name']}</strong></td>
@@ -1154,16 +1293,16 @@ def generate_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
                         <td>{data['total_rounds']}</td>
                         <td>{data['one_han_rate']:.2f}%</td>
                     </tr>
-        '''
+        ''')
 
-    html += '''
+    html.add('''
                 </tbody>
             </table>
         </div>
     </div>
-    '''
+    ''')
 
-    return html
+    return html.build()
 
 
 def generate_two_han_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
@@ -1178,8 +1317,7 @@ def generate_two_han_leaderboard_content(stats_dict, sorted_files, t, lang='zh')
     # 遍历所有牌谱文件统计2番手牌和小局数
     for filepath in sorted_files:
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = load_log(filepath)
 
             # 获取玩家列表并归一化为主ID
             raw_names = data.get('name', [])
@@ -1262,7 +1400,7 @@ def generate_two_han_leaderboard_content(stats_dict, sorted_files, t, lang='zh')
         header_rate = 'Rate'
         title = '2-Han Win Rate'
 
-    html = f'''
+    html = FragmentBuilder(f'''
     <div class="leaderboard-section">
         <h2>{title}</h2>
         <div class="table-scroll">
@@ -1277,10 +1415,10 @@ def generate_two_han_leaderboard_content(stats_dict, sorted_files, t, lang='zh')
                     </tr>
                 </thead>
                 <tbody>
-    '''
+    ''')
 
     for rank, data in enumerate(leaderboard_data, 1):
-        html += f'''
+        html.add(f'''
                     <tr>
                         <td>{rank}</td>
                         <td><strong>{data['name']}</strong></td>
@@ -1288,16 +1426,16 @@ def generate_two_han_leaderboard_content(stats_dict, sorted_files, t, lang='zh')
                         <td>{data['total_rounds']}</td>
                         <td>{data['two_han_rate']:.2f}%</td>
                     </tr>
-        '''
+        ''')
 
-    html += '''
+    html.add('''
                 </tbody>
             </table>
         </div>
     </div>
-    '''
+    ''')
 
-    return html
+    return html.build()
 
 
 def generate_three_han_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
@@ -1312,8 +1450,7 @@ def generate_three_han_leaderboard_content(stats_dict, sorted_files, t, lang='zh
     # 遍历所有牌谱文件统计手牌和小局数
     for filepath in sorted_files:
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = load_log(filepath)
 
             # 获取玩家列表并归一化为主ID
             raw_names = data.get('name', [])
@@ -1399,7 +1536,7 @@ def generate_three_han_leaderboard_content(stats_dict, sorted_files, t, lang='zh
         header_rate = 'Rate'
         title = '3+ Han (Below Mangan) Win Rate'
 
-    html = f'''
+    html = FragmentBuilder(f'''
     <div class="leaderboard-section">
         <h2>{title}</h2>
         <div class="table-scroll">
@@ -1414,10 +1551,10 @@ def generate_three_han_leaderboard_content(stats_dict, sorted_files, t, lang='zh
                     </tr>
                 </thead>
                 <tbody>
-    '''
+    ''')
 
     for rank, data in enumerate(leaderboard_data, 1):
-        html += f'''
+        html.add(f'''
                     <tr>
                         <td>{rank}</td>
                         <td><strong>{data['name']}</strong></td>
@@ -1425,16 +1562,16 @@ def generate_three_han_leaderboard_content(stats_dict, sorted_files, t, lang='zh
                         <td>{data['total_rounds']}</td>
                         <td>{data['three_han_rate']:.2f}%</td>
                     </tr>
-        '''
+        ''')
 
-    html += '''
+    html.add('''
                 </tbody>
             </table>
         </div>
     </div>
-    '''
+    ''')
 
-    return html
+    return html.build()
 
 
 def generate_mangan_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
@@ -1449,8 +1586,7 @@ def generate_mangan_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
     # 遍历所有牌谱文件统计满贯以上手牌和小局数
     for filepath in sorted_files:
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = load_log(filepath)
 
             # 获取玩家列表并归一化为主ID
             raw_names = data.get('name', [])
@@ -1560,7 +1696,7 @@ def generate_mangan_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
         header_rate = 'Rate'
         title = 'Mangan+ Hand Rate'
 
-    html = f'''
+    html = FragmentBuilder(f'''
     <div class="leaderboard-section">
         <h2>{title}</h2>
         <div class="table-scroll">
@@ -1575,10 +1711,10 @@ def generate_mangan_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
                     </tr>
                 </thead>
                 <tbody>
-    '''
+    ''')
 
     for rank, data in enumerate(leaderboard_data, 1):
-        html += f'''
+        html.add(f'''
                     <tr>
                         <td>{rank}</td>
                         <td><strong>{data['name']}</strong></td>
@@ -1586,16 +1722,16 @@ def generate_mangan_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
                         <td>{data['total_rounds']}</td>
                         <td>{data['mangan_rate']:.2f}%</td>
                     </tr>
-        '''
+        ''')
 
-    html += '''
+    html.add('''
                 </tbody>
             </table>
         </div>
     </div>
-    '''
+    ''')
 
-    return html
+    return html.build()
 
 
 def generate_haneman_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
@@ -1610,8 +1746,7 @@ def generate_haneman_leaderboard_content(stats_dict, sorted_files, t, lang='zh')
     # 遍历所有牌谱文件统计跳满以上手牌和小局数
     for filepath in sorted_files:
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = load_log(filepath)
 
             # 获取玩家列表并归一化为主ID
             raw_names = data.get('name', [])
@@ -1688,7 +1823,7 @@ def generate_haneman_leaderboard_content(stats_dict, sorted_files, t, lang='zh')
         title = 'Haneman+ Hand Rate'
         header_count = 'Haneman+ Wins'
 
-    html = f'''
+    html = FragmentBuilder(f'''
     <div class="leaderboard-section">
         <h2>{title}</h2>
         <div class="table-scroll">
@@ -1703,10 +1838,10 @@ def generate_haneman_leaderboard_content(stats_dict, sorted_files, t, lang='zh')
                     </tr>
                 </thead>
                 <tbody>
-    '''
+    ''')
 
     for rank, data in enumerate(leaderboard_data, 1):
-        html += f'''
+        html.add(f'''
                     <tr>
                         <td>{rank}</td>
                         <td><strong>{data['name']}</strong></td>
@@ -1714,16 +1849,16 @@ def generate_haneman_leaderboard_content(stats_dict, sorted_files, t, lang='zh')
                         <td>{data['total_rounds']}</td>
                         <td>{data['haneman_rate']:.2f}%</td>
                     </tr>
-        '''
+        ''')
 
-    html += '''
+    html.add('''
                 </tbody>
             </table>
         </div>
     </div>
-    '''
+    ''')
 
-    return html
+    return html.build()
 
 
 def generate_baiman_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
@@ -1738,8 +1873,7 @@ def generate_baiman_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
     # 遍历所有牌谱文件统计倍满以上手牌和小局数
     for filepath in sorted_files:
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = load_log(filepath)
 
             # 获取玩家列表并归一化为主ID
             raw_names = data.get('name', [])
@@ -1817,7 +1951,7 @@ def generate_baiman_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
         title = 'Baiman+ Hand Rate'
         header_count = 'Baiman+ Wins'
 
-    html = f'''
+    html = FragmentBuilder(f'''
     <div class="leaderboard-section">
         <h2>{title}</h2>
         <div class="table-scroll">
@@ -1832,10 +1966,10 @@ def generate_baiman_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
                     </tr>
                 </thead>
                 <tbody>
-    '''
+    ''')
 
     for rank, data in enumerate(leaderboard_data, 1):
-        html += f'''
+        html.add(f'''
                     <tr>
                         <td>{rank}</td>
                         <td><strong>{data['name']}</strong></td>
@@ -1843,16 +1977,16 @@ def generate_baiman_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
                         <td>{data['total_rounds']}</td>
                         <td>{data['baiman_rate']:.2f}%</td>
                     </tr>
-        '''
+        ''')
 
-    html += '''
+    html.add('''
                 </tbody>
             </table>
         </div>
     </div>
-    '''
+    ''')
 
-    return html
+    return html.build()
 
 
 def generate_flush_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
@@ -1864,8 +1998,7 @@ def generate_flush_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
     # 遍历所有牌谱文件统计混一色/清一色和小局数
     for filepath in sorted_files:
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = load_log(filepath)
 
             names = data.get('name', [])
             for name in names:
@@ -1937,7 +2070,7 @@ def generate_flush_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
         title = 'Half/Full Flush Rate Leaderboard'
         header_count = 'Flush Wins'
 
-    html = f'''
+    html = FragmentBuilder(f'''
     <div class="leaderboard-section">
         <h2>{title}</h2>
         <div class="table-scroll">
@@ -1952,10 +2085,10 @@ def generate_flush_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
                     </tr>
                 </thead>
                 <tbody>
-    '''
+    ''')
 
     for rank, data in enumerate(leaderboard_data, 1):
-        html += f'''
+        html.add(f'''
                     <tr>
                         <td>{rank}</td>
                         <td><strong>{data['name']}</strong></td>
@@ -1963,15 +2096,15 @@ def generate_flush_leaderboard_content(stats_dict, sorted_files, t, lang='zh'):
                         <td>{data['total_rounds']}</td>
                         <td>{data['flush_rate']:.2f}%</td>
                     </tr>
-        '''
+        ''')
 
-    html += '''
+    html.add('''
                 </tbody>
             </table>
         </div>
     </div>
-    '''
+    ''')
 
-    return html
+    return html.build()
 
 
@@ -13,7 +13,7 @@ import html as html_module
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.translations import TRANSLATIONS, YAKU_TRANSLATION, YAKU_TRANSLATION_EN
-from templates.template_loader import load_html_template, load_css
+from templates.template_loader import render_template, asset_url
 
 
 def generate_index_page(lang='zh'):
@@ -31,10 +31,9 @@ def generate_index_page(lang='zh'):
     other_lang = 'en' if lang == 'zh' else 'zh'
     other_index = 'index-en.html' if lang == 'zh' else 'index.html'
 
-    html_template = load_html_template('index.html')
-    css_content = load_css('index.css')
-
-    return html_template.format(
+    return render_template(
+        'index.html',
+        'index.css',
         lang_code=lang_code,
         title=t['title'],
         subtitle=t['subtitle'],
@@ -54,8 +53,7 @@ def generate_index_page(lang='zh'):
         view_s_league=t['view_s_league'],
         upload_title=t['upload_title'],
         upload_desc=t['upload_desc'],
-        generated_by=t['generated_by'],
-        css_content=css_content
+        generated_by=t['generated_by']
     )
 
 
@@ -75,17 +73,15 @@ def generate_ema_page(lang='zh'):
     home_page = 'index.html' if lang == 'zh' else 'index-en.html'
     other_lang = 'en' if lang == 'zh' else 'zh'
 
-    html_template = load_html_template('ema.html')
-    css_content = load_css('ema.css')
-
-    return html_template.format(
+    return render_template(
+        'ema.html',
+        'ema.css',
         lang_code=lang_code,
         other_page=other_page,
         switch_lang=t['switch_to_' + other_lang],
         coming_soon=t['coming_soon'],
         home_page=home_page,
-        back_home=t['back_home'],
-        css_content=css_content
+        back_home=t['back_home']
     )
 
 
@@ -194,19 +190,16 @@ def generate_sanma_honor_page(yakuman_games, lang='zh'):
     else:
         honor_cards = f"<p style='text-align: center; color: #999; padding: 40px;'>{'暂无役满牌谱' if lang == 'zh' else 'No yakuman games yet'}</p>"
 
-    # 创建一个简化的 render_template 函数调用
-    html_template = load_html_template('sanma_honor.html')
-    css_content = load_css('sanma_honor.css')
-
-    return html_template.format(
+    return render_template(
+        'sanma_honor.html',
+        'sanma_honor.css',
         lang_code=lang_code,
         title=title,
         other_page=other_page,
         switch_lang=t['switch_to_' + other_lang],
         home_page=home_page,
         back_home=t['back_home'],
-        honor_cards=honor_cards,
-        css_content=css_content
+        honor_cards=honor_cards
     )
 
 
@@ -227,7 +220,8 @@ def generate_m_league_page(
     players_data={},
     select_player_label='',
     choose_player='',
-    select_player_prompt=''
+    select_player_prompt='',
+    out=None
 ):
     """
     生成M-League标签页页面
@@ -250,22 +244,23 @@ def generate_m_league_page(
         select_player_label: "选择玩家"标签文本
         choose_player: "请选择"文本
         select_player_prompt: "请选择玩家查看详细数据"提示文本
+        out: 输出文件对象（可选，指定后直接逐段写入文件，不拼接完整页面）
 
     Returns:
-        str: 渲染后的HTML
+        str: 渲染后的HTML（指定 out 时返回None）
     """
-    # 加载模板和CSS
-    html_template = load_html_template('m_league.html')
-    css_content = load_css('m_league.css')
-
     # 语言代码
     lang_code = 'zh-CN' if lang == 'zh' else 'en'
 
     # 将玩家数据转换为JSON
     players_data_json = json.dumps(players_data, ensure_ascii=False)
 
-    # 渲染模板
-    html = html_template.format(
+    # 渲染模板（模板预编译缓存，指定 out 时流式写出）
+    return render_template(
+        'm_league.html',
+        'm_league.css',
+        out=out,
+        league_tabs_js=asset_url('league_tabs.js'),
         lang_code=lang_code,
         title=title,
         date_info=date_info,
@@ -286,12 +281,9 @@ def generate_m_league_page(
         players_data_json=players_data_json,
         select_player_label=select_player_label,
         choose_player=choose_player,
-        select_player_prompt=select_player_prompt,
-        css_content=css_content
+        select_player_prompt=select_player_prompt
     )
 
-    return html
-
 
 def generate_s_league_page(
     lang='zh',
@@ -306,7 +298,8 @@ def generate_s_league_page(
     honor_content='',
     ranking_content='',
     leaderboard_content='',
-    finals_content=''
+    finals_content='',
+    out=None
 ):
     """
     生成S-League标签页页面（牌谱历史 / 荣誉牌谱 / 总排名 / 排行榜 / 决定战）
@@ -325,16 +318,20 @@ def generate_s_league_page(
         ranking_content: 总排名内容HTML
         leaderboard_content: 排行榜内容HTML
         finals_content: 决定战内容HTML
+        out: 输出文件对象（可选，指定后直接逐段写入文件）
 
     Returns:
-        str: 渲染后的HTML
+        str: 渲染后的HTML（指定 out 时返回None）
     """
-    html_template = load_html_template('s_league.html')
-    css_content = load_css('s_league.css')
-
     lang_code = 'zh-CN' if lang == 'zh' else 'en'
 
-    html = html_template.format(
+    return render_template(
+        's_league.html',
+        's_league.css',
+        out=out,
+        # S-League页面位于 docs/s-league/ 子目录
+        asset_prefix='../',
+        league_tabs_js=asset_url('league_tabs.js', '../'),
         lang_code=lang_code,
         title=title,
         date_info=date_info,
@@ -351,8 +348,5 @@ def generate_s_league_page(
         honor_content=honor_content,
         ranking_content=ranking_content,
         leaderboard_content=leaderboard_content,
-        finals_content=finals_content,
-        css_content=css_content
+        finals_content=finals_content
     )
-
-    return html
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+命令行入口的导入耗时基准测试
+
+对每个模块在新的子进程中运行 `python -X importtime -c "import 模块"`，
+重复多次取中位数，报告：
+- 导入耗时：解释器启动本身（site 等）之外的导入时间
+- 进程耗时：整个子进程的墙钟时间（含解释器启动）
+- 自身耗时最多的模块
+
+同时检查核心模块（牌谱读取、统计、Rating）没有导入页面渲染模块，
+核心模块导入了渲染模块时以非零状态退出。
+
+正式测量前先运行一次预热，让字节码缓存（__pycache__）生成好，
+即使环境中设置了 PYTHONDONTWRITEBYTECODE。
+
+用法:
+    python3 src/import_benchmark.py
+    python3 src/import_benchmark.py player_stats s_league.data_processor --repeat 10
+    python3 src/import_benchmark.py --top 15 --json import_times.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 默认测量的模块：核心模块 + 页面生成入口
+DEFAULT_MODULES = [
+    'summarize_v23',
+    'player_stats',
+    's_league.data_processor',
+    'calculate_sc',
+    'extract_honor_games',
+    's_league.page_generator',
+    'generate_website',
+]
+
+# 核心模块：只负责读取牌谱、统计和Rating，不应导入渲染模块
+CORE_MODULES = ('summarize_v23', 'batch_summarize_v23', 'player_stats', 's_league.data_processor')
+
+# 页面渲染模块（模块名或包名前缀）
+RENDERING_MODULES = (
+    'generate_website',
+    'generate_m_league_tabs',
+    'template_renderer',
+    'generators',
+    'config.translations',
+    's_league.templates',
+    's_league.content',
+    's_league.page_generator',
+    'utils.output_stage',
+)
+
+
+def parse_importtime(stderr):
+    """
+    解析 -X importtime 的输出
+
+    返回:
+        list: [(模块名, 自身耗时us, 累计耗时us, 嵌套层级), ...]（按输出顺序）
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0])
+            cumulative_us = int(parts[1])
+        except ValueError:
+            continue  # 表头
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        entries.append((stripped, self_us, cumulative_us, depth))
+    return entries
+
+
+def _child_env():
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    return env
+
+
+def run_once(code, env):
+    """在子进程中执行一段代码，返回 (importtime 条目, 墙钟耗时ms)"""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=SRC_DIR, env=env, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f'退出码 {proc.returncode}')
+    return parse_importtime(proc.stderr), wall_ms
+
+
+def _is_rendering(name):
+    return any(name == m or name.startswith(m + '.') for m in RENDERING_MODULES)
+
+
+def measure_module(module, repeat, baseline_modules, env):
+    """
+    测量一个模块的导入耗时
+
+    返回:
+        dict: {'module', 'import_ms', 'wall_ms', 'runs', 'top': [(模块名, 自身ms), ...], 'modules': [...]}
+    """
+    code = f'import {module}'
+    run_once(code, env)  # 预热：生成字节码缓存
+
+    runs = []
+    for _ in range(repeat):
+        entries, wall_ms = run_once(code, env)
+        # 解释器启动时导入的模块（site、encodings 等）不计入
+        import_us = sum(cum for name, _, cum, depth in entries if depth == 0 and name not in baseline_modules)
+        runs.append((import_us / 1000, wall_ms, entries))
+
+    runs.sort(key=lambda r: r[0])
+    import_ms, _, entries = runs[len(runs) // 2]
+    loaded = [name for name, _, _, _ in entries if name not in baseline_modules]
+    return {
+        'module': module,
+        'import_ms': round(import_ms, 2),
+        'wall_ms': round(statistics.median(r[1] for r in runs), 2),
+        'runs': [round(r[0], 2) for r in runs],
+        'top': sorted(((name, self_us / 1000) for name, self_us, _, _ in entries if name not in baseline_modules),
+                      key=lambda x: -x[1]),
+        'modules': loaded,
+    }
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="测量命令行入口模块的导入耗时")
+    ap.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="要测量的模块（默认测量核心模块和页面生成入口）")
+    ap.add_argument("--repeat", type=int, default=5, help="每个模块重复测量的次数（取中位数）")
+    ap.add_argument("--top", type=int, default=5, help="列出自身耗时最多的前N个模块")
+    ap.add_argument("--json", default=None, help="输出JSON格式的报告到指定文件")
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    env = _child_env()
+
+    baseline_entries, baseline_wall_ms = run_once('pass', env)
+    baseline_modules = {name for name, _, _, _ in baseline_entries}
+    print(f"解释器启动: {baseline_wall_ms:.1f} ms（site 等 {len(baseline_modules)} 个模块，不计入导入耗时）")
+    print("=" * 80)
+
+    results = []
+    violations = []
+    for module in args.modules:
+        try:
+            result = measure_module(module, max(1, args.repeat), baseline_modules, env)
+        except RuntimeError as e:
+            print(f"❌ {module}: 导入失败 - {e}")
+            continue
+        results.append(result)
+
+        print(f"{module:<28} 导入 {result['import_ms']:>8.1f} ms    进程 {result['wall_ms']:>8.1f} ms")
+        for name, self_ms in result['top'][:args.top]:
+            print(f"    {self_ms:>7.2f} ms  {name}")
+
+        if module in CORE_MODULES:
+            rendering = [name for name in result['modules'] if _is_rendering(name)]
+            if rendering:
+                violations.append((module, rendering))
+
+    if args.json:
+        report = {
+            'python': sys.version.split()[0],
+            'startup_ms': round(baseline_wall_ms, 2),
+            'results': [dict(r, top=r['top'][:args.top]) for r in results],
+            'violations': {module: names for module, names in violations},
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n✓ 报告已保存到 {args.json}")
+
+    if violations:
+        print("\n❌ 核心模块导入了页面渲染模块：")
+        for module, names in violations:
+            print(f"  {module}: {', '.join(names)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
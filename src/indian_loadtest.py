@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+Indian Poker 服务器压力测试
+
+模拟 N 张牌桌、每桌 4 个客户端，完整走一遍
+join_game → select_role → start_round → update_scores 流程，
+统计每种事件的延迟分位数（从发出请求到收到服务器对应的广播）、总吞吐量，
+以及测试期间服务器进程的 CPU 和内存占用。
+
+两种运行方式：
+- 网络模式（默认）：通过 Socket.IO 连接 --url 指定的服务器；
+  加 --spawn 时由本脚本在本机启动服务器子进程（可用 --async-mode 选择异步模式）。
+  需要 Socket.IO 客户端依赖: pip install "python-socketio[client]"
+- 进程内模式（--in-process）：直接导入 indian_server 并使用 SocketIO 测试客户端，
+  不经过网络，CPU/内存统计包含客户端自身的开销
+
+用法:
+    python3 src/indian_loadtest.py --spawn --tables 20
+    python3 src/indian_loadtest.py --url http://192.168.1.10:5001 --tables 50 --json report.json
+    python3 src/indian_loadtest.py --in-process --tables 10
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import queue
+import shutil
+import argparse
+import contextlib
+import tempfile
+import threading
+import subprocess
+from urllib.request import urlopen
+from urllib.error import URLError
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+ROLE_COUNT = 4
+ROUNDS = ['东1局', '东2局', '东3局', '东4局', '南1局', '南2局', '南3局', '南4局']
+
+
+def percentile(sorted_values, pct):
+    """最近秩法求分位数（sorted_values 已排序）"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100.0 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class ProcessSampler:
+    """后台线程定期采样进程的 CPU 占用率和常驻内存"""
+
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.cpu_samples = []   # 每个采样间隔内的 CPU 占用率（%，多核可超过100）
+        self.rss_samples = []   # 常驻内存（字节）
+        self._stop = threading.Event()
+        self._thread = None
+        self._process = psutil.Process(pid) if psutil is not None else None
+
+    def _cpu_seconds(self):
+        if self._process is not None:
+            times = self._process.cpu_times()
+            return times.user + times.system
+        with open(f'/proc/{self.pid}/stat') as f:
+            # comm 字段可能包含空格，从最后一个 ')' 之后开始解析
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+    def _rss_bytes(self):
+        if self._process is not None:
+            return self._process.memory_info().rss
+        with open(f'/proc/{self.pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+        return 0
+
+    @property
+    def available(self):
+        return self._process is not None or os.path.exists(f'/proc/{self.pid}/stat')
+
+    def _run(self):
+        last_cpu = self._cpu_seconds()
+        last_time = time.perf_counter()
+        while True:
+            # 停止时再采样一次，运行时间短于采样间隔也有数据
+            stopped = self._stop.wait(self.interval)
+            try:
+                cpu = self._cpu_seconds()
+                rss = self._rss_bytes()
+            except (OSError, IndexError, ValueError):
+                break
+            now = time.perf_counter()
+            self.cpu_samples.append((cpu - last_cpu) / (now - last_time) * 100)
+            self.rss_samples.append(rss)
+            last_cpu, last_time = cpu, now
+            if stopped:
+                break
+
+    def start(self):
+        if self.available:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def summary(self):
+        if not self.cpu_samples:
+            return None
+        return {
+            'cpu_avg_percent': sum(self.cpu_samples) / len(self.cpu_samples),
+            'cpu_max_percent': max(self.cpu_samples),
+            'rss_max_mb': max(self.rss_samples) / 1024 / 1024,
+            'rss_end_mb': self.rss_samples[-1] / 1024 / 1024
+        }
+
+
+class SocketIOConnection:
+    """网络模式的连接：python-socketio 客户端，收到的所有事件放入队列"""
+
+    def __init__(self, url):
+        import socketio
+        self.inbox = queue.Queue()
+        self.client = socketio.Client(reconnection=False)
+        self.client.on('*', lambda event, data=None: self.inbox.put((event, data)))
+        self.client.connect(url, transports=['websocket'])
+
+    def emit(self, event, data=None):
+        self.client.emit(event, data)
+
+    def receive(self, timeout):
+        try:
+            return self.inbox.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.client.disconnect()
+
+
+class TestClientConnection:
+    """进程内模式的连接：SocketIO 测试客户端（不经过网络）"""
+
+    def __init__(self, app, socketio):
+        self.client = socketio.test_client(app)
+        self.pending = []
+
+    def emit(self, event, data=None):
+        if data is None:
+            self.client.emit(event)
+        else:
+            self.client.emit(event, data)
+
+    def receive(self, timeout):
+        deadline = time.perf_counter() + timeout
+        while not self.pending:
+            self.pending = [(m['name'], m['args'][0] if m['args'] else None)
+                            for m in self.client.get_received()]
+            if not self.pending:
+                if time.perf_counter() >= deadline:
+                    return None
+                time.sleep(0.001)
+        return self.pending.pop(0)
+
+    def close(self):
+        self.client.disconnect()
+
+
+class SimClient:
+    """模拟玩家：发送请求并等待服务器的对应广播，记录延迟"""
+
+    def __init__(self, connection, name, stats, timeout):
+        self.conn = connection
+        self.name = name
+        self.stats = stats
+        self.timeout = timeout
+
+    def drain(self):
+        """丢弃已收到但未处理的消息（同桌其他玩家动作产生的广播）"""
+        while self.conn.receive(0) is not None:
+            pass
+
+    def request(self, event, data, expect, match=None):
+        """
+        发送事件并等待期望的回应
+
+        参数:
+            event: 发送的事件名
+            data: 事件数据
+            expect: 期望收到的事件名
+            match: 可选，判断回应数据是否属于本次请求的函数
+        """
+        self.drain()
+        start = time.perf_counter()
+        self.conn.emit(event, data)
+        deadline = start + self.timeout
+        while True:
+            remaining = deadline - time.perf_counter()
+            message = self.conn.receive(max(remaining, 0)) if remaining > 0 else None
+            if message is None:
+                self.stats.record_error(event, '超时')
+                return False
+            name, payload = message
+            if name == 'error':
+                self.stats.record_error(event, (payload or {}).get('message', ''))
+                return False
+            if name == expect and (match is None or match(payload)):
+                self.stats.record(event, time.perf_counter() - start)
+                return True
+
+
+class LoadStats:
+    """线程安全的延迟与错误统计"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}  # {事件名: [秒, ...]}
+        self.errors = {}     # {事件名: {错误信息: 次数}}
+
+    def record(self, event, seconds):
+        with self._lock:
+            self.latencies.setdefault(event, []).append(seconds)
+
+    def record_error(self, event, message):
+        with self._lock:
+            errors = self.errors.setdefault(event, {})
+            errors[message] = errors.get(message, 0) + 1
+
+    def report(self, elapsed):
+        events = {}
+        total = 0
+        for event, values in self.latencies.items():
+            values = sorted(values)
+            total += len(values)
+            events[event] = {
+                'count': len(values),
+                'p50_ms': percentile(values, 50) * 1000,
+                'p90_ms': percentile(values, 90) * 1000,
+                'p99_ms': percentile(values, 99) * 1000,
+                'max_ms': values[-1] * 1000
+            }
+        return {
+            'elapsed_s': elapsed,
+            'total_events': total,
+            'throughput_eps': total / elapsed if elapsed > 0 else 0.0,
+            'events': events,
+            'errors': self.errors
+        }
+
+
+def run_table(table_index, connect, args, stats, start_barrier):
+    """单张牌桌的完整流程：4人加入 → 选角色 → 逐局开始并更新分数 → 断开"""
+    table_id = f'load-{table_index}'
+    clients = []
+    try:
+        for seat in range(ROLE_COUNT):
+            clients.append(SimClient(connect(), f'{table_id}-p{seat}', stats, args.timeout))
+    except Exception as e:
+        stats.record_error('connect', str(e))
+        for client in clients:
+            client.conn.close()
+        start_barrier.abort()
+        return
+
+    try:
+        start_barrier.wait()
+    except threading.BrokenBarrierError:
+        for client in clients:
+            client.conn.close()
+        return
+
+    try:
+        for client in clients:
+            if not client.request('join_game', {'name': client.name, 'table_id': table_id},
+                                  'game_state_update'):
+                return
+
+        for seat, client in enumerate(clients):
+            if not client.request('select_role', {'role_index': seat}, 'role_selected',
+                                  match=lambda p, name=client.name: p.get('name') == name):
+                return
+
+        # 坐庄的玩家开局，各家轮流提交点数变动
+        for round_index in range(args.rounds):
+            round_name = ROUNDS[round_index % len(ROUNDS)]
+            if not clients[0].request('start_round', {'round': round_name}, 'game_started'):
+                return
+            for update in range(args.updates):
+                winner = update % ROLE_COUNT
+                loser = (winner + 1) % ROLE_COUNT
+                adjustments = {str(winner): 1000, str(loser): -1000}
+                if not clients[winner].request('update_scores', {'adjustments': adjustments},
+                                               'scores_delta'):
+                    return
+    finally:
+        for client in clients:
+            try:
+                client.conn.close()
+            except Exception:
+                pass
+
+
+def wait_for_server(url, timeout=15):
+    """等待服务器开始响应HTTP请求"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urlopen(url, timeout=1).close()
+            return True
+        except (URLError, OSError):
+            time.sleep(0.2)
+    return False
+
+
+def spawn_server(args, data_dir):
+    """在本机启动服务器子进程（事件日志写到临时目录，不影响正式数据）"""
+    env = dict(os.environ, INDIAN_ASYNC_MODE=args.async_mode, INDIAN_DATA_DIR=data_dir)
+    server_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'indian_server.py')
+    return subprocess.Popen(
+        [sys.executable, server_path, '--host', '127.0.0.1', '--port', str(args.port)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def print_report(report, server_stats, args):
+    clients = args.tables * ROLE_COUNT
+    print('=' * 60)
+    print(f'牌桌: {args.tables}  客户端: {clients}  局数: {args.rounds}  每局更新: {args.updates}')
+    print(f'耗时: {report["elapsed_s"]:.2f}s  事件: {report["total_events"]}  '
+          f'吞吐量: {report["throughput_eps"]:.1f} 事件/秒')
+    print('-' * 60)
+    print(f'{"事件":<16}{"次数":>8}{"p50(ms)":>10}{"p90(ms)":>10}{"p99(ms)":>10}{"max(ms)":>10}')
+    for event in ('join_game', 'select_role', 'start_round', 'update_scores'):
+        row = report['events'].get(event)
+        if row is None:
+            continue
+        print(f'{event:<16}{row["count"]:>8}{row["p50_ms"]:>10.2f}{row["p90_ms"]:>10.2f}'
+              f'{row["p99_ms"]:>10.2f}{row["max_ms"]:>10.2f}')
+    if report['errors']:
+        print('-' * 60)
+        for event, errors in report['errors'].items():
+            for message, count in errors.items():
+                print(f'错误 {event}: {message} x{count}')
+    print('-' * 60)
+    if server_stats is None:
+        print('服务器 CPU/内存: 无法采样（远程服务器，或缺少 /proc 且未安装 psutil）')
+    else:
+        print(f'服务器 CPU: 平均 {server_stats["cpu_avg_percent"]:.1f}%  峰值 {server_stats["cpu_max_percent"]:.1f}%')
+        print(f'服务器内存: 峰值 {server_stats["rss_max_mb"]:.1f} MB  结束时 {server_stats["rss_end_mb"]:.1f} MB')
+    print('=' * 60)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Indian Poker 服务器压力测试')
+    parser.add_argument('--tables', type=int, default=10, help='牌桌数（每桌4个客户端，默认 10）')
+    parser.add_argument('--rounds', type=int, default=8, help='每桌进行的局数（默认 8）')
+    parser.add_argument('--updates', type=int, default=4, help='每局的点数更新次数（默认 4）')
+    parser.add_argument('--url', default=None, help='服务器地址（默认 http://127.0.0.1:<port>）')
+    parser.add_argument('--port', type=int, default=5001, help='服务器端口（默认 5001）')
+    parser.add_argument('--spawn', action='store_true', help='在本机启动服务器子进程并采样其CPU/内存')
+    parser.add_argument('--server-pid', type=int, default=None, help='采样已在本机运行的服务器进程')
+    parser.add_argument('--async-mode', default='eventlet', help='--spawn 时服务器的异步模式（默认 eventlet）')
+    parser.add_argument('--in-process', action='store_true', help='进程内运行服务器，使用测试客户端')
+    parser.add_argument('--timeout', type=float, default=10.0, help='单个事件的等待超时（秒）')
+    parser.add_argument('--json', default=None, help='将报告保存为JSON文件')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    url = args.url or f'http://127.0.0.1:{args.port}'
+    server = None
+    data_dir = None
+    server_pid = args.server_pid
+    # 进程内模式下服务器的逐条日志输出会淹没报告
+    quiet = contextlib.nullcontext()
+
+    if args.in_process:
+        # 进程内模式：事件日志写到临时目录
+        data_dir = tempfile.mkdtemp(prefix='indian_load_')
+        os.environ['INDIAN_DATA_DIR'] = data_dir
+        os.environ.setdefault('INDIAN_ASYNC_MODE', 'threading')
+        from indian_server import app, socketio
+        connect = lambda: TestClientConnection(app, socketio)
+        server_pid = os.getpid()
+        quiet = contextlib.redirect_stdout(open(os.devnull, 'w'))
+    else:
+        if args.spawn:
+            data_dir = tempfile.mkdtemp(prefix='indian_load_')
+            server = spawn_server(args, data_dir)
+            server_pid = server.pid
+            if not wait_for_server(url):
+                server.kill()
+                print(f'❌ 服务器未能在 {url} 启动', file=sys.stderr)
+                return 1
+        connect = lambda: SocketIOConnection(url)
+
+    sampler = ProcessSampler(server_pid).start() if server_pid else None
+    stats = LoadStats()
+    start_barrier = threading.Barrier(args.tables + 1)
+    threads = [
+        threading.Thread(target=run_table, args=(i, connect, args, stats, start_barrier), daemon=True)
+        for i in range(args.tables)
+    ]
+
+    print(f'建立 {args.tables * ROLE_COUNT} 个连接...', file=sys.stderr)
+    try:
+        with quiet:
+            for thread in threads:
+                thread.start()
+            try:
+                # 所有连接建立后同时开始，连接耗时不计入吞吐量
+                start_barrier.wait()
+            except threading.BrokenBarrierError:
+                pass
+            start = time.perf_counter()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+    finally:
+        if sampler is not None:
+            sampler.stop()
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if data_dir is not None:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    report = stats.report(elapsed)
+    report['server'] = sampler.summary() if sampler is not None else None
+    report['config'] = {
+        'tables': args.tables, 'clients': args.tables * ROLE_COUNT,
+        'rounds': args.rounds, 'updates': args.updates,
+        'mode': 'in-process' if args.in_process else url
+    }
+    print_report(report, report['server'], args)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f'报告已保存: {args.json}', file=sys.stderr)
+
+    return 1 if report['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""
+Indian Poker 实时多人游戏模块
+
+游戏状态与 Flask/SocketIO 网络层分离，服务器入口见 indian_server.py
+"""
+
+from .game import (
+    CARD_POOL, ROUNDS, INITIAL_SCORE, ROLE_NAMES, MAX_PLAYERS,
+    DEFAULT_TABLE_ID, LOBBY_CHANNEL, RECONNECT_GRACE_SECONDS,
+    build_deck, generate_all_cards, new_seat_token, normalize_table_id,
+    GameRoom, RoomManager
+)
+
+__all__ = [
+    'CARD_POOL', 'ROUNDS', 'INITIAL_SCORE', 'ROLE_NAMES', 'MAX_PLAYERS',
+    'DEFAULT_TABLE_ID', 'LOBBY_CHANNEL', 'RECONNECT_GRACE_SECONDS',
+    'build_deck', 'generate_all_cards', 'new_seat_token', 'normalize_table_id',
+    'GameRoom', 'RoomManager'
+]
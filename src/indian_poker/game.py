@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+"""
+Indian Poker 牌桌状态
+
+与网络层无关：每张牌桌一个 GameRoom，由 RoomManager 按牌桌号管理，
+并维护 连接(sid) → 牌桌 的映射，使每个事件只需处理所在牌桌的状态。
+
+牌桌状态带版本号：每次变更后服务器只广播变化的部分（增量消息）并附带递增的序号 seq，
+客户端发现序号不连续时请求完整状态重新同步。
+
+所有状态变更都表示为事件（join、leave、select_role、deal、start_round、update_scores、reset），
+由 GameRoom.apply_event 统一应用，持久化层（persistence.py）记录同样的事件并在重启时重放。
+"""
+
+import random
+import secrets
+import threading
+import hashlib
+import json
+
+# 卡片池定义
+CARD_POOL = [
+    {'name': '立直', 'count': 2},
+    {'name': '役牌', 'count': 2},
+    {'name': '默听', 'count': 2},
+    {'name': '附露', 'count': 2},
+    {'name': '平和', 'count': 1},
+    {'name': '断幺', 'count': 1},
+    {'name': '奇数番', 'count': 1},
+    {'name': '偶数番', 'count': 1},
+    {'name': '自摸', 'count': 1},
+    {'name': '荣', 'count': 1},
+    {'name': '跳满', 'count': 1},
+    {'name': '倍满', 'count': 1}
+]
+
+ROUNDS = ['东1局', '东2局', '东3局', '东4局', '南1局', '南2局', '南3局', '南4局']
+INITIAL_SCORE = 100000
+ROLE_NAMES = ['东家', '南家', '西家', '北家']
+MAX_PLAYERS = 4
+
+# 未指定牌桌号时加入的默认牌桌
+DEFAULT_TABLE_ID = 'main'
+TABLE_ID_MAX_LENGTH = 32
+
+# 大厅频道：未入座的连接在这里接收牌桌列表
+LOBBY_CHANNEL = 'lobby'
+
+# 断线后保留座位的时间（秒），期间客户端可凭座位令牌回到原座位
+RECONNECT_GRACE_SECONDS = 60
+
+
+def build_deck():
+    """构建完整的卡牌堆"""
+    deck = []
+    for card in CARD_POOL:
+        for _ in range(card['count']):
+            deck.append(card['name'])
+    return deck
+
+
+def generate_all_cards():
+    """生成8局的所有卡片"""
+    cards = {}
+    for round_name in ROUNDS:
+        deck = build_deck()
+        random.shuffle(deck)
+        cards[round_name] = [deck.pop() for _ in range(MAX_PLAYERS)]
+    return cards
+
+
+def new_seat_token():
+    """生成座位令牌（只发给入座的客户端，断线重连时凭令牌取回座位）"""
+    return secrets.token_urlsafe(16)
+
+
+def normalize_table_id(table_id):
+    """
+    规范化客户端传来的牌桌号
+
+    返回:
+        str: 牌桌号（为空时返回默认牌桌号）；不合法时返回None
+    """
+    if table_id is None:
+        return DEFAULT_TABLE_ID
+    table_id = str(table_id).strip()
+    if not table_id:
+        return DEFAULT_TABLE_ID
+    if len(table_id) > TABLE_ID_MAX_LENGTH:
+        return None
+    return table_id
+
+
+class GameRoom:
+    """单张牌桌的游戏状态"""
+
+    def __init__(self, table_id):
+        self.table_id = table_id
+        self.channel = f"table:{table_id}"
+        # 同一牌桌的事件串行处理（threading 模式下多个请求可能并发）
+        self.lock = threading.RLock()
+        # 状态版本号：每条广播给牌桌的消息加1，重置牌桌时也不归零
+        self.seq = 0
+        self.reset()
+
+    def reset(self):
+        """重置牌桌（清空玩家、卡片和分数）"""
+        # 入座顺序的玩家列表 [{'name': 'xxx', 'sid': 'xxx'（断线时为None）, 'role_index': None, 'token': 'xxx'}, ...]
+        self.players = []
+        # 玩家索引：连接ID / 姓名 / 座位令牌 / 角色 → 玩家，所有查找都不需要遍历玩家列表
+        self._by_sid = {}
+        self._by_name = {}
+        self._by_token = {}
+        self._by_role = {}
+        self.game_started = False
+        self.current_round = None
+        self.cards = {}  # {'东1局': ['卡1', '卡2', '卡3', '卡4'], ...}
+        self.scores = {i: INITIAL_SCORE for i in range(MAX_PLAYERS)}  # {role_index: 分数}
+        self.field_pot = 0
+        self.all_cards_generated = False
+
+    def next_seq(self):
+        """分配下一条广播消息的序号"""
+        self.seq += 1
+        return self.seq
+
+    @staticmethod
+    def public_player(player):
+        """发送给客户端的玩家信息（不含连接ID）"""
+        return {'name': player['name'], 'role_index': player['role_index']}
+
+    def find_player(self, sid):
+        return self._by_sid.get(sid)
+
+    def find_player_by_name(self, name):
+        return self._by_name.get(name)
+
+    def find_player_by_token(self, token):
+        return self._by_token.get(token)
+
+    def add_player(self, name, sid, token=None):
+        """加入玩家，返回玩家字典"""
+        player = {'name': name, 'sid': sid, 'role_index': None, 'token': token or new_seat_token()}
+        self.players.append(player)
+        self._by_name[name] = player
+        self._by_token[player['token']] = player
+        if sid is not None:
+            self._by_sid[sid] = player
+        return player
+
+    def remove_player(self, name):
+        """移除玩家，返回被移除的玩家（不存在时返回None）"""
+        player = self._by_name.pop(name, None)
+        if player is None:
+            return None
+        self.players.remove(player)
+        self._by_token.pop(player['token'], None)
+        if player['sid'] is not None:
+            self._by_sid.pop(player['sid'], None)
+        if player['role_index'] is not None:
+            self._by_role.pop(player['role_index'], None)
+        return player
+
+    def set_role(self, player, role_index):
+        """设置玩家角色（开局前可以更换角色）"""
+        if player['role_index'] is not None and self._by_role.get(player['role_index']) is player:
+            del self._by_role[player['role_index']]
+        player['role_index'] = role_index
+        self._by_role[role_index] = player
+
+    def attach(self, player, sid):
+        """把玩家绑定到新的连接（重连取回座位）"""
+        if player['sid'] is not None:
+            self._by_sid.pop(player['sid'], None)
+        player['sid'] = sid
+        player.pop('disconnected_at', None)
+        self._by_sid[sid] = player
+
+    def detach(self, sid, now):
+        """连接断开但保留座位，返回对应的玩家（不存在时返回None）"""
+        player = self._by_sid.pop(sid, None)
+        if player is not None:
+            player['sid'] = None
+            self.mark_disconnected(player, now)
+        return player
+
+    @staticmethod
+    def mark_disconnected(player, now):
+        """记录断线时间（同时作为本次断线的标识，座位过期检查据此判断玩家是否已重连过）"""
+        player['disconnected_at'] = now
+
+    def role_taken(self, role_index, sid):
+        """角色是否已被其他玩家选择"""
+        holder = self._by_role.get(role_index)
+        return holder is not None and holder['sid'] != sid
+
+    def all_roles_selected(self):
+        return len(self._by_role) >= MAX_PLAYERS
+
+    def deal_cards(self, cards=None):
+        """生成8局卡片（已生成时不重复生成），返回是否本次生成"""
+        if self.all_cards_generated:
+            return False
+        self.cards = cards if cards is not None else generate_all_cards()
+        self.all_cards_generated = True
+        return True
+
+    def start_round(self, round_name):
+        self.game_started = True
+        self.current_round = round_name
+
+    def apply_adjustments(self, adjustments):
+        """
+        应用点数变动
+
+        参数:
+            adjustments: {'0'..'3' 或 'field_pot': 变动值}
+
+        返回:
+            dict: 变化后的值，只包含实际变化的座位 {'scores': {role_index: 新分数}, 'field_pot': 新场供}
+        """
+        changed_scores = {}
+        field_pot_changed = False
+        for key, adjustment in adjustments.items():
+            if not adjustment:
+                continue
+            if key == 'field_pot':
+                self.field_pot += adjustment
+                field_pot_changed = True
+                continue
+            try:
+                # key是role_index的字符串形式，转换为整数
+                role_index = int(key)
+            except (TypeError, ValueError):
+                continue
+            if role_index in self.scores:
+                self.scores[role_index] += adjustment
+                changed_scores[role_index] = self.scores[role_index]
+
+        delta = {'scores': changed_scores}
+        if field_pot_changed:
+            delta['field_pot'] = self.field_pot
+        return delta
+
+    def apply_event(self, event):
+        """
+        应用一个状态变更事件（实时处理和重启重放走同一条路径）
+
+        参数:
+            event: {'type': 事件类型, ...事件参数}
+
+        返回:
+            各事件对应方法的返回值（join 返回玩家，update_scores 返回变化的分数等）
+        """
+        kind = event['type']
+        if kind == 'join':
+            return self.add_player(event['name'], event.get('sid'), event.get('token'))
+        if kind == 'leave':
+            return self.remove_player(event['name'])
+        if kind == 'select_role':
+            player = self.find_player_by_name(event['name'])
+            if player is not None:
+                self.set_role(player, event['role_index'])
+            return player
+        if kind == 'deal':
+            return self.deal_cards(event['cards'])
+        if kind == 'start_round':
+            return self.start_round(event['round'])
+        if kind == 'update_scores':
+            return self.apply_adjustments(event['adjustments'])
+        if kind == 'reset':
+            return self.reset()
+        raise ValueError(f'未知的牌桌事件: {kind}')
+
+    def snapshot(self):
+        """可序列化为JSON的完整状态（持久化快照用，不含连接ID；消息序号只对当前连接有意义，不保存）"""
+        return {
+            'table_id': self.table_id,
+            'players': [dict(self.public_player(p), token=p['token']) for p in self.players],
+            'game_started': self.game_started,
+            'current_round': self.current_round,
+            'cards': self.cards,
+            'scores': {str(k): v for k, v in self.scores.items()},
+            'field_pot': self.field_pot,
+            'all_cards_generated': self.all_cards_generated
+        }
+
+    @classmethod
+    def from_snapshot(cls, data):
+        """从快照恢复牌桌（玩家没有连接，sid 为None，等待重新加入）"""
+        room = cls(data['table_id'])
+        for p in data['players']:
+            player = room.add_player(p['name'], None, p.get('token'))
+            if p['role_index'] is not None:
+                room.set_role(player, p['role_index'])
+        room.game_started = data['game_started']
+        room.current_round = data['current_round']
+        room.cards = data['cards']
+        room.scores = {int(k): v for k, v in data['scores'].items()}
+        room.field_pot = data['field_pot']
+        room.all_cards_generated = data['all_cards_generated']
+        return room
+
+    @property
+    def is_full(self):
+        return len(self.players) >= MAX_PLAYERS
+
+    @property
+    def is_empty(self):
+        return not self.players
+
+    def state(self):
+        """完整状态（新加入或需要重新同步的连接用）"""
+        return {
+            'table_id': self.table_id,
+            'seq': self.seq,
+            'players': [self.public_player(p) for p in self.players],
+            'game_started': self.game_started,
+            'current_round': self.current_round,
+            'scores': self.scores,
+            'field_pot': self.field_pot
+        }
+
+    def summary(self):
+        """大厅列表中的牌桌摘要"""
+        return {
+            'table_id': self.table_id,
+            'player_count': len(self.players),
+            'max_players': MAX_PLAYERS,
+            'game_started': self.game_started,
+            'current_round': self.current_round
+        }
+
+    def game_hash(self):
+        """生成游戏唯一标识"""
+        data = {
+            'players': [p['name'] for p in self.players],
+            'cards': self.cards
+        }
+        json_str = json.dumps(data, sort_keys=True, ensure_ascii=False)
+        return hashlib.md5(json_str.encode('utf-8')).hexdigest()[:8]
+
+
+class RoomManager:
+    """按牌桌号管理所有牌桌，并记录每个连接所在的牌桌"""
+
+    def __init__(self):
+        self.rooms = {}         # {table_id: GameRoom}
+        self._sid_rooms = {}    # {sid: GameRoom}
+        # 加入/离开牌桌（会创建或删除牌桌）时持有
+        self.lock = threading.RLock()
+
+    def get(self, table_id):
+        return self.rooms.get(table_id)
+
+    def get_or_create(self, table_id):
+        room = self.rooms.get(table_id)
+        if room is None:
+            room = self.rooms[table_id] = GameRoom(table_id)
+        return room
+
+    def restore(self, restored_rooms):
+        """登记从持久化数据恢复的牌桌"""
+        for room in restored_rooms:
+            self.rooms[room.table_id] = room
+
+    def room_of(self, sid):
+        """连接所在的牌桌（未入座时返回None）"""
+        return self._sid_rooms.get(sid)
+
+    def bind(self, sid, room):
+        self._sid_rooms[sid] = room
+
+    def unbind(self, sid):
+        """解除连接与牌桌的绑定，返回原来所在的牌桌"""
+        return self._sid_rooms.pop(sid, None)
+
+    def discard_if_empty(self, room):
+        """牌桌没有玩家时将其删除，返回是否删除"""
+        if room.is_empty and self.rooms.get(room.table_id) is room:
+            del self.rooms[room.table_id]
+            return True
+        return False
+
+    def lobby(self):
+        """大厅牌桌列表（按牌桌号排序）"""
+        return [self.rooms[table_id].summary() for table_id in sorted(self.rooms)]
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+牌桌事件日志（事件溯源持久化）
+
+每张牌桌一个目录：
+- events.jsonl: 追加写入的事件日志，每行一个事件 {'n': 事件编号, 'type': ..., ...}
+- snapshot.json: 最近一次快照 {'last_event': 快照包含的最后事件编号, 'state': 牌桌状态}
+
+服务器启动时从快照恢复牌桌，再重放快照之后的事件。
+事件写入后立即 flush 到操作系统，fsync 由后台任务按固定间隔批量执行；
+每累计一定数量的事件写一次快照并截断事件日志，日志长度和恢复时间都有上界。
+"""
+
+import os
+import json
+import shutil
+import threading
+from urllib.parse import quote, unquote
+
+from .game import GameRoom
+
+# 每张牌桌累计多少个事件写一次快照
+SNAPSHOT_EVERY = 200
+# 后台批量 fsync 的间隔（秒）
+FSYNC_INTERVAL = 0.5
+
+_TABLE_DIR_PREFIX = 't_'
+
+
+def _table_dir_name(table_id):
+    """牌桌号 → 目录名（转义所有特殊字符，加前缀避免 '.'、'..' 之类的名字）"""
+    return _TABLE_DIR_PREFIX + quote(table_id, safe='')
+
+
+def _write_json_atomic(path, data):
+    """先写临时文件并 fsync，再替换目标文件"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class TableEventLog:
+    """单张牌桌的事件日志和快照"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.events_path = os.path.join(directory, 'events.jsonl')
+        self.snapshot_path = os.path.join(directory, 'snapshot.json')
+        self.last_event = 0             # 最后写入的事件编号
+        self.events_since_snapshot = 0
+        self._file = None
+        self._dirty = False
+        # 后台 fsync 任务与事件处理可能并发访问同一文件
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        读取快照和快照之后的事件
+
+        返回:
+            (snapshot_state 或 None, [事件, ...])
+        """
+        state = None
+        snapshot_event = 0
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            state = snapshot['state']
+            snapshot_event = snapshot['last_event']
+        except (OSError, ValueError, KeyError):
+            pass
+
+        events = []
+        try:
+            with open(self.events_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # 崩溃时可能留下写了一半的最后一行
+                        break
+                    if event['n'] > snapshot_event:
+                        events.append(event)
+        except OSError:
+            pass
+
+        self.last_event = events[-1]['n'] if events else snapshot_event
+        self.events_since_snapshot = len(events)
+        return state, events
+
+    def append(self, event):
+        """追加一个事件（写入并 flush，fsync 由 sync() 批量执行），返回事件编号"""
+        with self._lock:
+            if self._file is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self._file = open(self.events_path, 'a', encoding='utf-8')
+            self.last_event += 1
+            record = dict(event, n=self.last_event)
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._file.flush()
+            self._dirty = True
+            self.events_since_snapshot += 1
+            return self.last_event
+
+    def write_snapshot(self, state):
+        """写快照并截断事件日志（快照中记录了包含的最后事件编号，截断前崩溃也不会重复应用）"""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            _write_json_atomic(self.snapshot_path, {'last_event': self.last_event, 'state': state})
+            if self._file is not None:
+                self._file.close()
+            self._file = open(self.events_path, 'w', encoding='utf-8')
+            self._dirty = False
+            self.events_since_snapshot = 0
+
+    def sync(self):
+        """把已写入的事件 fsync 到磁盘"""
+        with self._lock:
+            if self._dirty and self._file is not None:
+                os.fsync(self._file.fileno())
+                self._dirty = False
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                if self._dirty:
+                    os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+                self._dirty = False
+
+    def destroy(self):
+        """删除该牌桌的全部持久化数据"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._dirty = False
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class TableStore:
+    """所有牌桌的持久化存储"""
+
+    def __init__(self, data_dir, snapshot_every=SNAPSHOT_EVERY):
+        self.data_dir = data_dir
+        self.snapshot_every = snapshot_every
+        self._logs = {}  # {table_id: TableEventLog}
+
+    def _log(self, table_id):
+        log = self._logs.get(table_id)
+        if log is None:
+            log = self._logs[table_id] = TableEventLog(os.path.join(self.data_dir, _table_dir_name(table_id)))
+        return log
+
+    def record(self, room, event):
+        """
+        记录一个已应用到牌桌的事件，必要时写快照
+
+        事件中的连接ID(sid)不写入日志：重启后所有连接都已失效
+        """
+        log = self._log(room.table_id)
+        log.append({k: v for k, v in event.items() if k != 'sid'})
+        if log.events_since_snapshot >= self.snapshot_every:
+            log.write_snapshot(room.snapshot())
+
+    def drop(self, table_id):
+        """牌桌被删除时清除其持久化数据"""
+        log = self._logs.pop(table_id, None)
+        if log is None:
+            log = TableEventLog(os.path.join(self.data_dir, _table_dir_name(table_id)))
+        log.destroy()
+
+    def sync_all(self):
+        """批量 fsync 所有有新事件的牌桌"""
+        for log in list(self._logs.values()):
+            log.sync()
+
+    def close(self):
+        for log in list(self._logs.values()):
+            log.close()
+
+    def load_rooms(self):
+        """
+        从磁盘恢复所有牌桌
+
+        返回:
+            list: GameRoom 列表（恢复出的玩家都处于断线状态，sid 为None）
+        """
+        if not os.path.isdir(self.data_dir):
+            return []
+
+        restored = []
+        for name in sorted(os.listdir(self.data_dir)):
+            if not name.startswith(_TABLE_DIR_PREFIX):
+                continue
+            table_id = unquote(name[len(_TABLE_DIR_PREFIX):])
+            log = self._log(table_id)
+            state, events = log.load()
+
+            room = GameRoom.from_snapshot(state) if state else GameRoom(table_id)
+            for event in events:
+                room.apply_event(event)
+
+            if room.is_empty:
+                self.drop(table_id)
+                continue
+            # 把恢复结果写成快照，重放的事件不需要在下次启动时再重放
+            log.write_snapshot(room.snapshot())
+            restored.append(room)
+        return restored
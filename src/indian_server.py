@@ -2,76 +2,182 @@
 """
 Indian Poker 实时多人服务器
 使用 Flask + SocketIO 实现实时同步
+
+支持同时开多张牌桌：每张牌桌是一个以牌桌号区分的 Socket.IO 房间，
+牌桌内的事件只广播给同桌的连接；未入座的连接在大厅中接收牌桌列表。
+
+状态变化以增量消息广播（只含变化的座位/分数），每条消息带牌桌内递增的序号 seq，
+客户端发现序号不连续时发送 resync 获取完整状态
+
+入座时服务器给客户端发一个座位令牌；连接断开后座位保留一段时间，
+客户端重连后发送 reclaim_seat 凭令牌回到原座位，超时未回来才视为离开牌桌
+
+牌桌状态变更以事件形式追加写入每张牌桌的事件日志并定期写快照（见 indian_poker/persistence.py），
+服务器重启后从快照和事件日志恢复所有牌桌（座位令牌一并恢复），玩家凭座位令牌回到原座位：
+客户端重连后发送 reclaim_seat，或在 join_game 中同时提供原姓名和令牌；只凭姓名视为重名
 """
 
-from flask import Flask, render_template_string, request
+import os
+
+# 异步模式：threading（默认，开发用）、eventlet 或 gevent（生产环境，单进程可承载大量并发连接）
+# 通过环境变量 INDIAN_ASYNC_MODE 选择；eventlet/gevent 需要在导入其他模块前打补丁
+ASYNC_MODE = os.environ.get('INDIAN_ASYNC_MODE', 'threading')
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+elif ASYNC_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+
+import hmac
+import time
+import argparse
+import atexit
+from flask import Flask, request
 from flask_socketio import SocketIO, emit, join_room, leave_room
-import random
-import hashlib
-import json
-from datetime import datetime
+from indian_poker import (
+    ROUNDS, MAX_PLAYERS, LOBBY_CHANNEL, RECONNECT_GRACE_SECONDS,
+    generate_all_cards, new_seat_token, normalize_table_id, RoomManager
+)
+from indian_poker.persistence import TableStore, FSYNC_INTERVAL
 from pathlib import Path
 
+# 牌桌事件日志目录，通过环境变量 INDIAN_DATA_DIR 指定；设为空字符串则不持久化
+DATA_DIR = os.environ.get('INDIAN_DATA_DIR', str(Path(__file__).parent.parent / '.indian_data'))
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'indian-poker-secret-key'
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
-
-# 卡片池定义
-CARD_POOL = [
-    {'name': '立直', 'count': 2},
-    {'name': '役牌', 'count': 2},
-    {'name': '默听', 'count': 2},
-    {'name': '附露', 'count': 2},
-    {'name': '平和', 'count': 1},
-    {'name': '断幺', 'count': 1},
-    {'name': '奇数番', 'count': 1},
-    {'name': '偶数番', 'count': 1},
-    {'name': '自摸', 'count': 1},
-    {'name': '荣', 'count': 1},
-    {'name': '跳满', 'count': 1},
-    {'name': '倍满', 'count': 1}
-]
-
-ROUNDS = ['东1局', '东2局', '东3局', '东4局', '南1局', '南2局', '南3局', '南4局']
-INITIAL_SCORE = 100000
-ROLE_NAMES = ['东家', '南家', '西家', '北家']
-
-# 游戏状态存储
-game_state = {
-    'players': [],  # [{'name': 'xxx', 'sid': 'xxx', 'role_index': None}, ...]
-    'game_started': False,
-    'current_round': None,
-    'cards': {},  # {'东1局': ['卡1', '卡2', '卡3', '卡4'], ...}
-    'scores': {0: INITIAL_SCORE, 1: INITIAL_SCORE, 2: INITIAL_SCORE, 3: INITIAL_SCORE},  # {role_index: 分数}
-    'field_pot': 0,
-    'all_cards_generated': False
-}
-
-def build_deck():
-    """构建完整的卡牌堆"""
-    deck = []
-    for card in CARD_POOL:
-        for _ in range(card['count']):
-            deck.append(card['name'])
-    return deck
-
-def generate_all_cards():
-    """生成8局的所有卡片"""
-    cards = {}
-    for round_name in ROUNDS:
-        deck = build_deck()
-        random.shuffle(deck)
-        cards[round_name] = [deck.pop() for _ in range(4)]
-    return cards
-
-def get_game_hash():
-    """生成游戏唯一标识"""
-    data = {
-        'players': [p['name'] for p in game_state['players']],
-        'cards': game_state['cards']
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE)
+
+# 所有牌桌的状态（每张牌桌对应一个 Socket.IO 房间，事件只广播给同桌的连接）
+rooms = RoomManager()
+
+# 启动时从事件日志恢复牌桌
+store = TableStore(DATA_DIR) if DATA_DIR else None
+restored_rooms = store.load_rooms() if store is not None else []
+rooms.restore(restored_rooms)
+if store is not None:
+    atexit.register(store.close)
+
+
+def fsync_loop():
+    """后台任务：批量 fsync 事件日志，每个间隔内每张牌桌最多一次 fsync"""
+    while True:
+        socketio.sleep(FSYNC_INTERVAL)
+        store.sync_all()
+
+
+if store is not None:
+    socketio.start_background_task(fsync_loop)
+
+
+def commit(room, event):
+    """把事件应用到牌桌并写入事件日志，返回 GameRoom.apply_event 的结果"""
+    result = room.apply_event(event)
+    if store is not None:
+        store.record(room, event)
+    return result
+
+
+def discard_table(room):
+    """牌桌空了则删除，同时删除其事件日志，返回是否删除"""
+    removed = rooms.discard_if_empty(room)
+    if removed and store is not None:
+        store.drop(room.table_id)
+    return removed
+
+
+def broadcast_table(room, event, payload):
+    """向牌桌广播一条增量消息（附带递增的序号 seq，客户端据此发现漏收并重新同步）"""
+    payload['seq'] = room.next_seq()
+    socketio.emit(event, payload, to=room.channel)
+
+
+def broadcast_lobby_table(room, table_id=None):
+    """向大厅广播单张牌桌的变化（牌桌被删除时 room 为None）"""
+    if room is None:
+        payload = {'table_id': table_id, 'removed': True}
+    else:
+        payload = {'table': room.summary()}
+    socketio.emit('lobby_table', payload, to=LOBBY_CHANNEL)
+
+
+def current_room():
+    """当前连接所在的牌桌，未入座时发送错误并返回None"""
+    room = rooms.room_of(request.sid)
+    if room is None:
+        emit('error', {'message': '请先输入姓名'})
+    return room
+
+
+def round_payload(room):
+    """当前局的完整数据（开局广播和重连时补发用）"""
+    # 按照 role_index 排序玩家
+    sorted_players = sorted(room.players, key=lambda p: p['role_index'])
+    return {
+        'round': room.current_round,
+        'players': [room.public_player(p) for p in sorted_players],
+        'cards': room.cards[room.current_round],
+        'scores': room.scores,
+        'field_pot': room.field_pot,
+        'game_hash': room.game_hash()
     }
-    json_str = json.dumps(data, sort_keys=True, ensure_ascii=False)
-    return hashlib.md5(json_str.encode('utf-8')).hexdigest()[:8]
+
+
+def send_full_state(room):
+    """向当前连接发送牌桌的完整状态，游戏已开始时附带当前局的卡片"""
+    emit('game_state_update', room.state())
+    if room.game_started:
+        # 序号与刚发送的完整状态相同，不是新消息
+        emit('game_started', dict(round_payload(room), seq=room.seq))
+
+
+def seat_connection(room, player):
+    """把当前连接安排到玩家的座位：进入牌桌房间，发送座位令牌和完整状态"""
+    rooms.bind(request.sid, room)
+    leave_room(LOBBY_CHANNEL)
+    join_room(room.channel)
+    emit('seat_assigned', {'table_id': room.table_id, 'name': player['name'], 'token': player['token']})
+    send_full_state(room)
+
+
+def schedule_seat_expiry(room, player):
+    """断线的玩家超过保留时间仍未重连则离开牌桌"""
+    socketio.start_background_task(expire_seat, room, player['name'], player['disconnected_at'])
+
+
+def expire_seat(room, name, disconnected_at):
+    socketio.sleep(RECONNECT_GRACE_SECONDS)
+    with rooms.lock:
+        with room.lock:
+            player = room.find_player_by_name(name)
+            # 玩家已重连（或之后又断线，由那次断线的检查负责）、已离开或牌桌已重置
+            if player is None or player['sid'] is not None or player.get('disconnected_at') != disconnected_at:
+                return
+            commit(room, {'type': 'leave', 'name': name})
+            broadcast_table(room, 'player_left', {'name': name})
+            removed = discard_table(room)
+    print(f'玩家断线超时离开: {name} (牌桌 {room.table_id})')
+    broadcast_lobby_table(None if removed else room, room.table_id)
+
+
+def leave_table(sid):
+    """连接断开：保留座位等待重连"""
+    with rooms.lock:
+        room = rooms.unbind(sid)
+        if room is None:
+            return
+        with room.lock:
+            player = room.detach(sid, time.monotonic())
+    if player is not None:
+        schedule_seat_expiry(room, player)
+
+
+# 从事件日志恢复的玩家都处于断线状态；服务器停机多久都不应让恢复的牌桌失效，
+# 因此恢复的座位不设过期，一直保留到玩家凭令牌回到座位（之后断线按正常规则过期）或牌桌被重置
+for restored_room in restored_rooms:
+    for restored_player in restored_room.players:
+        restored_room.mark_disconnected(restored_player, time.monotonic())
 
 @app.route('/')
 def index():
@@ -91,185 +197,246 @@ def index():
 
 @socketio.on('connect')
 def handle_connect():
-    """客户端连接"""
+    """客户端连接：进入大厅并接收牌桌列表"""
     print(f'客户端连接: {request.sid}')
-    # 发送当前游戏状态
-    emit('game_state_update', {
-        'players': game_state['players'],
-        'game_started': game_state['game_started'],
-        'current_round': game_state['current_round'],
-        'scores': game_state['scores'],
-        'field_pot': game_state['field_pot']
-    })
+    join_room(LOBBY_CHANNEL)
+    emit('lobby_update', {'tables': rooms.lobby()})
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """客户端断开连接"""
     print(f'客户端断开: {request.sid}')
-    # 移除该客户端对应的玩家
-    for player in game_state['players']:
-        if player['sid'] == request.sid:
-            game_state['players'].remove(player)
-            # 广播玩家列表更新
-            socketio.emit('players_update', {
-                'players': game_state['players']
-            })
-            break
+    leave_table(request.sid)
+
+@socketio.on('list_tables')
+def handle_list_tables():
+    """获取牌桌列表"""
+    emit('lobby_update', {'tables': rooms.lobby()})
+
+@socketio.on('resync')
+def handle_resync():
+    """客户端发现消息序号不连续时请求完整状态"""
+    room = current_room()
+    if room is None:
+        return
+    with room.lock:
+        # 漏收的可能是开局消息，因此与重连一样补发当前局的卡片
+        send_full_state(room)
+
+def seat_token_matches(player, token):
+    """客户端提供的座位令牌是否属于该座位"""
+    return isinstance(token, str) and hmac.compare_digest(player['token'], token)
 
 @socketio.on('join_game')
 def handle_join_game(data):
-    """玩家加入游戏"""
+    """玩家加入牌桌（table_id 为空时加入默认牌桌）"""
     player_name = data.get('name', '').strip()
+    table_id = normalize_table_id(data.get('table_id'))
 
     if not player_name:
         emit('error', {'message': '请输入姓名'})
         return
 
-    # 检查是否已满4人
-    if len(game_state['players']) >= 4:
-        emit('error', {'message': '游戏已满4人'})
+    if table_id is None:
+        emit('error', {'message': '牌桌号过长'})
         return
 
-    # 检查姓名是否重复
-    if any(p['name'] == player_name for p in game_state['players']):
-        emit('error', {'message': '姓名已被使用'})
-        return
-
-    # 添加玩家
-    player = {
-        'name': player_name,
-        'sid': request.sid,
-        'role_index': None
-    }
-    game_state['players'].append(player)
-
-    print(f'玩家加入: {player_name} ({request.sid})')
-
-    # 广播玩家列表更新
-    socketio.emit('players_update', {
-        'players': game_state['players']
-    })
+    with rooms.lock:
+        if rooms.room_of(request.sid) is not None:
+            emit('error', {'message': '你已加入牌桌'})
+            return
+
+        room = rooms.get_or_create(table_id)
+        with room.lock:
+            existing = room.find_player_by_name(player_name)
+            if existing is not None and existing['sid'] is None and seat_token_matches(existing, data.get('token')):
+                # 断线（或服务器重启后恢复）的座位：必须持有座位令牌才能回到原座位，只凭姓名视为重名
+                room.attach(existing, request.sid)
+                seat_connection(room, existing)
+                print(f'玩家回到座位: {player_name} ({request.sid}) -> 牌桌 {table_id}')
+                return
+
+            # 检查是否已满4人
+            if room.is_full:
+                emit('error', {'message': f'游戏已满{MAX_PLAYERS}人'})
+                return
+
+            # 检查姓名是否重复
+            if existing is not None:
+                emit('error', {'message': '姓名已被使用'})
+                return
+
+            # 添加玩家，先通知同桌其他人，再让新玩家进入牌桌并发送完整状态
+            player = commit(room, {
+                'type': 'join', 'name': player_name, 'sid': request.sid, 'token': new_seat_token()
+            })
+            broadcast_table(room, 'player_joined', {'player': room.public_player(player)})
+            seat_connection(room, player)
+
+    print(f'玩家加入: {player_name} ({request.sid}) -> 牌桌 {table_id}')
+    broadcast_lobby_table(room)
+
+@socketio.on('reclaim_seat')
+def handle_reclaim_seat(data):
+    """断线重连：凭座位令牌回到原座位"""
+    table_id = normalize_table_id(data.get('table_id'))
+    token = data.get('token')
+
+    with rooms.lock:
+        if rooms.room_of(request.sid) is not None:
+            emit('error', {'message': '你已加入牌桌'})
+            return
+
+        room = rooms.get(table_id) if table_id is not None else None
+        if room is None or not token:
+            emit('reclaim_failed', {'message': '座位已失效，请重新加入'})
+            return
+
+        with room.lock:
+            player = room.find_player_by_token(token)
+            if player is None:
+                emit('reclaim_failed', {'message': '座位已失效，请重新加入'})
+                return
+            if player['sid'] is not None:
+                # 服务器还没发现旧连接断开：由新连接接管座位
+                rooms.unbind(player['sid'])
+                leave_room(room.channel, sid=player['sid'])
+            room.attach(player, request.sid)
+            seat_connection(room, player)
+
+    print(f'玩家重连: {player["name"]} ({request.sid}) -> 牌桌 {table_id}')
 
 @socketio.on('select_role')
 def handle_select_role(data):
     """玩家选择角色"""
     role_index = data.get('role_index')
 
-    # 查找该客户端对应的玩家
-    player = next((p for p in game_state['players'] if p['sid'] == request.sid), None)
-    if not player:
-        emit('error', {'message': '请先输入姓名'})
+    room = current_room()
+    if room is None:
         return
 
-    # 检查角色是否已被选择
-    if any(p['role_index'] == role_index and p['sid'] != request.sid for p in game_state['players']):
-        emit('error', {'message': '该角色已被选择'})
+    if role_index not in range(MAX_PLAYERS):
+        emit('error', {'message': '无效的角色'})
         return
 
-    # 设置角色
-    player['role_index'] = role_index
-
-    print(f'玩家选择角色: {player["name"]} -> 角色{role_index}')
-
-    # 广播角色选择更新
-    socketio.emit('players_update', {
-        'players': game_state['players']
-    })
-
-    # 检查是否所有玩家都已选择角色
-    if len(game_state['players']) == 4 and all(p['role_index'] is not None for p in game_state['players']):
-        # 生成卡片
-        if not game_state['all_cards_generated']:
-            game_state['cards'] = generate_all_cards()
-            game_state['all_cards_generated'] = True
-            print('已生成8局卡片')
-
-        # 通知所有客户端可以开始游戏
-        socketio.emit('ready_to_start', {
-            'message': '所有玩家已准备完毕，请选择局数开始游戏'
-        })
+    with room.lock:
+        # 查找该客户端对应的玩家
+        player = room.find_player(request.sid)
+        if not player:
+            emit('error', {'message': '请先输入姓名'})
+            return
+
+        # 检查角色是否已被选择
+        if room.role_taken(role_index, request.sid):
+            emit('error', {'message': '该角色已被选择'})
+            return
+
+        # 设置角色，只广播变化的座位
+        commit(room, {'type': 'select_role', 'name': player['name'], 'role_index': role_index})
+        broadcast_table(room, 'role_selected', {'name': player['name'], 'role_index': role_index})
+
+        print(f'玩家选择角色: {player["name"]} -> 角色{role_index} (牌桌 {room.table_id})')
+
+        # 检查是否所有玩家都已选择角色
+        if room.all_roles_selected():
+            # 生成卡片（卡片写入事件日志，重启后恢复同一副牌）
+            if not room.all_cards_generated:
+                commit(room, {'type': 'deal', 'cards': generate_all_cards()})
+                print(f'已生成8局卡片 (牌桌 {room.table_id})')
+
+            # 通知同桌所有客户端可以开始游戏
+            broadcast_table(room, 'ready_to_start', {
+                'message': '所有玩家已准备完毕，请选择局数开始游戏'
+            })
 
 @socketio.on('start_round')
 def handle_start_round(data):
     """开始某一局"""
     round_name = data.get('round')
 
+    room = current_room()
+    if room is None:
+        return
+
     if round_name not in ROUNDS:
         emit('error', {'message': '无效的局数'})
         return
 
-    game_state['game_started'] = True
-    game_state['current_round'] = round_name
+    with room.lock:
+        if not room.all_cards_generated:
+            emit('error', {'message': '还有玩家未选择角色'})
+            return
 
-    # 按照 role_index 排序玩家
-    sorted_players = sorted(game_state['players'], key=lambda p: p['role_index'])
-
-    # 获取该局的卡片
-    round_cards = game_state['cards'][round_name]
+        commit(room, {'type': 'start_round', 'round': round_name})
 
-    print(f'开始游戏: {round_name}')
+        print(f'开始游戏: {round_name} (牌桌 {room.table_id})')
 
-    # 广播游戏开始
-    socketio.emit('game_started', {
-        'round': round_name,
-        'players': sorted_players,
-        'cards': round_cards,
-        'scores': game_state['scores'],
-        'field_pot': game_state['field_pot'],
-        'game_hash': get_game_hash()
-    })
+        # 广播游戏开始（每局一次，包含该局卡片和完整分数）
+        broadcast_table(room, 'game_started', round_payload(room))
+    broadcast_lobby_table(room)
 
 @socketio.on('update_scores')
 def handle_update_scores(data):
     """更新分数"""
     adjustments = data.get('adjustments', {})
 
+    room = current_room()
+    if room is None:
+        return
+
     # 验证总和为0
     total = sum(adjustments.values())
     if total != 0:
         emit('error', {'message': f'点数变动总和必须为0，当前为{total}'})
         return
 
-    # 应用分数变动
-    for key, adjustment in adjustments.items():
-        if key == 'field_pot':
-            game_state['field_pot'] += adjustment
-        else:
-            # key是role_index的字符串形式，转换为整数
-            role_index = int(key)
-            if role_index in game_state['scores']:
-                game_state['scores'][role_index] += adjustment
-
-    print(f'分数更新: {adjustments}')
+    with room.lock:
+        # 应用分数变动，只广播变化的座位
+        delta = commit(room, {'type': 'update_scores', 'adjustments': adjustments})
+        broadcast_table(room, 'scores_delta', delta)
 
-    # 广播分数更新
-    socketio.emit('scores_update', {
-        'scores': game_state['scores'],
-        'field_pot': game_state['field_pot']
-    })
+    print(f'分数更新: {adjustments} (牌桌 {room.table_id})')
 
 @socketio.on('reset_game')
 def handle_reset_game():
-    """重置游戏"""
-    game_state['players'] = []
-    game_state['game_started'] = False
-    game_state['current_round'] = None
-    game_state['cards'] = {}
-    game_state['scores'] = {0: INITIAL_SCORE, 1: INITIAL_SCORE, 2: INITIAL_SCORE, 3: INITIAL_SCORE}
-    game_state['field_pot'] = 0
-    game_state['all_cards_generated'] = False
+    """重置当前牌桌（同桌玩家全部回到大厅）"""
+    room = current_room()
+    if room is None:
+        return
+
+    with rooms.lock, room.lock:
+        # 广播重置
+        broadcast_table(room, 'game_reset', {})
+
+        for player in room.players:
+            if player['sid'] is None:
+                continue
+            rooms.unbind(player['sid'])
+            leave_room(room.channel, sid=player['sid'])
+            join_room(LOBBY_CHANNEL, sid=player['sid'])
+        commit(room, {'type': 'reset'})
+        discard_table(room)
+
+    print(f'游戏已重置 (牌桌 {room.table_id})')
+    broadcast_lobby_table(None, room.table_id)
 
-    print('游戏已重置')
+def parse_args():
+    parser = argparse.ArgumentParser(description='Indian Poker 实时多人服务器')
+    parser.add_argument('--host', default='0.0.0.0', help='监听地址（默认 0.0.0.0）')
+    parser.add_argument('--port', type=int, default=5001, help='监听端口（默认 5001）')
+    parser.add_argument('--debug', action='store_true', help='开启调试模式（自动重载，仅用于开发）')
+    return parser.parse_args()
 
-    # 广播重置
-    socketio.emit('game_reset', {})
 
 if __name__ == '__main__':
+    args = parse_args()
     print('=' * 60)
     print('🎴 Indian Poker 实时多人服务器')
     print('=' * 60)
-    print('服务器启动中...')
-    print('访问地址: http://localhost:5001')
+    print(f'服务器启动中... (异步模式: {socketio.async_mode})')
+    print(f'访问地址: http://localhost:{args.port}')
     print('按 Ctrl+C 停止服务器')
     print('=' * 60)
-    socketio.run(app, host='0.0.0.0', port=5001, debug=True, allow_unsafe_werkzeug=True)
+    # eventlet/gevent 模式使用各自的生产级WSGI服务器；threading 模式使用 Werkzeug
+    socketio.run(app, host=args.host, port=args.port, debug=args.debug,
+                 allow_unsafe_werkzeug=(socketio.async_mode == 'threading'))
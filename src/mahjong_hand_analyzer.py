@@ -1,11 +1,13 @@
 # -*- coding: utf-8 -*-
 """
 麻将手牌分析模块
-提供手牌追踪、向听数计算、听牌判断和手役检测功能
+提供手牌追踪、向听数计算、听牌判断（待牌/进张）、和了拆解与役/番/符计算功能
 """
 
-from typing import List, Tuple, Optional, Set, Dict, Any
+from typing import List, Tuple, Optional, Set, Dict, Any, Iterable, Union, FrozenSet
 from collections import Counter
+from functools import lru_cache
+from operator import itemgetter
 
 
 # ==================== 牌编码解码 ====================
@@ -58,8 +60,135 @@ def encode_tile(suit: str, rank: int) -> int:
     return 0
 
 
-def tiles_to_string(tiles: List[int]) -> str:
+# ==================== 34种牌张数数组 ====================
+
+# 34种类索引：0-8: 1-9万(m), 9-17: 1-9条(p), 18-26: 1-9筒(s), 27-33: 东南西北白发中(z)
+SUIT_OFFSET = {'m': 0, 'p': 9, 's': 18, 'z': 27}
+NO_TILE = 255  # 无效编码在索引表中的取值
+
+
+def _build_tile_index_table() -> bytes:
+    """预先计算 牌谱编码(0-59) → 34种类索引 的查找表，红5与普通5映射到同一索引"""
+    table = bytearray([NO_TILE] * 60)
+    for code in range(60):
+        suit, rank = decode_tile(code)
+        if suit in SUIT_OFFSET:
+            table[code] = SUIT_OFFSET[suit] + rank - 1
+    return bytes(table)
+
+
+def _build_index_tile_table() -> Tuple[int, ...]:
+    """34种类索引 → 牌谱编码（不含红宝牌）"""
+    codes = [0] * 34
+    for suit, offset in SUIT_OFFSET.items():
+        for rank in range(1, 8 if suit == 'z' else 10):
+            codes[offset + rank - 1] = encode_tile(suit, rank)
+    return tuple(codes)
+
+
+TILE_INDEX = _build_tile_index_table()
+INDEX_TILE = _build_index_tile_table()
+
+
+def tile_index(tile_num: int) -> int:
+    """将牌谱编码转换为34种类索引，无效编码返回 NO_TILE"""
+    if isinstance(tile_num, int) and 0 < tile_num < 60:
+        return TILE_INDEX[tile_num]
+    return NO_TILE
+
+
+class TileCounts:
+    """
+    手牌的34种牌张数表示（每种牌占1字节）
+
+    牌谱编码通过预先计算的 TILE_INDEX 查找表直接转换为索引，
+    不再经过 decode_tile 的 (suit, rank) 元组。分析函数均可直接接收该类型，
+    HandTracker 在摸打时增量维护，避免每次判断都重新解码整副手牌。
+    """
+
+    __slots__ = ('counts',)
+
+    def __init__(self, counts: Optional[Iterable[int]] = None):
+        self.counts = bytearray(counts) if counts is not None else bytearray(34)
+        if len(self.counts) != 34:
+            raise ValueError(f"TileCounts 需要34个元素，实际为 {len(self.counts)}")
+
+    @classmethod
+    def from_tiles(cls, tiles: Iterable[int]) -> 'TileCounts':
+        """从牌谱编码列表构建，忽略无效编码"""
+        counts = bytearray(34)
+        for t in tiles:
+            if isinstance(t, int) and 0 < t < 60:
+                idx = TILE_INDEX[t]
+                if idx != NO_TILE:
+                    counts[idx] += 1
+        return cls(counts)
+
+    def add(self, tile_num: int) -> bool:
+        """加入一张牌（牌谱编码），无效编码返回False"""
+        idx = tile_index(tile_num)
+        if idx == NO_TILE:
+            return False
+        self.counts[idx] += 1
+        return True
+
+    def remove(self, tile_num: int) -> bool:
+        """移除一张牌（牌谱编码），手中没有该牌时返回False"""
+        idx = tile_index(tile_num)
+        if idx == NO_TILE or self.counts[idx] == 0:
+            return False
+        self.counts[idx] -= 1
+        return True
+
+    def total(self) -> int:
+        """手牌总张数"""
+        return sum(self.counts)
+
+    def copy(self) -> 'TileCounts':
+        return TileCounts(self.counts)
+
+    def key(self) -> bytes:
+        """不可变的34字节表示，可用作字典键"""
+        return bytes(self.counts)
+
+    def to_tiles(self) -> List[int]:
+        """转换回牌谱编码列表（红宝牌按普通牌输出）"""
+        tiles = []
+        for idx, count in enumerate(self.counts):
+            tiles.extend([INDEX_TILE[idx]] * count)
+        return tiles
+
+    def __getitem__(self, idx: int) -> int:
+        return self.counts[idx]
+
+    def __iter__(self):
+        return iter(self.counts)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, TileCounts):
+            return NotImplemented
+        return self.counts == other.counts
+
+    __hash__ = None  # 可变对象，需要作为键时使用 key()
+
+    def __repr__(self) -> str:
+        return f"TileCounts({tiles_to_string(self)!r})"
+
+
+TileInput = Union[List[int], TileCounts]
+
+
+def as_tile_counts(tiles: TileInput) -> TileCounts:
+    """将牌谱编码列表或 TileCounts 统一转换为 TileCounts"""
+    if isinstance(tiles, TileCounts):
+        return tiles
+    return TileCounts.from_tiles(tiles)
+
+
+def tiles_to_string(tiles: TileInput) -> str:
     """将牌列表转换为可读字符串，用于调试"""
+    if isinstance(tiles, TileCounts):
+        tiles = tiles.to_tiles()
     decoded = [decode_tile(t) for t in tiles]
     result = []
     for suit_name, suit_char in [('m', '万'), ('p', '条'), ('s', '筒'), ('z', '字')]:
@@ -71,25 +200,23 @@ def tiles_to_string(tiles: List[int]) -> str:
 
 # ==================== 向听数计算 ====================
 
-def calculate_shanten(tiles: List[int]) -> int:
+def calculate_shanten(tiles: TileInput) -> int:
     """
     计算向听数（距离听牌还差几张）
+    tiles: 牌谱编码列表或 TileCounts
     返回: -1=和了, 0=听牌, 1=一向听, 2=二向听, ...
     """
-    if len(tiles) not in [13, 14]:
+    if not isinstance(tiles, TileCounts) and len(tiles) not in [13, 14]:
         return 99  # 非法手牌
 
-    # 解码牌
-    decoded = [decode_tile(t) for t in tiles]
-
-    # 过滤掉unknown牌
-    decoded = [(s, r) for s, r in decoded if s != 'unknown']
+    counts = as_tile_counts(tiles)
 
-    if len(decoded) not in [13, 14]:
+    # 过滤掉unknown牌后的张数
+    if counts.total() not in [13, 14]:
         return 99
 
-    # 转换为34牌编码（0-33）
-    tiles_34 = _convert_to_34_array(decoded)
+    # 34牌编码（0-33）
+    tiles_34 = counts.counts
 
     # 尝试标准型（4面子1雀头）
     standard_shanten = _calculate_standard_shanten_34(tiles_34)
@@ -126,133 +253,127 @@ def _convert_to_34_array(decoded: List[Tuple[str, int]]) -> List[int]:
     return tiles_34
 
 
-def _calculate_standard_shanten_34(tiles_34: List[int]) -> int:
+def _prune_partitions(results) -> FrozenSet[Tuple[int, int, int]]:
+    """去掉被支配的(面子数, 搭子数, 雀头)组合：雀头相同时，面子和搭子都不多于另一组合的舍去"""
+    best: List[Tuple[int, int, int]] = []
+    for r in sorted(results, key=lambda x: (-x[0], -x[1])):
+        if not any(b[2] == r[2] and b[0] >= r[0] and b[1] >= r[1] for b in best):
+            best.append(r)
+    return frozenset(best)
+
+
+@lru_cache(maxsize=65536)
+def _group_partitions(counts: bytes, honor: bool) -> FrozenSet[Tuple[int, int, int]]:
     """
-    计算标准型向听数（4面子1雀头）
-    使用递归算法，参考天凤向听数计算
-    """
-    def remove_mentsu(tiles: List[int]) -> Tuple[int, int, int]:
-        """移除所有面子，返回(面子数, 搭子数, 对子数)"""
-        mentsu_count = 0
-        tatsu_count = 0
-        pair_count = 0
-
-        result = _remove_mentsu_recursive(tiles[:], 0, mentsu_count, tatsu_count, pair_count)
-        return result
-
-    def _remove_mentsu_recursive(tiles: List[int], pos: int, mentsu: int, tatsu: int, pair: int) -> Tuple[int, int, int]:
-        """递归移除面子"""
-        # 跳过数量为0的牌
-        while pos < 34 and tiles[pos] == 0:
-            pos += 1
-
-        if pos >= 34:
-            return (mentsu, tatsu, pair)
-
-        results = []
-        current = tiles[pos]
-
-        # 尝试不取任何组合，直接跳过
-        results.append(_remove_mentsu_recursive(tiles, pos + 1, mentsu, tatsu, pair))
-
-        # 尝试取刻子
-        if current >= 3:
-            tiles[pos] -= 3
-            results.append(_remove_mentsu_recursive(tiles, pos, mentsu + 1, tatsu, pair))
-            tiles[pos] += 3
-
-        # 尝试取顺子（只能是数牌：0-8, 9-17, 18-26）
-        if pos % 9 <= 6 and pos < 27:  # 不能是字牌，且不能是8、9（无法组成顺子）
-            if tiles[pos] >= 1 and tiles[pos + 1] >= 1 and tiles[pos + 2] >= 1:
-                tiles[pos] -= 1
-                tiles[pos + 1] -= 1
-                tiles[pos + 2] -= 1
-                results.append(_remove_mentsu_recursive(tiles, pos, mentsu + 1, tatsu, pair))
-                tiles[pos] += 1
-                tiles[pos + 1] += 1
-                tiles[pos + 2] += 1
-
-        # 尝试取对子
-        if current >= 2:
-            tiles[pos] -= 2
-            results.append(_remove_mentsu_recursive(tiles, pos + 1, mentsu, tatsu, pair + 1))
-            tiles[pos] += 2
-
-        # 尝试取搭子（两张的组合）
-        # 对子搭子
-        if current >= 2:
-            tiles[pos] -= 2
-            results.append(_remove_mentsu_recursive(tiles, pos + 1, mentsu, tatsu + 1, pair))
-            tiles[pos] += 2
-
-        # 两面/嵌张搭子（只能是数牌）
-        if pos % 9 <= 7 and pos < 27:
-            if tiles[pos] >= 1 and tiles[pos + 1] >= 1:
-                tiles[pos] -= 1
-                tiles[pos + 1] -= 1
-                results.append(_remove_mentsu_recursive(tiles, pos, mentsu, tatsu + 1, pair))
-                tiles[pos] += 1
-                tiles[pos + 1] += 1
-
-        if pos % 9 <= 6 and pos < 27:
-            if tiles[pos] >= 1 and tiles[pos + 2] >= 1:
-                tiles[pos] -= 1
-                tiles[pos + 2] -= 1
-                results.append(_remove_mentsu_recursive(tiles, pos, mentsu, tatsu + 1, pair))
-                tiles[pos] += 1
-                tiles[pos + 2] += 1
-
-        # 返回最优结果（面子数最多，搭子数次之，对子数再次）
-        return max(results, key=lambda x: (x[0], x[1], x[2]))
-
-    # 计算最优组合
-    best_mentsu, best_tatsu, best_pair = remove_mentsu(tiles_34)
-
-    # 计算向听数
-    # 有雀头的情况
-    if best_pair > 0:
-        shanten_with_pair = 8 - best_mentsu * 2 - best_tatsu - 1
-    else:
-        shanten_with_pair = 99
+    单一花色（或字牌）内所有可能的(面子数, 搭子数, 雀头)拆分
+    按花色记忆化：同一花色的牌型在整个牌谱库中反复出现，只需计算一次
+    """
+    n = len(counts)
+    i = 0
+    while i < n and counts[i] == 0:
+        i += 1
+    if i == n:
+        return frozenset([(0, 0, 0)])
+
+    c = list(counts)
+    results = set()
+
+    def take(indices, dm, dt, dp):
+        for k in indices:
+            c[k] -= 1
+        for m, t, p in _group_partitions(bytes(c), honor):
+            if p + dp <= 1:
+                results.add((m + dm, t + dt, p + dp))
+        for k in indices:
+            c[k] += 1
+
+    # 孤张
+    take((i,), 0, 0, 0)
+    # 刻子
+    if c[i] >= 3:
+        take((i, i, i), 1, 0, 0)
+    # 对子（作为雀头或搭子）
+    if c[i] >= 2:
+        take((i, i), 0, 0, 1)
+        take((i, i), 0, 1, 0)
+    # 顺子和两面/边张/嵌张搭子（只能是数牌）
+    if not honor:
+        if i + 2 < n and c[i + 1] and c[i + 2]:
+            take((i, i + 1, i + 2), 1, 0, 0)
+        if i + 1 < n and c[i + 1]:
+            take((i, i + 1), 0, 1, 0)
+        if i + 2 < n and c[i + 2]:
+            take((i, i + 2), 0, 1, 0)
+
+    return _prune_partitions(results)
+
+
+# 34种类索引中的花色分组：(起始, 结束, 是否字牌)
+SUIT_GROUPS = ((0, 9, False), (9, 18, False), (18, 27, False), (27, 34, True))
+
+_EMPTY_PARTITIONS = frozenset([(0, 0, 0)])
+
+
+@lru_cache(maxsize=65536)
+def _combine_partitions(a: FrozenSet[Tuple[int, int, int]],
+                        b: FrozenSet[Tuple[int, int, int]]) -> FrozenSet[Tuple[int, int, int]]:
+    """合并两组拆分结果（最多一个雀头）"""
+    return _prune_partitions(
+        (m1 + m2, t1 + t2, p1 + p2)
+        for m1, t1, p1 in a
+        for m2, t2, p2 in b
+        if p1 + p2 <= 1
+    )
+
+
+def _suit_partitions(tiles_34) -> List[FrozenSet[Tuple[int, int, int]]]:
+    """按 SUIT_GROUPS 顺序返回各花色的拆分结果"""
+    return [
+        _group_partitions(bytes(tiles_34[start:end]), honor)
+        for start, end, honor in SUIT_GROUPS
+    ]
 
-    # 无雀头的情况
-    shanten_no_pair = 8 - best_mentsu * 2 - best_tatsu
 
-    return min(shanten_with_pair, shanten_no_pair)
+@lru_cache(maxsize=65536)
+def _shanten_from_partitions(combined: FrozenSet[Tuple[int, int, int]], melds: int) -> int:
+    """由合并后的拆分结果计算标准型向听数，melds 为副露（已完成）的面子数"""
+    best = 8
+    for mentsu, tatsu, pair in combined:
+        mentsu = min(mentsu + melds, 4)
+        shanten = 8 - 2 * mentsu - min(tatsu, 4 - mentsu) - pair
+        best = min(best, shanten)
+    return best
+
+
+def _calculate_standard_shanten_34(tiles_34) -> int:
+    """
+    计算标准型向听数（4面子1雀头）
+    各花色的拆分结果单独记忆化后再合并，向听数 = 8 - 2×面子 - 搭子 - 雀头（面子+搭子不超过4）
+    副露后的手牌（3n+1/3n+2张）按缺少的面子数计入已完成面子
+    """
+    combined = _EMPTY_PARTITIONS
+    for group in _suit_partitions(tiles_34):
+        combined = _combine_partitions(combined, group)
+    return _shanten_from_partitions(combined, 4 - sum(tiles_34) // 3)
 
 
 def _calculate_pairs_shanten_34(tiles_34: List[int]) -> int:
     """
     计算七对子向听数
 
-    七对子听牌形态：6个对子（每个恰好2张）+ 1个单张
-    如果手牌中有暗刻（3张），虽然算作1个对子，但会产生多余的牌，
-    这些多余的牌需要额外的巡目来处理。
+    七对子需要7种不同的对子：向听数 = 6 - 对子数 + max(0, 7 - 种类数)
+    暗刻/杠子只能算作1个对子，多余的牌需要额外的巡目来处理。
     """
-    pairs = 0  # 对子数
-    triples = 0  # 暗刻数（count=3）
+    pairs = 0  # 对子数（>=2张的种类）
+    kinds = 0  # 种类数（>=1张的种类）
 
     for count in tiles_34:
-        if count >= 4:
-            # 如果有任何一种牌>=4张，不可能做七对子
-            return 99
-        elif count == 3:
-            pairs += 1
-            triples += 1
-        elif count == 2:
+        if count >= 1:
+            kinds += 1
+        if count >= 2:
             pairs += 1
 
-    # 基础向听数 = 6 - 对子数
-    shanten = 6 - pairs
-
-    # 如果有多个暗刻，每多1个暗刻就多1张需要处理的多余牌
-    # 七对子听牌允许1张单张（可以是1个暗刻的多余牌）
-    # 但如果有2个或更多暗刻，就有2张或更多多余的牌，需要额外处理
-    if triples >= 2:
-        # 每多1个暗刻（超过1个），向听数+1
-        shanten += (triples - 1)
-
-    return shanten
+    return 6 - pairs + max(0, 7 - kinds)
 
 
 def _calculate_kokushi_shanten_34(tiles_34: List[int]) -> int:
@@ -275,155 +396,673 @@ def _calculate_kokushi_shanten_34(tiles_34: List[int]) -> int:
     return shanten
 
 
-def is_tenpai(tiles: List[int]) -> bool:
+def is_tenpai(tiles: TileInput) -> bool:
     """判断是否听牌"""
     return calculate_shanten(tiles) == 0
 
 
+# ==================== 听牌（待牌）与进张 ====================
+
+# 幺九牌索引（国士无双相关）
+YAOCHU_INDICES = (0, 8, 9, 17, 18, 26, 27, 28, 29, 30, 31, 32, 33)
+_yaochu_counts = itemgetter(*YAOCHU_INDICES)
+
+
+def _shanten_34(tiles_34) -> int:
+    """
+    任意张数（3n+1 / 3n+2）手牌的向听数，副露后的手牌只计算标准型
+    HandTracker 每次打牌后都会调用，因此直接在 bytes 上计算，避免逐张循环
+    """
+    key = bytes(tiles_34)
+    total = sum(key)
+    combined = _EMPTY_PARTITIONS
+    for start, end, honor in SUIT_GROUPS:
+        combined = _combine_partitions(combined, _group_partitions(key[start:end], honor))
+    shanten = _shanten_from_partitions(combined, 4 - total // 3)
+
+    if total >= 13:
+        # 七对子：对子数 = 34 - 0张种类 - 1张种类
+        zeros = key.count(0)
+        pairs = 34 - zeros - key.count(1)
+        shanten = min(shanten, 6 - pairs + max(0, zeros - 27))
+        # 国士：幺九种类数最多13，向听数不可能低于 13 - 种类数 - 1
+        yaochu = _yaochu_counts(key)
+        yaochu_kinds = 13 - yaochu.count(0)
+        if 12 - yaochu_kinds < shanten:
+            has_pair = yaochu_kinds > yaochu.count(1)
+            shanten = min(shanten, 13 - yaochu_kinds - (1 if has_pair else 0))
+    return shanten
+
+
+def _candidate_indices(tiles_34) -> List[int]:
+    """
+    可能有效的进张：同花色距离手牌2以内的数牌、手中已有的字牌、以及幺九牌（国士）
+    其余的牌不可能降低向听数，无需逐一计算
+    """
+    candidates = set()
+    for start, end, honor in SUIT_GROUPS:
+        for idx in range(start, end):
+            if tiles_34[idx] == 0:
+                continue
+            if honor:
+                candidates.add(idx)
+            else:
+                for near in range(max(start, idx - 2), min(end, idx + 3)):
+                    candidates.add(near)
+    if sum(tiles_34) >= 13:
+        candidates.update(YAOCHU_INDICES)
+    return sorted(candidates)
+
+
+def _closed_shape_counts(tiles_34) -> Tuple[int, int, int, bool]:
+    """七对子/国士所需的计数：(对子数, 种类数, 幺九种类数, 幺九是否有对子)"""
+    pairs = sum(1 for c in tiles_34 if c >= 2)
+    kinds = sum(1 for c in tiles_34 if c >= 1)
+    yaochu_kinds = sum(1 for idx in YAOCHU_INDICES if tiles_34[idx] >= 1)
+    yaochu_pair = any(tiles_34[idx] >= 2 for idx in YAOCHU_INDICES)
+    return pairs, kinds, yaochu_kinds, yaochu_pair
+
+
+def _closed_shanten_after_draw(tiles_34, idx: int, base: Tuple[int, int, int, bool]) -> int:
+    """
+    摸入 idx 后的七对子/国士向听数（取较小值），由 _closed_shape_counts 的结果增量计算
+    与 _calculate_pairs_shanten_34 / _calculate_kokushi_shanten_34 的定义一致
+    """
+    pairs, kinds, yaochu_kinds, yaochu_pair = base
+    count = tiles_34[idx]
+    if count == 0:
+        kinds += 1
+    elif count == 1:
+        pairs += 1
+    pairs_shanten = 6 - pairs + max(0, 7 - kinds)
+
+    if idx in YAOCHU_INDICES:
+        if count == 0:
+            yaochu_kinds += 1
+        elif count == 1:
+            yaochu_pair = True
+    kokushi_shanten = 13 - yaochu_kinds - (1 if yaochu_pair else 0)
+    return min(pairs_shanten, kokushi_shanten)
+
+
+def _effective_indices(tiles_34: bytearray) -> Tuple[int, List[int]]:
+    """
+    返回(当前向听数, 能降低向听数的牌的索引列表)
+    听牌时降低向听数即和了，因此列表就是待牌
+
+    进张只改变一个花色，其余三个花色的合并结果对同一花色的所有候选牌复用
+    """
+    total = sum(tiles_34)
+    current = _shanten_34(tiles_34)
+    closed = total + 1 >= 13
+    melds = 4 - (total + 1) // 3
+    suits = _suit_partitions(tiles_34)
+    closed_base = _closed_shape_counts(tiles_34) if closed else None
+    if closed_base is not None:
+        # 七对子/国士每摸一张最多前进一步，当前就不比标准型更好时无需再检查
+        pairs, kinds, yaochu_kinds, yaochu_pair = closed_base
+        closed_current = min(6 - pairs + max(0, 7 - kinds),
+                             13 - yaochu_kinds - (1 if yaochu_pair else 0))
+        if closed_current > current:
+            closed = False
+
+    candidates = _candidate_indices(tiles_34)
+    effective = []
+    for g, (start, end, honor) in enumerate(SUIT_GROUPS):
+        rest = None
+        for idx in candidates:
+            if idx < start or idx >= end or tiles_34[idx] >= 4:
+                continue
+            if rest is None:
+                rest = _EMPTY_PARTITIONS
+                for other, group in enumerate(suits):
+                    if other != g:
+                        rest = _combine_partitions(rest, group)
+            tiles_34[idx] += 1
+            group = _group_partitions(bytes(tiles_34[start:end]), honor)
+            shanten = _shanten_from_partitions(_combine_partitions(rest, group), melds)
+            tiles_34[idx] -= 1
+            if closed and shanten >= current:
+                shanten = min(shanten, _closed_shanten_after_draw(tiles_34, idx, closed_base))
+            if shanten < current:
+                effective.append(idx)
+    return current, effective
+
+
+def waits(hand: TileInput) -> List[int]:
+    """
+    计算听牌手牌的待牌
+
+    参数:
+    - hand: 3n+1张手牌（牌谱编码列表或 TileCounts），副露后的手牌同样适用
+
+    返回: 和了牌的牌谱编码列表（不含红宝牌，手中已有4张的牌不计入）；未听牌返回空列表
+    """
+    tiles_34 = bytearray(as_tile_counts(hand).counts)
+    if sum(tiles_34) % 3 != 1:
+        return []
+    shanten, effective = _effective_indices(tiles_34)
+    if shanten != 0:
+        return []
+    return [INDEX_TILE[idx] for idx in effective]
+
+
+def ukeire(hand: TileInput, visible_tiles: Optional[TileInput] = None) -> Dict[int, int]:
+    """
+    计算进张（听牌时即待牌）及剩余张数
+
+    参数:
+    - hand: 3n+1张手牌（牌谱编码列表或 TileCounts）
+    - visible_tiles: 手牌以外已经可见的牌（牌河、副露、宝牌指示牌等），用于扣除剩余张数
+
+    返回: {牌谱编码: 剩余张数}，按34种类顺序排列；张数不合法时返回空字典
+    """
+    tiles_34 = bytearray(as_tile_counts(hand).counts)
+    if sum(tiles_34) % 3 != 1:
+        return {}
+    visible = as_tile_counts(visible_tiles).counts if visible_tiles is not None else bytes(34)
+
+    _, effective = _effective_indices(tiles_34)
+    return {
+        INDEX_TILE[idx]: max(0, 4 - tiles_34[idx] - visible[idx])
+        for idx in effective
+    }
+
+
 # ==================== 手役检测 ====================
 
-def detect_yaku(tiles: List[int], furo_groups: List = None, is_riichi: bool = False,
-                seat_wind: int = 1, prevalent_wind: int = 1) -> List[str]:
+# ==================== 和了拆解与役/番/符计算 ====================
+
+# 面子种类
+SHUNTSU = 'shuntsu'  # 顺子
+KOUTSU = 'koutsu'    # 刻子（含杠子）
+
+YAOCHU_SET = frozenset(YAOCHU_INDICES)
+WIND_INDICES = (27, 28, 29, 30)
+DRAGON_INDICES = (31, 32, 33)
+GREEN_INDICES = frozenset((10, 11, 12, 14, 16, 32))  # 2/3/4/6/8条 + 发
+DRAGON_YAKU = {31: "White Dragon", 32: "Green Dragon", 33: "Red Dragon"}
+
+NINE_GATES_SHAPE = (3, 1, 1, 1, 1, 1, 1, 1, 3)  # 九莲宝灯的基本形（另加同花色任意一张）
+
+# 役满（每个计13番）
+YAKUMAN_HAN = 13
+
+
+@lru_cache(maxsize=65536)
+def _suit_decompositions(counts: bytes, honor: bool) -> Tuple[Tuple[int, Tuple[Tuple[str, int], ...]], ...]:
     """
-    检测手牌中可能的手役（不考虑宝牌、一发、里宝等）
+    单一花色内的完整拆解：全部牌组成面子，最多一个雀头
+    返回 ((雀头相对索引或-1, ((种类, 相对起始索引), ...)), ...)；无法完整拆解时返回空元组
+    """
+    n = len(counts)
+    i = 0
+    while i < n and counts[i] == 0:
+        i += 1
+    if i == n:
+        return ((-1, ()),)
+
+    c = bytearray(counts)
+    results = []
+
+    def take(indices, meld, pair):
+        for k in indices:
+            c[k] -= 1
+        for sub_pair, sub_melds in _suit_decompositions(bytes(c), honor):
+            if pair >= 0 and sub_pair >= 0:
+                continue
+            melds = (meld,) + sub_melds if meld else sub_melds
+            results.append((pair if pair >= 0 else sub_pair, melds))
+        for k in indices:
+            c[k] += 1
+
+    # 第一张牌只能属于刻子、雀头或以它开头的顺子
+    if c[i] >= 3:
+        take((i, i, i), (KOUTSU, i), -1)
+    if c[i] >= 2:
+        take((i, i), None, i)
+    if not honor and i + 2 < n and c[i + 1] and c[i + 2]:
+        take((i, i + 1, i + 2), (SHUNTSU, i), -1)
+
+    return tuple(results)
+
+
+def decompose_agari(tiles: TileInput) -> List[Tuple[int, Tuple[Tuple[str, int], ...]]]:
+    """
+    枚举和了形（3n+2张，不含副露）的所有标准型拆解
+
+    返回: [(雀头索引, ((面子种类, 34种类起始索引), ...)), ...]；不是标准型和了时返回空列表
+    七对子、国士无双不在此列，由 evaluate_agari 单独判断
+    """
+    key = bytes(as_tile_counts(tiles).counts)
+    if sum(key) % 3 != 2:
+        return []
+
+    combos = [(-1, ())]
+    for start, end, honor in SUIT_GROUPS:
+        suit = _suit_decompositions(key[start:end], honor)
+        if not suit:
+            return []
+        combos = [
+            (pair if pair >= 0 else (sub_pair + start if sub_pair >= 0 else -1),
+             melds + tuple((kind, idx + start) for kind, idx in sub_melds))
+            for pair, melds in combos
+            for sub_pair, sub_melds in suit
+            if pair < 0 or sub_pair < 0
+        ]
+    return [(pair, melds) for pair, melds in combos if pair >= 0]
+
+
+def _furo_melds(furo_groups: List) -> List[Tuple[str, int, bool, bool]]:
+    """
+    副露组转换为面子：[(种类, 起始索引, 是否副露, 是否杠子), ...]
+    暗杠（'a'）不算副露
+    """
+    melds = []
+    for group in furo_groups or []:
+        indices = sorted(tile_index(t) for t in group.get('tiles', []))
+        indices = [idx for idx in indices if idx != NO_TILE]
+        if len(indices) < 3:
+            continue
+        is_open = group.get('type') != 'a'
+        if indices[0] == indices[-1]:
+            melds.append((KOUTSU, indices[0], is_open, len(indices) >= 4))
+        else:
+            melds.append((SHUNTSU, indices[0], is_open, False))
+    return melds
+
+
+def _is_menzen(furo_groups: List) -> bool:
+    """是否门清（暗杠不破坏门清）"""
+    return all(group.get('type') == 'a' for group in furo_groups or [])
+
+
+def _wait_patterns(pair: int, melds: Tuple[Tuple[str, int], ...], win: int) -> Set[Tuple[str, int]]:
+    """
+    和了牌在某一拆解中可能的位置：{(听牌形, 所在面子序号或-1), ...}
+    听牌形: tanki(单骑) / shanpon(双碰) / kanchan(嵌张) / penchan(边张) / ryanmen(两面)
+    """
+    patterns = set()
+    if pair == win:
+        patterns.add(('tanki', -1))
+    for n, (kind, start) in enumerate(melds):
+        if kind == KOUTSU:
+            if start == win:
+                patterns.add(('shanpon', n))
+        elif start <= win <= start + 2:
+            pos = win - start
+            if pos == 1:
+                patterns.add(('kanchan', n))
+            elif (pos == 0 and start % 9 == 6) or (pos == 2 and start % 9 == 0):
+                patterns.add(('penchan', n))
+            else:
+                patterns.add(('ryanmen', n))
+    return patterns
+
+
+def _yakuhai_count(idx: int, seat_wind: int, prevalent_wind: int) -> int:
+    """役牌的数量（连风牌为2）"""
+    count = 1 if idx in DRAGON_INDICES else 0
+    if idx == 27 + seat_wind - 1:
+        count += 1
+    if idx == 27 + prevalent_wind - 1:
+        count += 1
+    return count
+
+
+def _score_standard(tiles_34, pair: int, melds: List[Tuple[str, int, bool, bool]],
+                    wait: str, is_menzen: bool, is_tsumo: bool, is_riichi: bool,
+                    seat_wind: int, prevalent_wind: int) -> Tuple[List[Tuple[str, int]], int]:
+    """
+    计算一种标准型拆解的役和符
+    melds: 全部4个面子 (种类, 起始索引, 是否明面子, 是否杠子)，双碰荣和的刻子已按明刻处理
+    返回 (役列表[(役名, 番数)], 符数)
+    """
+    shuntsu = [start for kind, start, _, _ in melds if kind == SHUNTSU]
+    koutsu = [start for kind, start, _, _ in melds if kind == KOUTSU]
+    ankou = sum(1 for kind, _, is_open, _ in melds if kind == KOUTSU and not is_open)
+    kans = sum(1 for _, _, _, is_kan in melds if is_kan)
+    used = [idx for idx in range(34) if tiles_34[idx]]
+    suits = {idx // 9 for idx in used if idx < 27}
+    has_honor = any(idx >= 27 for idx in used)
+
+    # 役满
+    yakuman = []
+    if ankou == 4:
+        yakuman.append("Four Concealed Triplets")
+    if all(idx in koutsu for idx in DRAGON_INDICES):
+        yakuman.append("Big Three Dragons")
+    wind_koutsu = sum(1 for idx in WIND_INDICES if idx in koutsu)
+    if wind_koutsu == 4:
+        yakuman.append("Big Four Winds")
+    elif wind_koutsu == 3 and pair in WIND_INDICES:
+        yakuman.append("Little Four Winds")
+    if all(idx >= 27 for idx in used):
+        yakuman.append("All Honors")
+    if all(idx in YAOCHU_SET and idx < 27 for idx in used):
+        yakuman.append("All Terminals")
+    if all(idx in GREEN_INDICES for idx in used):
+        yakuman.append("All Green")
+    if kans == 4:
+        yakuman.append("Four Kans")
+    if is_menzen and kans == 0 and len(suits) == 1 and not has_honor:
+        base = next(iter(suits)) * 9
+        if all(tiles_34[base + k] >= need for k, need in enumerate(NINE_GATES_SHAPE)):
+            yakuman.append("Nine Gates")
+    if yakuman:
+        return [(name, YAKUMAN_HAN) for name in yakuman], 0
+
+    yaku = []
+    if is_riichi:
+        yaku.append(("Riichi", 1))
+    if is_menzen and is_tsumo:
+        yaku.append(("Fully Concealed Hand", 1))
+
+    pair_fu = 2 * _yakuhai_count(pair, seat_wind, prevalent_wind)
+    pinfu = is_menzen and not koutsu and pair_fu == 0 and wait == 'ryanmen'
+    if pinfu:
+        yaku.append(("Pinfu", 1))
+
+    if is_menzen:
+        peiko = sum(shuntsu.count(start) // 2 for start in set(shuntsu))
+        if peiko == 2:
+            yaku.append(("Twice Pure Double Sequence", 3))
+        elif peiko == 1:
+            yaku.append(("Pure Double Sequence", 1))
+
+    if all(idx not in YAOCHU_SET for idx in used):
+        yaku.append(("All Simples", 1))
+
+    for idx in koutsu:
+        if idx in DRAGON_YAKU:
+            yaku.append((DRAGON_YAKU[idx], 1))
+        if idx == 27 + seat_wind - 1:
+            yaku.append(("Seat Wind", 1))
+        if idx == 27 + prevalent_wind - 1:
+            yaku.append(("Prevalent Wind", 1))
+
+    open_penalty = 0 if is_menzen else 1
+
+    # 全带幺九：每个面子和雀头都含幺九牌（需有顺子，否则为混老头）
+    if shuntsu and pair in YAOCHU_SET \
+            and all(start % 9 in (0, 6) for start in shuntsu) \
+            and all(idx in YAOCHU_SET for idx in koutsu):
+        if has_honor:
+            yaku.append(("Half Outside Hand", 2 - open_penalty))
+        else:
+            yaku.append(("Fully Outside Hand", 3 - open_penalty))
+    if not shuntsu and all(idx in YAOCHU_SET for idx in used):
+        yaku.append(("All Terminals and Honors", 2))
+
+    for base in (0, 9, 18):
+        if all(base + k in shuntsu for k in (0, 3, 6)):
+            yaku.append(("Pure Straight", 2 - open_penalty))
+            break
+
+    for rank in range(7):
+        if all(base + rank in shuntsu for base in (0, 9, 18)):
+            yaku.append(("Mixed Triple Sequence", 2 - open_penalty))
+            break
+    for rank in range(9):
+        if all(base + rank in koutsu for base in (0, 9, 18)):
+            yaku.append(("Three Color Triplets", 2))
+            break
+
+    if not shuntsu:
+        yaku.append(("All Triplets", 2))
+    if ankou == 3:
+        yaku.append(("Three Concealed Triplets", 2))
+    if kans == 3:
+        yaku.append(("Three Kans", 2))
+    if sum(1 for idx in DRAGON_INDICES if idx in koutsu) == 2 and pair in DRAGON_INDICES:
+        yaku.append(("Little Three Dragons", 2))
+
+    if len(suits) == 1:
+        if has_honor:
+            yaku.append(("Half Flush", 3 - open_penalty))
+        else:
+            yaku.append(("Full Flush", 6 - open_penalty))
+
+    # 符
+    if pinfu:
+        return yaku, 20 if is_tsumo else 30
+
+    fu = 20
+    if is_menzen and not is_tsumo:
+        fu += 10
+    if is_tsumo:
+        fu += 2
+    for kind, start, is_open, is_kan in melds:
+        if kind != KOUTSU:
+            continue
+        meld_fu = 2 if is_open else 4
+        if start in YAOCHU_SET:
+            meld_fu *= 2
+        if is_kan:
+            meld_fu *= 4
+        fu += meld_fu
+    fu += pair_fu
+    if wait in ('tanki', 'kanchan', 'penchan'):
+        fu += 2
+    if fu == 20:
+        fu = 30  # 副露平和形荣和
+    return yaku, (fu + 9) // 10 * 10
+
+
+def evaluate_agari(tiles: TileInput,
+                   win_tile: int,
+                   furo_groups: List = None,
+                   is_tsumo: bool = False,
+                   is_riichi: bool = False,
+                   seat_wind: int = 1,
+                   prevalent_wind: int = 1) -> Optional[Dict[str, Any]]:
+    """
+    计算和了的役、番、符（不含宝牌、一发、岭上、海底等和了时的偶然役）
 
     参数:
-    - tiles: 手牌（13张）
-    - furo_groups: 副露组（如果有）
+    - tiles: 和了时的手牌（不含副露，包含和了牌，3n+2张）
+    - win_tile: 和了牌
+    - furo_groups: 副露组（HandTracker.furo_groups 格式）
+    - is_tsumo: 是否自摸
     - is_riichi: 是否立直
-    - seat_wind: 自风 (1=东, 2=南, 3=西, 4=北)
-    - prevalent_wind: 场风 (1=东, 2=南, 3=西, 4=北)
 
-    返回: 可能的手役名称列表
+    返回: {'yaku': [(役名, 番数), ...], 'han': 番数, 'fu': 符数, 'yakuman': 是否役满}
+    不是和了形时返回None；和了形但无役时 yaku 为空、han 为0
+    所有拆解和和了牌位置中取番数最高（同番取符高）的解释
+    """
+    counts = as_tile_counts(tiles)
+    tiles_34 = counts.counts
+    win = tile_index(win_tile)
+    if win == NO_TILE or tiles_34[win] == 0:
+        return None
+
+    is_menzen = _is_menzen(furo_groups)
+    furo = _furo_melds(furo_groups)
+    full_34 = bytearray(tiles_34)
+    for kind, start, _, _ in furo:
+        for idx in ((start, start, start) if kind == KOUTSU else (start, start + 1, start + 2)):
+            full_34[idx] += 1
+
+    candidates = []
+
+    for pair, melds in decompose_agari(counts):
+        for wait, n in _wait_patterns(pair, melds, win):
+            closed = [
+                # 双碰荣和时，完成的刻子视为明刻
+                (kind, start, kind == KOUTSU and k == n and wait == 'shanpon' and not is_tsumo, False)
+                for k, (kind, start) in enumerate(melds)
+            ]
+            candidates.append(_score_standard(
+                full_34, pair, closed + furo, wait, is_menzen, is_tsumo, is_riichi,
+                seat_wind, prevalent_wind
+            ))
+
+    if is_menzen and not furo and sum(tiles_34) == 14:
+        # 七对子
+        if sum(1 for count in tiles_34 if count == 2) == 7:
+            used = [idx for idx in range(34) if tiles_34[idx]]
+            suits = {idx // 9 for idx in used if idx < 27}
+            has_honor = any(idx >= 27 for idx in used)
+            if all(idx >= 27 for idx in used):
+                candidates.append(([("All Honors", YAKUMAN_HAN)], 0))
+            else:
+                yaku = [("Seven Pairs", 2)]
+                if is_riichi:
+                    yaku.insert(0, ("Riichi", 1))
+                if is_tsumo:
+                    yaku.append(("Fully Concealed Hand", 1))
+                if all(idx not in YAOCHU_SET for idx in used):
+                    yaku.append(("All Simples", 1))
+                if all(idx in YAOCHU_SET for idx in used):
+                    yaku.append(("All Terminals and Honors", 2))
+                if len(suits) == 1:
+                    yaku.append(("Half Flush", 3) if has_honor else ("Full Flush", 6))
+                candidates.append((yaku, 25))
+        # 国士无双
+        if _calculate_kokushi_shanten_34(tiles_34) == -1:
+            candidates.append(([("Thirteen Orphans", YAKUMAN_HAN)], 0))
+
+    if not candidates:
+        return None
+
+    yaku, fu = max(candidates, key=lambda c: (sum(han for _, han in c[0]), c[1]))
+    han = sum(h for _, h in yaku)
+    return {
+        'yaku': yaku,
+        'han': han,
+        'fu': fu,
+        'yakuman': any(h >= YAKUMAN_HAN for _, h in yaku),
+    }
+
+
+def evaluate_waits(tiles: TileInput,
+                   furo_groups: List = None,
+                   is_riichi: bool = False,
+                   seat_wind: int = 1,
+                   prevalent_wind: int = 1) -> Dict[int, Optional[Dict[str, Any]]]:
+    """
+    听牌手牌对每张待牌荣和时的评估结果
+
+    返回: {待牌编码: evaluate_agari 的结果}；未听牌时返回空字典
+    """
+    counts = as_tile_counts(tiles)
+    results = {}
+    for tile in waits(counts):
+        hand = counts.copy()
+        hand.add(tile)
+        results[tile] = evaluate_agari(
+            hand, tile, furo_groups,
+            is_tsumo=False, is_riichi=is_riichi,
+            seat_wind=seat_wind, prevalent_wind=prevalent_wind
+        )
+    return results
+
+
+# 役判定缓存：所有 HandTracker 共享，同一手牌状态（手牌、副露、自风、场风）只评估一次
+YAKU_CACHE_SIZE = 16384
 
-    注意：这个函数检测的是在听牌状态下，如果和牌可能拥有的役
-    不包括：立直、一发、里宝、宝牌、岭上开花、抢杠、海底等和牌时才能确定的役
 
-    这里只检测"确定的役"，即无论听什么牌和了都一定有的役
+def _furo_signature(furo_groups: List) -> Tuple[Tuple[str, Tuple[int, ...]], ...]:
+    """副露组的不可变签名：((类型, (34种类索引, ...)), ...)，红5与普通5视为相同"""
+    signature = []
+    for group in furo_groups or []:
+        indices = sorted(tile_index(t) for t in group.get('tiles', []))
+        signature.append((group.get('type'), tuple(idx for idx in indices if idx != NO_TILE)))
+    return tuple(signature)
+
+
+@lru_cache(maxsize=YAKU_CACHE_SIZE)
+def _wait_yaku(key: bytes,
+               furo_signature: Tuple[Tuple[str, Tuple[int, ...]], ...],
+               seat_wind: int,
+               prevalent_wind: int) -> Tuple[Optional[Tuple[str, ...]], ...]:
+    """
+    各待牌荣和时的役名（不含立直），按待牌顺序排列
+    和了形不成立的待牌为None；未听牌时返回空元组
     """
-    if furo_groups is None:
-        furo_groups = []
+    furo_groups = [
+        {'type': furo_type, 'tiles': [INDEX_TILE[idx] for idx in indices]}
+        for furo_type, indices in furo_signature
+    ]
+    results = evaluate_waits(
+        TileCounts(key),
+        furo_groups,
+        seat_wind=seat_wind,
+        prevalent_wind=prevalent_wind
+    )
+    return tuple(
+        None if r is None else tuple(name for name, _ in r['yaku'])
+        for r in results.values()
+    )
 
-    yaku_list = []
 
-    # 如果有副露，不能是门清役
-    is_menzen = len(furo_groups) == 0
+def yaku_cache_info() -> Dict[str, int]:
+    """役判定缓存的统计：命中/未命中次数、当前条目数、上限"""
+    info = _wait_yaku.cache_info()
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'maxsize': info.maxsize,
+    }
 
-    # 转换为34编码
-    decoded = [decode_tile(t) for t in tiles if decode_tile(t)[0] != 'unknown']
-    tiles_34 = _convert_to_34_array(decoded)
 
-    # 统计各花色
-    m_tiles = [i for i in range(0, 9) if tiles_34[i] > 0]
-    p_tiles = [i for i in range(9, 18) if tiles_34[i] > 0]
-    s_tiles = [i for i in range(18, 27) if tiles_34[i] > 0]
-    z_tiles = [i for i in range(27, 34) if tiles_34[i] > 0]
+def clear_yaku_cache():
+    """清空役判定缓存（同时重置命中统计）"""
+    _wait_yaku.cache_clear()
 
-    has_m = len(m_tiles) > 0
-    has_p = len(p_tiles) > 0
-    has_s = len(s_tiles) > 0
-    has_z = len(z_tiles) > 0
 
-    num_suits = sum([has_m, has_p, has_s])
-    total_tiles = sum(tiles_34)
+def detect_yaku(tiles: TileInput, furo_groups: List = None, is_riichi: bool = False,
+                seat_wind: int = 1, prevalent_wind: int = 1) -> List[str]:
+    """
+    检测手牌中可能的手役（不考虑宝牌、一发、里宝等）
 
-    # === 检测确定的役种 ===
+    参数:
+    - tiles: 手牌（13张，牌谱编码列表或 TileCounts）
+    - furo_groups: 副露组（如果有）
+    - is_riichi: 是否立直
+    - seat_wind: 自风 (1=东, 2=南, 3=西, 4=北)
+    - prevalent_wind: 场风 (1=东, 2=南, 3=西, 4=北)
 
-    # 七对子（听牌时就能确定）
-    pairs = sum(1 for count in tiles_34 if count >= 2)
-    if pairs == 6 and total_tiles == 13:
-        # 如果已经有6对，那就是七对子听牌
-        yaku_list.append("Seven Pairs")
-        return yaku_list  # 七对子不能和其他役复合
+    返回: 可能的手役名称列表
 
-    # 清一色/混一色
-    if num_suits == 1 and (has_m or has_p or has_s):
-        if not has_z:
-            yaku_list.append("Full Flush")  # 清一色
-        else:
-            yaku_list.append("Half Flush")  # 混一色
-
-    # 断幺九（全是2-8的数牌）
-    if not has_z:
-        all_simples = True
-        for i in range(0, 9):
-            if tiles_34[i] > 0 and i in [0, 8]:  # 1万或9万
-                all_simples = False
-        for i in range(9, 18):
-            if tiles_34[i] > 0 and i in [9, 17]:  # 1条或9条
-                all_simples = False
-        for i in range(18, 27):
-            if tiles_34[i] > 0 and i in [18, 26]:  # 1筒或9筒
-                all_simples = False
-
-        if all_simples and total_tiles == 13:
-            yaku_list.append("All Simples")
-
-    # 役牌：白发中
-    if tiles_34[31] >= 3:  # 白 (z5)
-        yaku_list.append("White Dragon")
-    if tiles_34[32] >= 3:  # 发 (z6)
-        yaku_list.append("Green Dragon")
-    if tiles_34[33] >= 3:  # 中 (z7)
-        yaku_list.append("Red Dragon")
-
-    # 役牌：自风
-    if seat_wind >= 1 and seat_wind <= 4:
-        wind_idx = 27 + seat_wind - 1
-        if tiles_34[wind_idx] >= 3:
-            yaku_list.append("Seat Wind")
-
-    # 役牌：场风
-    if prevalent_wind >= 1 and prevalent_wind <= 4:
-        wind_idx = 27 + prevalent_wind - 1
-        if tiles_34[wind_idx] >= 3:
-            yaku_list.append("Prevalent Wind")
-
-    # 对对和（4个刻子+1个雀头，听牌时刻子数>=3）
-    triplets = sum(1 for count in tiles_34 if count >= 3)
-    if triplets >= 3:
-        yaku_list.append("All Triplets")
-
-    # 三暗刻（门清时，已有3个暗刻）
-    if is_menzen and triplets >= 3:
-        yaku_list.append("Three Concealed Triplets")
-
-    # 混全带幺九（每个面子和雀头都有幺九牌）
-    # 简化检测：略
-
-    # 纯全带幺九（每个面子和雀头都有19，没有字牌）
-    # 简化检测：略
-
-    # 混老头（只有幺九牌，有字牌）
-    # 简化检测：略
-
-    # 清老头（只有19牌，没有字牌）
-    # 简化检测：略
-
-    # 三色同顺/三色同刻
-    # 简化检测：略（需要和牌后才能确定具体面子）
-
-    # 一气通贯
-    # 简化检测：略
+    注意：这个函数检测的是在听牌状态下，如果和牌可能拥有的役
+    不包括：立直、一发、里宝、宝牌、岭上开花、抢杠、海底等和牌时才能确定的役
 
+    这里只检测"确定的役"，即无论听什么牌荣和都一定有的役（对每张待牌拆解和了形后取交集）
+    未听牌时返回空列表。结果按手牌状态缓存（见 yaku_cache_info）
+    """
+    yaku_sets = _wait_yaku(
+        as_tile_counts(tiles).key(),
+        _furo_signature(furo_groups),
+        seat_wind,
+        prevalent_wind
+    )
+    if not yaku_sets or None in yaku_sets:
+        return []
+
+    common = set(yaku_sets[0]).intersection(*yaku_sets[1:])
+    yaku_list = [name for name in yaku_sets[0] if name in common]
+    if is_riichi:
+        yaku_list.insert(0, "Riichi")
     return yaku_list
 
 
-def has_yaku_for_dama(tiles: List[int],
+def has_yaku_for_dama(tiles: TileInput,
                       furo_groups: List = None,
                       seat_wind: int = 1,
                       prevalent_wind: int = 1) -> bool:
     """
     判断手牌是否有役（用于默听判断）
-    只要有任何确定的役（除了门前清自摸和），就返回True
+    只要有任意一张待牌荣和时有役（门前清自摸和需要自摸，不计入），就返回True
     """
-    yaku = detect_yaku(
-        tiles,
-        furo_groups,
-        seat_wind=seat_wind,
-        prevalent_wind=prevalent_wind
+    yaku_sets = _wait_yaku(
+        as_tile_counts(tiles).key(),
+        _furo_signature(furo_groups),
+        seat_wind,
+        prevalent_wind
     )
-    return len(yaku) > 0
+    return any(yaku_sets)
 
 
 # ==================== 手牌状态追踪器 ====================
@@ -436,16 +1075,29 @@ class HandTracker:
                  initial_hand: List[int],
                  seat_wind: int = 1,
                  prevalent_wind: int = 1,
-                 debug: bool = False):
+                 dora_indicators: Optional[List[int]] = None,
+                 debug: bool = False,
+                 visible: Optional[TileCounts] = None):
         self.seat = seat
         self.seat_wind = seat_wind
         self.prevalent_wind = prevalent_wind
         self.debug = debug
         # 过滤掉非整数、60和0
         self.hand = sorted([t for t in initial_hand if isinstance(t, int) and 0 < t < 60])
+        self.counts = TileCounts.from_tiles(self.hand)  # 与self.hand同步维护的34种张数
         self.furo_groups = []  # 副露组
         self.riichi_declared = False
 
+        # 可见牌（宝牌指示牌 + 牌河 + 副露中来自手牌的牌），用于计算待牌剩余张数
+        # 传入visible时与同一局的其他玩家共用（见 replay_round），否则只包含自己打出和副露的牌
+        if visible is None:
+            visible = TileCounts.from_tiles(dora_indicators or [])
+        self.visible = visible
+        self.shanten = 8  # 打牌后的向听数
+        self.riichi_waits: Dict[int, int] = {}  # 立直宣言时的待牌及剩余张数
+        self._waits_key: Optional[bytes] = None  # 上次计算向听数时的手牌
+        self._waits: Optional[Tuple[bytes, List[int]]] = None  # (手牌, 待牌)，需要时才计算，见 current_waits
+
         # 默听状态追踪
         self.dama_state = False  # 当前是否处于默听状态
         self.dama_turns_count = 0  # 总共经历默听的次数
@@ -460,26 +1112,82 @@ class HandTracker:
 
         self._record_snapshot("init")
 
-    def process_action_pair(self, draw_tile: int, discard_tile: int):
+    def replay(self, draw_list: List, discard_list: List):
+        """
+        按牌谱顺序重放这个玩家一局的摸牌列表和打牌列表（每个下标对应一巡）
+        只看得到自己的牌河和副露；按巡目顺序重放四家见 replay_round
+
+        draw_list: 摸到的牌；吃/碰/大明杠为字符串（如 'c165117', '4747p47'）
+        discard_list: 打出的牌；60表示摸切，'rXX'表示立直打XX（'r60'为立直摸切），
+                      暗杠/加杠为字符串（如 '242424a24'），0表示大明杠后没有打牌
+        """
+        if not isinstance(draw_list, list) or not isinstance(discard_list, list):
+            return
+
+        for i, draw in enumerate(draw_list):
+            discard = discard_list[i] if i < len(discard_list) else 0  # 自摸和了时没有打牌
+            self.play_turn(draw, discard)
+
+    def play_turn(self, draw, discard) -> int:
+        """
+        重放一巡：摸牌（或鸣牌）和打牌（或暗杠/加杠），格式同 replay
+
+        Returns:
+            打出的牌；0表示没有打牌（杠后由同一玩家继续摸岭上牌，或自摸和了）
+        """
+        draw_tile = 60
+        if isinstance(draw, str):
+            # 鸣牌（吃/碰/大明杠）
+            self.process_special_action(draw)
+        elif isinstance(draw, int):
+            draw_tile = draw
+
+        riichi = False
+        kan_action = None
+        if isinstance(discard, str):
+            if discard.startswith('r'):
+                riichi = True
+                discard = int(discard[1:]) if discard[1:].isdigit() else 60
+            else:
+                kan_action = discard
+                discard = 0
+        if not isinstance(discard, int):
+            discard = 0
+        if discard == 60:
+            discard = draw_tile
+
+        self.process_action_pair(draw_tile, discard if discard else 60, riichi=riichi)
+
+        # 暗杠/加杠：摸牌后宣言，岭上牌在下一巡的摸牌中
+        if kan_action is not None:
+            self.process_special_action(kan_action)
+        return discard if 0 < discard < 60 else 0
+
+    def process_action_pair(self, draw_tile: int, discard_tile: int, riichi: bool = False):
         """
         处理一次摸打
         draw_tile: 摸的牌（60表示没有摸牌）
         discard_tile: 打的牌（60表示没有打牌，可能是副露或立直）
+        riichi: 这次打牌是否为立直宣言牌
         """
         # 摸牌
         if draw_tile > 0 and draw_tile < 60:
             self.hand.append(draw_tile)
             self.hand.sort()
+            self.counts.add(draw_tile)
 
         # 打牌
         if discard_tile > 0 and discard_tile < 60:
             if discard_tile in self.hand:
                 self.hand.remove(discard_tile)
+                self.counts.remove(discard_tile)
             self.hand.sort()
-
-        # 每次摸打后检查默听状态（注释掉以提高效率，不计算向听数）
-        # if len(self.hand) == 13:
-        #     self._check_dama_state()
+            self.visible.add(discard_tile)
+            self._update_waits()
+            if riichi:
+                self.declare_riichi()
+            # 每次打牌后检查默听状态
+            self._check_dama_state()
 
         self._record_snapshot(
             "action_pair",
@@ -499,25 +1207,60 @@ class HandTracker:
 
         if action_str.startswith('r'):
             # 立直：r后面跟打出的牌
-            self.riichi_declared = True
-            discard = int(action_str[1:]) if len(action_str) > 1 else 0
+            discard = int(action_str[1:]) if action_str[1:].isdigit() else 0
             if discard > 0 and discard < 60 and discard in self.hand:
                 self.hand.remove(discard)
+                self.counts.remove(discard)
                 self.hand.sort()
-            # 立直后不再是默听
-            self.dama_state = False
+                self.visible.add(discard)
+                self._update_waits()
+            self.declare_riichi()
             return
 
         furo_info = self._parse_furo_string(action_str)
         if furo_info is not None:
             # 副露
             furo_type, tiles = furo_info
-            self._process_furo(furo_type, tiles)
-            # 副露后不再是默听
-            self.dama_state = False
+            self._process_furo(furo_type, tiles, self._parse_called_tile(action_str, furo_type))
+            # 副露后不再是默听（暗杠不破坏门清）
+            if furo_type != 'a':
+                self.dama_state = False
 
         self._record_snapshot("special_action", {"action": action_str})
 
+    def declare_riichi(self):
+        """
+        立直宣言（宣言牌已打出）：记录此时的待牌及剩余张数
+        """
+        if not self.riichi_declared and self.shanten == 0:
+            counts, visible = self.counts.counts, self.visible.counts
+            self.riichi_waits = {
+                tile: max(0, 4 - counts[tile_index(tile)] - visible[tile_index(tile)])
+                for tile in self.current_waits()
+            }
+        self.riichi_declared = True
+        # 立直后不再是默听
+        self.dama_state = False
+
+    def _update_waits(self):
+        """打牌后更新向听数（只在3n+1张时计算；待牌在需要时由 current_waits 计算）"""
+        if self.counts.total() % 3 != 1:
+            return
+        key = self.counts.key()
+        if key == self._waits_key:
+            # 摸切等手牌未变化的情况直接沿用上次结果
+            return
+        self._waits_key = key
+        self.shanten = _shanten_34(self.counts.counts)
+
+    def current_waits(self) -> List[int]:
+        """当前手牌的待牌（未听牌为空列表）；同一手牌只计算一次"""
+        key = self.counts.key()
+        if self._waits is None or self._waits[0] != key:
+            not_tenpai = key == self._waits_key and self.shanten != 0
+            self._waits = (key, [] if not_tenpai else waits(self.counts))
+        return self._waits[1]
+
     def _parse_furo_string(self, action_str: str) -> Optional[Tuple[str, List[int]]]:
         """从操作字符串中解析副露信息，返回(类型, 牌列表)"""
         if not action_str or not isinstance(action_str, str):
@@ -527,7 +1270,7 @@ class HandTracker:
 
         furo_type = None
         for ch in action_str:
-            if ch in ('c', 'p', 'k', 'm'):
+            if ch in ('c', 'p', 'k', 'm', 'a'):
                 furo_type = ch
                 break
         if furo_type is None:
@@ -548,21 +1291,49 @@ class HandTracker:
 
         return furo_type, tiles
 
-    def _process_furo(self, furo_type: str, tiles: List[int]):
+    def _parse_called_tile(self, action_str: str, furo_type: str) -> Optional[int]:
+        """副露字符串中紧跟类型字母的牌：吃/碰/大明杠为鸣的牌，加杠为加上的牌"""
+        pos = action_str.find(furo_type)
+        tile_str = action_str[pos + 1:pos + 3]
+        if pos < 0 or not tile_str.isdigit() or len(tile_str) != 2:
+            return None
+        return int(tile_str)
+
+    def _process_furo(self, furo_type: str, tiles: List[int], called_tile: Optional[int] = None):
         """处理副露"""
         if not tiles:
             return
 
-        # 从手牌中移除副露用到的牌（吃/碰是从手里拿2张，从别人那里拿1张）
-        # 杠是从手里拿3张或4张
-        for tile in tiles:
+        # 从手牌中移除副露用到的牌（吃/碰/大明杠：鸣的牌来自别人，其余来自手牌）
+        # 加杠只从手里拿1张，暗杠从手里拿4张
+        from_hand = list(tiles)
+        if furo_type in ('c', 'p', 'm') and called_tile in from_hand:
+            from_hand.remove(called_tile)
+        elif furo_type == 'k' and called_tile is not None:
+            from_hand = [called_tile]
+
+        for tile in from_hand:
             if tile in self.hand:
                 self.hand.remove(tile)
-
-        self.furo_groups.append({
-            'type': furo_type,
-            'tiles': tiles
-        })
+                self.counts.remove(tile)
+                # 离开手牌后成为可见牌（鸣的牌打出时已计入）
+                self.visible.add(tile)
+
+        if furo_type == 'k':
+            # 加杠：把已有的碰升级为杠
+            idx = tile_index(tiles[0])
+            for group in self.furo_groups:
+                if group['type'] == 'p' and group['tiles'] and tile_index(group['tiles'][0]) == idx:
+                    group['type'] = 'k'
+                    group['tiles'] = tiles
+                    break
+            else:
+                self.furo_groups.append({'type': furo_type, 'tiles': tiles})
+        else:
+            self.furo_groups.append({
+                'type': furo_type,
+                'tiles': tiles
+            })
         self.hand.sort()
 
     def _check_dama_state(self):
@@ -570,34 +1341,38 @@ class HandTracker:
         检查当前是否处于默听状态
         条件：
         1. 没有立直
-        2. 没有副露（门清）
+        2. 没有副露（门清，暗杠不影响）
         3. 手牌听牌（向听数=0）
-        4. 有役（除了门前清自摸和）
+        4. 有役：至少一张待牌荣和时有役（按和了形拆解计算，不含门前清自摸和）
         """
+        # 大多数打牌：未听牌且不在默听中，下面的检查都不会改变状态
+        if not self.dama_state and self.shanten != 0:
+            return
+
         # 如果已经立直或有副露，不可能是默听
-        if self.riichi_declared or len(self.furo_groups) > 0:
+        if self.riichi_declared or not _is_menzen(self.furo_groups):
             if self.dama_state:
                 # 退出默听状态
                 self.dama_state = False
                 self._record_snapshot("exit_dama_state", {"detail": "riichi_or_furo"})
             return
 
-        # 检查是否听牌
-        if len(self.hand) != 13:
+        # 检查是否听牌（向听数在打牌后由 _update_waits 更新）
+        if self.counts.total() % 3 != 1:
             if self.dama_state:
                 self.dama_state = False
                 self._record_snapshot("exit_dama_state", {"detail": "tile_count"})
             return
 
-        if not is_tenpai(self.hand):
+        if self.shanten != 0:
             if self.dama_state:
                 self.dama_state = False
                 self._record_snapshot("exit_dama_state", {"detail": "not_tenpai"})
             return
 
-        # 检查是否有役（用于默听）
+        # 检查是否有役（用于默听，结果由共享的役判定缓存提供）
         if has_yaku_for_dama(
-            self.hand,
+            self.counts,
             self.furo_groups,
             seat_wind=self.seat_wind,
             prevalent_wind=self.prevalent_wind
@@ -649,13 +1424,16 @@ class HandTracker:
         return tiles_to_string(self.hand)
 
     def get_stats(self) -> Dict:
-        """返回默听统计数据"""
+        """返回默听统计数据及立直时的待牌统计"""
         return {
             'dama_hands': self.dama_hands,
             'dama_win': self.dama_win,
             'dama_deal_in': self.dama_deal_in,
             'dama_draw': self.dama_draw,
-            'dama_pass': self.dama_pass
+            'dama_pass': self.dama_pass,
+            'riichi_wait_hands': 1 if self.riichi_waits else 0,
+            'riichi_wait_kinds': len(self.riichi_waits),
+            'riichi_wait_tiles': sum(self.riichi_waits.values())
         }
 
     def get_debug_log(self) -> List[Dict[str, Any]]:
@@ -676,11 +1454,11 @@ class HandTracker:
             'furo_groups': list(self.furo_groups),
         }
 
-        tenpai = len(self.hand) == 13 and is_tenpai(self.hand)
+        tenpai = len(self.hand) == 13 and is_tenpai(self.counts)
         snapshot['tenpai'] = tenpai
         if tenpai:
             snapshot['yaku'] = detect_yaku(
-                self.hand,
+                self.counts,
                 self.furo_groups,
                 seat_wind=self.seat_wind,
                 prevalent_wind=self.prevalent_wind
@@ -694,6 +1472,65 @@ class HandTracker:
         self.debug_log.append(snapshot)
 
 
+# 副露字符串中类型字母的位置 → 被鸣的玩家相对鸣牌玩家的座位（上家、对家、下家）
+_CALLED_FROM = {0: -1, 2: -2, 4: 1, 6: 1}
+
+
+def _caller(draw_lists: List[List], pos: List[int], discarder: int, tile: int) -> Optional[int]:
+    """打出的牌被鸣时返回鸣牌玩家的座位（碰/大明杠优先于吃），没有被鸣返回None"""
+    n = len(draw_lists)
+    chi = None
+    for seat in range(n):
+        if seat == discarder or pos[seat] >= len(draw_lists[seat]):
+            continue
+        call = draw_lists[seat][pos[seat]]
+        if not isinstance(call, str):
+            continue
+        at = next((i for i, ch in enumerate(call) if ch in ('c', 'p', 'm')), -1)
+        if at < 0 or call[at + 1:at + 3] != str(tile):
+            continue
+        if at not in _CALLED_FROM or (seat + _CALLED_FROM[at]) % n != discarder:
+            continue
+        if call[at] != 'c':
+            return seat
+        chi = seat
+    return chi
+
+
+def replay_round(trackers: List[Optional[HandTracker]], draw_lists: List[List],
+                 discard_lists: List[List], dealer: int):
+    """
+    按巡目顺序重放一局所有玩家的摸打
+    各玩家的 HandTracker 共用同一个可见牌计数时，立直时的待牌剩余张数扣除的是宣言时
+    所有玩家已经打出和副露的牌
+
+    trackers: 各座位的 HandTracker（没有配牌的座位为None，跳过）
+    draw_lists / discard_lists: 各座位的摸牌列表和打牌列表（格式见 HandTracker.replay）
+    dealer: 庄家的座位（第一个摸牌）
+    """
+    n = len(trackers)
+    draw_lists = [draws if tracker is not None and isinstance(draws, list) else []
+                  for tracker, draws in zip(trackers, draw_lists)]
+    pos = [0] * n
+    seat = dealer % n
+    while True:
+        if pos[seat] >= len(draw_lists[seat]):
+            # 这个玩家没有摸牌了（和了、或牌谱与推断的顺序不一致）：由下一个还有摸牌的玩家继续
+            seat = next(((seat + i) % n for i in range(1, n + 1) if pos[(seat + i) % n] < len(draw_lists[(seat + i) % n])), None)
+            if seat is None:
+                return
+
+        turn = pos[seat]
+        pos[seat] += 1
+        discards = discard_lists[seat] if isinstance(discard_lists[seat], list) else []
+        discard = discards[turn] if turn < len(discards) else 0  # 自摸和了时没有打牌
+        discarded = trackers[seat].play_turn(draw_lists[seat][turn], discard)
+        if discarded:
+            # 打出的牌被鸣时轮到鸣牌的玩家，否则轮到下家；没有打牌（杠）时同一玩家摸岭上牌
+            caller = _caller(draw_lists, pos, seat, discarded)
+            seat = caller if caller is not None else (seat + 1) % n
+
+
 # ==================== 测试代码 ====================
 
 if __name__ == "__main__":
@@ -27,6 +27,9 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
 from summarize_v23 import summarize_log
 
 ERROR_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'game-logs', 'errors'))
+# 自动分类的目标文件夹（相对于仓库根目录）
+M_LEAGUE_FOLDER = "game-logs/m-league"
+EMA_FOLDER = "game-logs/ema"
 
 def detect_league_type(data):
     """
@@ -202,46 +205,62 @@ def organize_folder(folder_path, dry_run=False):
     print(f"整理文件夹: {folder_path}")
     print(f"{'='*80}\n")
 
+    # 递归扫描所有JSON文件
+    file_paths = []
+    for root, dirs, files in os.walk(folder_path):
+        for f in files:
+            if f.endswith('.json'):
+                file_paths.append(os.path.join(root, f))
+
+    return organize_files(folder_path, file_paths, dry_run)
+
+
+def organize_files(folder_path, file_paths, dry_run=False):
+    """
+    整理文件夹中指定的牌谱文件（监视模式只处理新增的文件，不再扫描整个文件夹）
+
+    参数:
+    - folder_path: 文件夹路径（与 file_paths 使用同样的写法）
+    - file_paths: 文件夹中要整理的JSON文件，已是标准文件名的文件会被跳过
+    - dry_run: 如果为True，只显示将要执行的操作，不实际移动文件
+
+    返回：(操作文件数, 错误数)
+    """
     # ========== 阶段1：找到所有非标准化文件并移到根目录 ==========
     print("阶段 1/3: 扫描并移动非标准化文件到根目录\n")
 
     non_standard_files = []
     moved_to_root_count = 0
 
-    # 递归扫描所有JSON文件
-    for root, dirs, files in os.walk(folder_path):
-        for f in files:
-            if not f.endswith('.json'):
-                continue
+    for file_path in file_paths:
+        f = os.path.basename(file_path)
 
-            file_path = os.path.join(root, f)
+        # 检查是否在根目录
+        is_in_root = (os.path.dirname(file_path) == folder_path)
 
-            # 检查是否在根目录
-            is_in_root = (os.path.dirname(file_path) == folder_path)
+        # 检查文件名是否标准化
+        if not is_standard_filename(f):
+            if is_in_root:
+                # 已经在根目录，直接记录
+                non_standard_files.append(file_path)
+            else:
+                # 不在根目录，需要移动
+                target_path = os.path.join(folder_path, f)
 
-            # 检查文件名是否标准化
-            if not is_standard_filename(f):
-                if is_in_root:
-                    # 已经在根目录，直接记录
-                    non_standard_files.append(file_path)
+                if dry_run:
+                    print(f"📋 预览移动到根目录: {os.path.relpath(file_path, folder_path)} -> {f}")
+                    non_standard_files.append(file_path)  # 预览模式仍使用原路径
+                    moved_to_root_count += 1
                 else:
-                    # 不在根目录，需要移动
-                    target_path = os.path.join(folder_path, f)
-
-                    if dry_run:
-                        print(f"📋 预览移动到根目录: {os.path.relpath(file_path, folder_path)} -> {f}")
-                        non_standard_files.append(file_path)  # 预览模式仍使用原路径
-                        moved_to_root_count += 1
+                    # 检查目标是否已存在
+                    if os.path.exists(target_path):
+                        print(f"⚠️  {os.path.relpath(file_path, folder_path)}: 根目录已存在同名文件，移动到errors")
+                        move_to_error(file_path, "move-to-root-conflict")
                     else:
-                        # 检查目标是否已存在
-                        if os.path.exists(target_path):
-                            print(f"⚠️  {os.path.relpath(file_path, folder_path)}: 根目录已存在同名文件，移动到errors")
-                            move_to_error(file_path, "move-to-root-conflict")
-                        else:
-                            shutil.move(file_path, target_path)
-                            print(f"✓ 移动到根目录: {os.path.relpath(file_path, folder_path)} -> {f}")
-                            non_standard_files.append(target_path)
-                            moved_to_root_count += 1
+                        shutil.move(file_path, target_path)
+                        print(f"✓ 移动到根目录: {os.path.relpath(file_path, folder_path)} -> {f}")
+                        non_standard_files.append(target_path)
+                        moved_to_root_count += 1
 
     if not non_standard_files:
         print("✓ 没有需要整理的非标准化文件\n")
@@ -404,6 +423,65 @@ def organize_folder(folder_path, dry_run=False):
     return moved_to_root_count + renamed_count + moved_count, error_count
 
 
+def classify_file(file_path, dry_run=False):
+    """
+    检测单个牌谱的类型，不在对应联赛文件夹中时移动过去
+
+    返回：(状态, 文件当前路径)
+    - 状态：'classified'（已分类）、'error'（分类失败）或 None（无法判断类型或已在正确位置）
+    - 文件被移到errors时路径为None；预览模式下路径不变
+    """
+    filename = os.path.basename(file_path)
+    current_folder = os.path.dirname(file_path)
+
+    try:
+        # 读取文件
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        # 检测类型
+        detected_type = detect_league_type(data)
+
+        if detected_type is None:
+            # 无法检测，跳过
+            return None, file_path
+
+        # 确定目标文件夹
+        if detected_type == 'm-league':
+            target_folder = M_LEAGUE_FOLDER
+        elif detected_type == 'ema':
+            target_folder = EMA_FOLDER
+        else:
+            return None, file_path
+
+        # 检查文件是否已在正确的文件夹中
+        if os.path.abspath(current_folder).startswith(os.path.abspath(target_folder)):
+            # 已经在正确的文件夹中（包括子文件夹），跳过
+            return None, file_path
+
+        # 需要移动
+        target_path = os.path.join(target_folder, filename)
+
+        if dry_run:
+            print(f"📋 预览分类: {os.path.relpath(file_path)} -> {detected_type}/{filename}")
+            return 'classified', file_path
+
+        # 检查目标是否已存在
+        if os.path.exists(target_path):
+            print(f"⚠️  {filename}: 目标位置已存在同名文件，移动到errors")
+            move_to_error(file_path, "auto-classify-conflict")
+            return 'error', None
+
+        os.makedirs(target_folder, exist_ok=True)
+        shutil.move(file_path, target_path)
+        print(f"✓ 自动分类: {filename} -> {detected_type}/")
+        return 'classified', target_path
+
+    except Exception as e:
+        print(f"❌ {filename}: 分类失败 - {str(e)}")
+        return 'error', file_path
+
+
 def auto_classify_files(dry_run=False):
     """
     自动检测并分类牌谱文件到正确的联赛文件夹
@@ -415,12 +493,10 @@ def auto_classify_files(dry_run=False):
     print("="*80 + "\n")
 
     game_logs_root = "game-logs"
-    m_league_folder = "game-logs/m-league"
-    ema_folder = "game-logs/ema"
 
     # 确保目标文件夹存在
-    os.makedirs(m_league_folder, exist_ok=True)
-    os.makedirs(ema_folder, exist_ok=True)
+    os.makedirs(M_LEAGUE_FOLDER, exist_ok=True)
+    os.makedirs(EMA_FOLDER, exist_ok=True)
 
     classified_count = 0
     error_count = 0
@@ -440,53 +516,10 @@ def auto_classify_files(dry_run=False):
 
     # 检测每个文件的类型
     for file_path in all_json_files:
-        filename = os.path.basename(file_path)
-        current_folder = os.path.dirname(file_path)
-
-        try:
-            # 读取文件
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            # 检测类型
-            detected_type = detect_league_type(data)
-
-            if detected_type is None:
-                # 无法检测，跳过
-                continue
-
-            # 确定目标文件夹
-            if detected_type == 'm-league':
-                target_folder = m_league_folder
-            elif detected_type == 'ema':
-                target_folder = ema_folder
-            else:
-                continue
-
-            # 检查文件是否已在正确的文件夹中
-            if os.path.abspath(current_folder).startswith(os.path.abspath(target_folder)):
-                # 已经在正确的文件夹中（包括子文件夹），跳过
-                continue
-
-            # 需要移动
-            target_path = os.path.join(target_folder, filename)
-
-            if dry_run:
-                print(f"📋 预览分类: {os.path.relpath(file_path)} -> {detected_type}/{filename}")
-                classified_count += 1
-            else:
-                # 检查目标是否已存在
-                if os.path.exists(target_path):
-                    print(f"⚠️  {filename}: 目标位置已存在同名文件，移动到errors")
-                    move_to_error(file_path, "auto-classify-conflict")
-                    error_count += 1
-                else:
-                    shutil.move(file_path, target_path)
-                    print(f"✓ 自动分类: {filename} -> {detected_type}/")
-                    classified_count += 1
-
-        except Exception as e:
-            print(f"❌ {filename}: 分类失败 - {str(e)}")
+        status, _ = classify_file(file_path, dry_run)
+        if status == 'classified':
+            classified_count += 1
+        elif status == 'error':
             error_count += 1
 
     if classified_count == 0 and error_count == 0:
@@ -510,12 +543,10 @@ def main():
     classified, classify_errors = auto_classify_files(dry_run)
 
     # 整理M-League文件夹
-    m_league_folder = "game-logs/m-league"
-    m_moved, m_errors = organize_folder(m_league_folder, dry_run) or (0, 0)
+    m_moved, m_errors = organize_folder(M_LEAGUE_FOLDER, dry_run) or (0, 0)
 
     # 整理EMA文件夹
-    ema_folder = "game-logs/ema"
-    e_moved, e_errors = organize_folder(ema_folder, dry_run) or (0, 0)
+    e_moved, e_errors = organize_folder(EMA_FOLDER, dry_run) or (0, 0)
 
     # 总结
     print("="*80)
@@ -24,8 +24,11 @@ import sys
 import json
 import argparse
 from collections import defaultdict
+from datetime import timedelta
 from typing import Dict, List, Any
 
+from utils.helpers import cached_file_timestamp
+
 # 导入别名处理函数
 try:
     from summarize_v23 import load_player_aliases, normalize_player_name
@@ -189,6 +192,169 @@ def calculate_tenhou_r_value(rank: int, games_played: int, player_r: float, tabl
     return r_change
 
 
+def extract_recent_games(files, results, count=5, all_results=None, uma_config=None, origin_points=25000):
+    """
+    提取最近的N个牌谱信息，包含R值计算详情
+
+    参数:
+    - uma_config: Uma配置字典，例如 {1: 15000, 2: 5000, 3: -5000, 4: -15000} (EMA)
+                 默认为 {1: 45000, 2: 5000, 3: -15000, 4: -35000} (M-League)
+    - origin_points: 起始分数/返点，M-League为25000，EMA为30000
+
+    返回格式: [
+        {
+            'date': '2025年1月15日',
+            'players_detail': [
+                {
+                    'name': '玩家名',
+                    'rank': 1,
+                    'final_points': 30000,
+                    'r_before': 1500.0,
+                    'games_before': 10,
+                    'score_change': 50.0,  # (uma + 素点差) / 1000
+                    'r_correction': 0.0,   # (桌平均R - 玩家R) / 40
+                    'games_correction': 0.8,  # 试合数补正系数
+                    'r_change': 40.0,
+                    'r_after': 1540.0
+                },
+                ...
+            ],
+            'table_avg_r': 1500.0
+        },
+        ...
+    ]
+    """
+    # 设置默认UMA配置（M-League）
+    if uma_config is None:
+        uma_config = {1: 45000, 2: 5000, 3: -15000, 4: -35000}
+
+    # 创建文件和结果的映射，按时间顺序排序
+    file_result_pairs = []
+    files_without_timestamp = []
+
+    for fp, result in zip(files, results):
+        # 完整的时间戳来自排序时建立的时间戳索引（json['title'][1]），不需要重新读取文件
+        timestamp, error_reason = cached_file_timestamp(fp)
+
+        # 如果无法从JSON获取时间戳，记录错误
+        if timestamp is None:
+            files_without_timestamp.append({
+                'path': fp,
+                'filename': os.path.basename(fp),
+                'reason': error_reason or "未知原因"
+            })
+        else:
+            file_result_pairs.append((timestamp, fp, result))
+
+    # 如果有文件缺失时间戳，抛出异常
+    if files_without_timestamp:
+        error_msg = f"\n{'='*80}\n❌ 错误：发现 {len(files_without_timestamp)} 个牌谱文件缺失时间戳\n{'='*80}\n"
+        for i, file_info in enumerate(files_without_timestamp, 1):
+            error_msg += f"\n{i}. 文件：{file_info['filename']}\n"
+            error_msg += f"   路径：{file_info['path']}\n"
+            error_msg += f"   原因：{file_info['reason']}\n"
+        error_msg += f"\n{'='*80}\n"
+        error_msg += "请确保所有牌谱JSON文件都包含有效的时间戳：json['title'][1]\n"
+        error_msg += "格式：\"MM/DD/YYYY, HH:MM:SS AM/PM\"\n"
+        error_msg += f"{'='*80}\n"
+        raise ValueError(error_msg)
+
+    # 按时间升序排序（从旧到新）
+    file_result_pairs.sort(key=lambda x: x[0])
+
+    # 追踪所有玩家的R值和场数
+    player_r_values = defaultdict(lambda: 1500.0)
+    player_games = defaultdict(int)
+
+    # 加载玩家别名配置
+    alias_map = load_player_aliases()
+
+    # 计算所有游戏的R值（为了得到最近几场的R值状态）
+    all_game_details = []
+
+    for timestamp, fp, result in file_result_pairs:
+        summary = result.get('summary', [])
+
+        # 计算这局的桌平均R值
+        # 使用归一化后的玩家名来计算桌平均R
+        table_players = [p.get('name', '') for p in summary if p.get('name')]
+        normalized_table_players = [normalize_player_name(name, alias_map) for name in table_players]
+        table_avg_r = sum(player_r_values[name] for name in normalized_table_players) / len(normalized_table_players) if normalized_table_players else 1500.0
+
+        # 计算每个玩家的R值变化
+        players_detail = []
+        for player_stat in summary:
+            name = player_stat.get('name', '')
+            if not name:
+                continue
+
+            # 归一化玩家名用于R值追踪（别名合并统计）
+            normalized_name = normalize_player_name(name, alias_map)
+
+            rank = player_stat.get('rank', 4)
+            final_points = player_stat.get('final_points', 25000)
+            games_before = player_games[normalized_name]
+            r_before = player_r_values[normalized_name]
+
+            # 使用平均uma（如果有的话），否则回退到按名次查表
+            avg_uma = player_stat.get('avg_uma')
+            if avg_uma is not None:
+                uma = avg_uma
+            else:
+                # 回退方案：按名次查表
+                uma = uma_config.get(rank, 0)
+
+            score_diff = final_points - origin_points
+            score_change = (uma + score_diff) / 1000.0
+
+            # 计算R值补正
+            r_correction = (table_avg_r - r_before) / 40.0
+
+            # 计算试合数补正
+            if games_before < 400:
+                games_correction = 1 - games_before * 0.002
+            else:
+                games_correction = 0.2
+
+            # 计算R值变动（传入uma_config、origin_points和avg_uma）
+            r_change = calculate_tenhou_r_value(rank, games_before, r_before, table_avg_r, final_points, uma_config, origin_points, avg_uma=uma)
+            r_after = r_before + r_change
+
+            players_detail.append({
+                'name': name,
+                'rank': rank,
+                'final_points': final_points,
+                'r_before': round(r_before, 2),
+                'games_before': games_before,
+                'score_change': round(score_change, 1),
+                'r_correction': round(r_correction, 2),
+                'games_correction': round(games_correction, 3),
+                'r_change': round(r_change, 2),
+                'r_after': round(r_after, 2)
+            })
+
+            # 更新玩家R值和场数（使用归一化后的名字）
+            player_r_values[normalized_name] = r_after
+            player_games[normalized_name] += 1
+
+        # 按名次排序
+        players_detail.sort(key=lambda x: x['rank'])
+
+        # 调整时区：UTC+0 -> UTC+2
+        display_timestamp = timestamp + timedelta(hours=2)
+
+        all_game_details.append({
+            'date': display_timestamp.strftime("%Y年%m月%d日 %H:%M"),
+            'date_en': display_timestamp.strftime("%Y-%m-%d %H:%M"),
+            'players_detail': players_detail,
+            'table_avg_r': round(table_avg_r, 2)
+        })
+
+    # 返回最近的N场，反转顺序让最新的在前面
+    recent = all_game_details[-count:] if len(all_game_details) >= count else all_game_details
+    return list(reversed(recent))
+
+
 def calculate_player_stats(batch_results: List[Dict[str, Any]], round_counts: List[int], uma_config=None, origin_points=25000) -> Dict[str, Dict[str, Any]]:
     """
     基于批量统计结果，计算每个玩家的综合数据
@@ -274,6 +440,9 @@ def calculate_player_stats(batch_results: List[Dict[str, Any]], round_counts: Li
         "dama_state_deal_in": 0,    # 默听状态下放铳
         "dama_state_draw": 0,       # 默听状态下流局
         "dama_state_pass": 0,       # 默听状态下横移
+        "riichi_wait_hands": 0,     # 可计算待牌的立直次数
+        "riichi_wait_kinds_sum": 0, # 立直时待牌种类数总和
+        "riichi_wait_tiles_sum": 0, # 立直时待牌剩余张数总和
         # 新增：对战统计
         "vs_players": defaultdict(lambda: {
             "games": 0,           # 对战场数
@@ -408,6 +577,9 @@ def calculate_player_stats(batch_results: List[Dict[str, Any]], round_counts: Li
             pd["dama_state_deal_in"] += player_stat.get("dama_state_deal_in", 0)
             pd["dama_state_draw"] += player_stat.get("dama_state_draw", 0)
             pd["dama_state_pass"] += player_stat.get("dama_state_pass", 0)
+            pd["riichi_wait_hands"] += player_stat.get("riichi_wait_hands", 0)
+            pd["riichi_wait_kinds_sum"] += player_stat.get("riichi_wait_kinds_sum", 0)
+            pd["riichi_wait_tiles_sum"] += player_stat.get("riichi_wait_tiles_sum", 0)
 
             # 对战统计：计算与其他玩家的对战情况
             my_rank = player_stat.get("rank", 4)
@@ -558,6 +730,9 @@ def calculate_player_stats(batch_results: List[Dict[str, Any]], round_counts: Li
             "dama_state_deal_in_rate": round(pd["dama_state_deal_in"] / pd["dama_state_hands"] * 100, 2) if pd["dama_state_hands"] > 0 else 0,
             "dama_state_draw_rate": round(pd["dama_state_draw"] / pd["dama_state_hands"] * 100, 2) if pd["dama_state_hands"] > 0 else 0,
             "dama_state_pass_rate": round(pd["dama_state_pass"] / pd["dama_state_hands"] * 100, 2) if pd["dama_state_hands"] > 0 else 0,
+            "riichi_wait_hands": pd["riichi_wait_hands"],
+            "avg_riichi_wait_kinds": round(pd["riichi_wait_kinds_sum"] / pd["riichi_wait_hands"], 2) if pd["riichi_wait_hands"] > 0 else 0,
+            "avg_riichi_wait_tiles": round(pd["riichi_wait_tiles_sum"] / pd["riichi_wait_hands"], 2) if pd["riichi_wait_hands"] > 0 else 0,
 
             # 放铳目标
             "deal_in_targets": dict(pd["deal_in_targets"]),
@@ -3,9 +3,18 @@
 S-League 最高位战模块
 
 这个模块负责处理S-League赛季数据和页面生成
+
+页面生成器（模板、翻译等渲染模块）在首次访问 generate_all_s_league_pages 时才导入，
+只使用 s_league.data_processor 的工具不需要加载渲染代码
 """
 
 from .config import SEASONS, RULE_CONFIG
-from .page_generator import generate_all_s_league_pages
 
 __all__ = ['SEASONS', 'RULE_CONFIG', 'generate_all_s_league_pages']
+
+
+def __getattr__(name):
+    if name == 'generate_all_s_league_pages':
+        from .page_generator import generate_all_s_league_pages
+        return generate_all_s_league_pages
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -12,6 +12,7 @@ import json
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from summarize_v23 import load_player_aliases, normalize_player_name
+from utils.fragment_builder import FragmentBuilder
 
 
 def _compute_running_score_totals(recent_games):
@@ -58,12 +59,12 @@ def generate_recent_games_content_s_league(recent_games, stats_data, t, lang='zh
         })
     player_list.sort(key=lambda x: -x['games'])
 
-    player_tabs = ""
+    player_tabs = FragmentBuilder()
     all_text = t.get('all_players', '所有玩家')
-    player_tabs += f'<button class="player-filter-btn active" data-player="all">{all_text}</button>\n'
+    player_tabs.add(f'<button class="player-filter-btn active" data-player="all">{all_text}</button>\n')
     for player in player_list:
         games_text = t.get('games', '局')
-        player_tabs += f'<button class="player-filter-btn" data-player="{player["main_id"]}">{player["name"]} ({player["games"]}{games_text})</button>\n'
+        player_tabs.add(f'<button class="player-filter-btn" data-player="{player["main_id"]}">{player["name"]} ({player["games"]}{games_text})</button>\n')
 
     # 构建游戏数据（JSON格式，供JavaScript使用），同时收集每个玩家的总分变化历史
     games_data = []
@@ -119,7 +120,7 @@ def generate_recent_games_content_s_league(recent_games, stats_data, t, lang='zh
     html_content = f"""
     <!-- 玩家筛选选项卡 -->
     <div class="player-filter-tabs" style="margin-bottom: 20px; display: flex; flex-wrap: wrap; gap: 8px;">
-        {player_tabs}
+        {player_tabs.build()}
     </div>
 
     <!-- 总分曲线图容器 -->
@@ -345,12 +346,12 @@ def generate_ranking_content_s_league(stats_data, t, league_avg, lang='zh'):
 
     rank_emojis = ['🥇', '🥈', '🥉']
 
-    rows_html = ""
+    rows_html = FragmentBuilder()
     for idx, (player_name, data) in enumerate(qualified_players):
         rank = idx + 1
         rank_emoji = rank_emojis[rank - 1] + ' ' if rank <= 3 else ''
         total_score_display = _format_total_score(data['total_score'])
-        rows_html += f"""
+        rows_html.add(f"""
                     <tr>
                         <td style="padding: 12px; text-align: center; font-weight: bold; font-size: 18px;">{rank_emoji}{rank}</td>
                         <td style="padding: 12px; font-weight: 600;">{player_name}</td>
@@ -360,7 +361,7 @@ def generate_ranking_content_s_league(stats_data, t, league_avg, lang='zh'):
                         <td style="padding: 12px; text-align: center;">{data['avg_rank']:.2f}</td>
                         <td style="padding: 12px; text-align: center;">{data['rank_1_rate']:.1f}%</td>
                         <td style="padding: 12px; text-align: center;">{data['win_rate']:.1f}%</td>
-                    </tr>"""
+                    </tr>""")
 
     finals_note = (
         '前四名（正式排名，≥10半庄）将进入S-League最高位决定战'
@@ -368,7 +369,7 @@ def generate_ranking_content_s_league(stats_data, t, league_avg, lang='zh'):
         'The top 4 players (official rankings, ≥10 games) advance to the S-League Championship Finals'
     )
 
-    html = f"""
+    html = FragmentBuilder(f"""
     <div style="margin-bottom: 20px;">
         <h2 style="color: #c15b42; margin: 0 0 10px 0;">{t.get('qualified_players', '正式排名')} (≥10{t.get('games', '半庄')})</h2>
         <div class="summary-box" style="border-left-color: #c15b42;">
@@ -391,17 +392,17 @@ def generate_ranking_content_s_league(stats_data, t, league_avg, lang='zh'):
                         <th style="padding: 12px; text-align: center;">{t.get('win_rate', '和牌率')}</th>
                     </tr>
                 </thead>
-                <tbody>{rows_html}
+                <tbody>{rows_html.build()}
                 </tbody>
             </table>
         </div>
     </div>
-    """
+    """)
 
     if unqualified_players:
         unqualified_players.sort(key=lambda x: -x[1]['games'])
 
-        html += f"""
+        html.add(f"""
         <div>
             <h2 style="color: #999; margin-bottom: 20px;">{t.get('unqualified_players', '新人榜')} (<10{t.get('games', '半庄')})</h2>
             <div style="overflow-x: auto;">
@@ -416,11 +417,11 @@ def generate_ranking_content_s_league(stats_data, t, league_avg, lang='zh'):
                         </tr>
                     </thead>
                     <tbody>
-        """
+        """)
 
         for player_name, data in unqualified_players:
             total_score_display = _format_total_score(data['total_score'])
-            html += f"""
+            html.add(f"""
                         <tr style="background: #f8f9fa;">
                             <td style="padding: 12px; font-weight: 600;">{player_name}</td>
                             <td style="padding: 12px; text-align: center; font-weight: bold;">{data['games']}</td>
@@ -428,16 +429,16 @@ def generate_ranking_content_s_league(stats_data, t, league_avg, lang='zh'):
                             <td style="padding: 12px; text-align: center;">{total_score_display}</td>
                             <td style="padding: 12px; text-align: center;">{data['avg_rank']:.2f}</td>
                         </tr>
-            """
+            """)
 
-        html += """
+        html.add("""
                     </tbody>
                 </table>
             </div>
         </div>
-        """
+        """)
 
-    return html
+    return html.build()
 
 
 def _generate_top5_table(title, rows, value_label, t):
@@ -445,21 +446,21 @@ def _generate_top5_table(title, rows, value_label, t):
     rank_emojis = ['🥇', '🥈', '🥉']
 
     if not rows:
-        body_html = """
+        body_html = FragmentBuilder("""
                     <tr>
                         <td colspan="3" style="padding: 20px; text-align: center; color: #999;">-</td>
-                    </tr>"""
+                    </tr>""")
     else:
-        body_html = ""
+        body_html = FragmentBuilder()
         for idx, (player_name, value_display) in enumerate(rows):
             rank = idx + 1
             rank_emoji = rank_emojis[rank - 1] + ' ' if rank <= 3 else ''
-            body_html += f"""
+            body_html.add(f"""
                     <tr>
                         <td style="padding: 10px; text-align: center; font-weight: bold;">{rank_emoji}{rank}</td>
                         <td style="padding: 10px; font-weight: 600;">{player_name}</td>
                         <td style="padding: 10px; text-align: center; color: #c15b42; font-weight: bold;">{value_display}</td>
-                    </tr>"""
+                    </tr>""")
 
     return f"""
     <div style="background: white; border-radius: 10px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); overflow: hidden;">
@@ -472,7 +473,7 @@ def _generate_top5_table(title, rows, value_label, t):
                     <th style="padding: 10px; text-align: center; color: #666; font-size: 13px;">{value_label}</th>
                 </tr>
             </thead>
-            <tbody>{body_html}
+            <tbody>{body_html.build()}
             </tbody>
         </table>
     </div>
@@ -561,51 +562,51 @@ def generate_finals_content_s_league(finals_data, t, lang='zh'):
     score_label = '分数' if lang == 'zh' else 'Score'
     total_label = '总分' if lang == 'zh' else 'Total'
 
-    header_row1 = f'<th rowspan="2" style="padding: 12px;">{t["player"]}</th>'
-    header_row2 = ""
+    header_row1 = FragmentBuilder(f'<th rowspan="2" style="padding: 12px;">{t["player"]}</th>')
+    header_row2 = FragmentBuilder()
     for game_idx in range(len(games)):
         game_num_label = f"第{game_idx + 1}{game_label}" if lang == 'zh' else f"{game_label} {game_idx + 1}"
         date_str = dates[game_idx] if game_idx < len(dates) and dates[game_idx] else ""
         sub_label = f"{game_num_label}<br><span style=\"font-weight: normal; font-size: 11px; opacity: 0.85;\">{date_str}</span>" if date_str else game_num_label
-        header_row1 += f'<th colspan="2" style="padding: 12px; text-align: center;">{sub_label}</th>'
-        header_row2 += f'<th style="padding: 8px; text-align: center; font-size: 12px;">{rank_label}</th>'
-        header_row2 += f'<th style="padding: 8px; text-align: center; font-size: 12px;">{score_label}</th>'
-    header_row1 += f'<th rowspan="2" style="padding: 12px; text-align: center;">{total_label}</th>'
+        header_row1.add(f'<th colspan="2" style="padding: 12px; text-align: center;">{sub_label}</th>')
+        header_row2.add(f'<th style="padding: 8px; text-align: center; font-size: 12px;">{rank_label}</th>')
+        header_row2.add(f'<th style="padding: 8px; text-align: center; font-size: 12px;">{score_label}</th>')
+    header_row1.add(f'<th rowspan="2" style="padding: 12px; text-align: center;">{total_label}</th>')
 
     rank_emojis = ['🥇', '🥈', '🥉']
-    rows_html = ""
+    rows_html = FragmentBuilder()
     for idx, main_id in enumerate(ranked_players):
         position = idx + 1
         position_emoji = rank_emojis[position - 1] + ' ' if position <= 3 else ''
         rounds = player_rounds[main_id]
 
-        cells = ""
+        cells = FragmentBuilder()
         for r in rounds:
             if r is None:
-                cells += '<td style="padding: 10px; text-align: center; color: #ccc;">-</td>' * 2
+                cells.add('<td style="padding: 10px; text-align: center; color: #ccc;">-</td>' * 2)
             else:
                 rank, final_points = r
                 rank_color = '#c15b42' if rank == 1 else '#333'
-                cells += f'<td style="padding: 10px; text-align: center; color: {rank_color}; font-weight: {"bold" if rank == 1 else "normal"};">{rank}</td>'
-                cells += f'<td style="padding: 10px; text-align: center;">{final_points}</td>'
+                cells.add(f'<td style="padding: 10px; text-align: center; color: {rank_color}; font-weight: {"bold" if rank == 1 else "normal"};">{rank}</td>')
+                cells.add(f'<td style="padding: 10px; text-align: center;">{final_points}</td>')
 
         total_display = f"{totals[main_id]:+}" if totals[main_id] != 0 else "0"
 
-        rows_html += f"""
+        rows_html.add(f"""
                     <tr>
                         <td style="padding: 12px; font-weight: bold;">{position_emoji}{main_id}</td>
-                        {cells}
+                        {cells.build()}
                         <td style="padding: 12px; text-align: center; color: #c15b42; font-weight: bold; font-size: 16px;">{total_display}</td>
-                    </tr>"""
+                    </tr>""")
 
     return f"""
     <div style="overflow-x: auto;">
         <table style="width: 100%; border-collapse: collapse; background: white; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
             <thead>
-                <tr style="background: #c15b42; color: white;">{header_row1}</tr>
-                <tr style="background: #c15b42; color: white;">{header_row2}</tr>
+                <tr style="background: #c15b42; color: white;">{header_row1.build()}</tr>
+                <tr style="background: #c15b42; color: white;">{header_row2.build()}</tr>
             </thead>
-            <tbody>{rows_html}
+            <tbody>{rows_html.build()}
             </tbody>
         </table>
     </div>
@@ -12,30 +12,24 @@ import json
 # 添加父目录到路径以便导入
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from player_stats import calculate_player_stats, scan_files, summarize_log
-from utils.helpers import sort_files_by_date
+from player_stats import calculate_player_stats, extract_recent_games, scan_files
+from summarize_v23 import apply_uma, cached_summary_raw, load_player_aliases
+from extract_honor_games import HonorScanner
+from utils.log_cache import read_log
+from utils.helpers import sort_files_by_date, cached_file_timestamp
 from .config import SEASONS, RULE_CONFIG
 import re
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 
 def extract_latest_date(files):
     """从牌谱JSON内的时间戳（title[1]）中提取最新日期，时区调整UTC+0 -> UTC+2"""
+    # 时间戳来自排序时建立的时间戳索引，不需要再打开文件
     dates = []
     for fp in files:
-        try:
-            with open(fp, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            title = data.get('title', [])
-            if isinstance(title, list) and len(title) > 1:
-                timestamp_str = title[1]
-                if timestamp_str[-1] == 'M':
-                    timestamp = datetime.strptime(timestamp_str, "%m/%d/%Y, %I:%M:%S %p")
-                else:
-                    timestamp = datetime.strptime(timestamp_str, "%d/%m/%Y, %H:%M:%S")
-                dates.append(timestamp)
-        except (json.JSONDecodeError, ValueError, IndexError, OSError):
-            continue
+        timestamp, _ = cached_file_timestamp(fp)
+        if timestamp is not None:
+            dates.append(timestamp)
 
     if dates:
         latest_date = max(dates) + timedelta(hours=2)
@@ -43,6 +37,65 @@ def extract_latest_date(files):
     return None
 
 
+# 同一进程内按文件夹缓存扫描结果：S-League 主页、各赛季的中英文页面和决定战共用，
+# 每个牌谱只读取一次；文件的路径、修改时间或大小变化时重新扫描
+_folder_cache = {}  # {folder: (指纹, 扫描结果)}
+# 赛季统计结果，对应的扫描结果和玩家别名都未变时直接复用
+# （扫描结果与别名无关；统计按别名合并玩家，别名修改后需要重新计算）
+_season_cache = {}  # {season_id: (扫描结果, 别名映射, 赛季数据)}
+
+
+def _folder_fingerprint(files):
+    fingerprint = []
+    for fp in sorted(files):
+        try:
+            st = os.stat(fp)
+        except OSError:
+            continue
+        fingerprint.append((fp, st.st_mtime_ns, st.st_size))
+    return tuple(fingerprint)
+
+
+def load_folder_logs(folder, label='S-League'):
+    """
+    扫描一个牌谱文件夹：排序、读取并生成规则无关的对局总结，同时检测荣誉牌谱
+
+    对局总结和荣誉牌谱都使用主构建的按内容哈希缓存，结果在进程内按文件夹复用
+
+    参数:
+        folder: 牌谱文件夹
+        label: 处理失败时日志中的名称
+
+    返回:
+        dict: {
+            'files': 扫描到的文件列表,
+            'sorted_files': 按日期排序的文件列表,
+            'games': [(文件路径, 规则无关的总结, 局数), ...]（处理成功的文件，按日期排序）,
+            'honor': HonorScanner
+        }
+    """
+    files = scan_files(folder, "*.json", recursive=True)
+    fingerprint = _folder_fingerprint(files)
+    cached = _folder_cache.get(folder)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    sorted_files = sort_files_by_date(files) if files else []
+    games = []
+    honor = HonorScanner('m-league')
+    for fp in sorted_files:
+        try:
+            data, digest = read_log(fp)
+            honor.scan(fp, data, digest)
+            games.append((fp, cached_summary_raw(data, digest), len(data.get("log", []))))
+        except Exception as ex:
+            print(f"  {label}处理失败: {fp} - {ex}", file=sys.stderr)
+
+    logs = {'files': files, 'sorted_files': sorted_files, 'games': games, 'honor': honor}
+    _folder_cache[folder] = (fingerprint, logs)
+    return logs
+
+
 def process_season_data(season_id):
     """
     处理指定赛季的数据
@@ -67,9 +120,14 @@ def process_season_data(season_id):
     season = SEASONS[season_id]
     data_folder = season['data_folder']
 
-    # 扫描文件
-    files = scan_files(data_folder, "*.json", recursive=True)
+    # 扫描文件（与主页、决定战共用同一次扫描）
+    logs = load_folder_logs(data_folder)
+    aliases = load_player_aliases()
+    cached = _season_cache.get(season_id)
+    if cached is not None and cached[0] is logs and cached[1] == aliases:
+        return cached[2]
 
+    files = logs['files']
     if not files:
         return {
             'season_info': season,
@@ -82,35 +140,18 @@ def process_season_data(season_id):
             'file_count': 0
         }
 
-    # 按日期排序
-    sorted_files = sort_files_by_date(files)
-
-    # 处理每个文件
-    results = []
-    round_counts = []
+    sorted_files = logs['sorted_files']
 
     # 使用M-League规则的uma配置
     uma_config = RULE_CONFIG['uma_config']
-
-    for fp in sorted_files:
-        try:
-            with open(fp, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            # 使用M-League规则处理
-            summary = summarize_log(data, uma_config=uma_config)
-            results.append(summary)
-            round_counts.append(len(data.get("log", [])))
-        except Exception as ex:
-            print(f"  S-League处理失败: {fp} - {ex}", file=sys.stderr)
+    results = [apply_uma(raw_summary, uma_config) for _, raw_summary, _ in logs['games']]
+    round_counts = [rounds for _, _, rounds in logs['games']]
 
     # 提取最新日期
     latest_date = extract_latest_date(files)
 
     # 计算玩家统计
     if results:
-        # 导入extract_recent_games
-        from generate_website import extract_recent_games
-
         # 提取最近对局
         recent_games = extract_recent_games(
             sorted_files,
@@ -136,7 +177,7 @@ def process_season_data(season_id):
         stats_dict = {}
         league_avg = {}
 
-    return {
+    season_data = {
         'season_info': season,
         'stats_dict': stats_dict,
         'league_avg': league_avg,
@@ -144,8 +185,11 @@ def process_season_data(season_id):
         'sorted_files': sorted_files,
         'results': results,
         'latest_date': latest_date,
-        'file_count': len(files)
+        'file_count': len(files),
+        'honor_games': logs['honor'].grouped()
     }
+    _season_cache[season_id] = (logs, aliases, season_data)
+    return season_data
 
 
 def process_finals_data(season_id):
@@ -171,43 +215,23 @@ def process_finals_data(season_id):
     if not finals_folder:
         return {'games': [], 'dates': [], 'file_count': 0}
 
-    files = scan_files(finals_folder, "*.json", recursive=True)
+    logs = load_folder_logs(finals_folder, label='S-League决定战')
+    files = logs['files']
     if not files:
         return {'games': [], 'dates': [], 'file_count': 0}
 
-    sorted_files = sort_files_by_date(files)
-    uma_config = RULE_CONFIG['uma_config']
-
     games = []
     dates = []
 
-    for fp in sorted_files:
-        try:
-            with open(fp, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            result = summarize_log(data, uma_config=uma_config)
-            summary = result.get('summary', [])
-            games.append([
-                {'name': p['name'], 'rank': p['rank'], 'final_points': p['final_points']}
-                for p in summary
-            ])
-
-            title = data.get('title', [])
-            date_str = None
-            if isinstance(title, list) and len(title) > 1:
-                timestamp_str = title[1]
-                try:
-                    if timestamp_str[-1] == 'M':
-                        timestamp = datetime.strptime(timestamp_str, "%m/%d/%Y, %I:%M:%S %p")
-                    else:
-                        timestamp = datetime.strptime(timestamp_str, "%d/%m/%Y, %H:%M:%S")
-                    date_str = (timestamp + timedelta(hours=2)).strftime("%Y年%m月%d日")
-                except (ValueError, IndexError):
-                    date_str = None
-            dates.append(date_str)
-        except Exception as ex:
-            print(f"  S-League决定战处理失败: {fp} - {ex}", file=sys.stderr)
+    for fp, raw_summary, _ in logs['games']:
+        games.append([
+            {'name': p['name'], 'rank': p['rank'], 'final_points': p['final_points']}
+            for p in raw_summary['summary']
+        ])
+
+        timestamp, _ = cached_file_timestamp(fp)
+        date_str = (timestamp + timedelta(hours=2)).strftime("%Y年%m月%d日") if timestamp else None
+        dates.append(date_str)
 
     return {'games': games, 'dates': dates, 'file_count': len(files)}
 
@@ -14,15 +14,23 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from .data_processor import process_season_data, get_all_seasons_summary
 from .templates import generate_index_template, generate_season_page_template
 from .config import SEASONS
+from summarize_v23 import save_summary_cache
+from extract_honor_games import save_honor_cache
 
 
-def generate_all_s_league_pages():
+def generate_all_s_league_pages(seasons=None):
     """
     生成所有S-League页面
 
     包括：
     - S-League主页（赛季选择）
     - 各个赛季的统计页面
+
+    参数:
+        seasons: 只重新生成这些赛季的页面（默认全部启用的赛季；主页总是重新生成）
+
+    返回:
+        list: 生成失败的赛季ID（失败的赛季不影响其他赛季）
     """
     print("\n正在生成 S-League 页面...", file=sys.stderr)
 
@@ -47,9 +55,12 @@ def generate_all_s_league_pages():
     print(f"  ✓ 已生成 {output_dir}/index-en.html (英文)", file=sys.stderr)
 
     # 2. 生成各个赛季的页面
+    failed = []
     for season_id, season_info in SEASONS.items():
         if not season_info['enabled']:
             continue
+        if seasons is not None and season_id not in seasons:
+            continue
 
         print(f"  处理 {season_info['name_zh']} 数据...", file=sys.stderr)
 
@@ -62,23 +73,27 @@ def generate_all_s_league_pages():
                 continue
 
             # 生成中文页面
-            season_html_zh = generate_season_page_template(season_data, lang='zh')
             with open(f"{output_dir}/{season_id}.html", "w", encoding="utf-8") as f:
-                f.write(season_html_zh)
+                generate_season_page_template(season_data, lang='zh', out=f)
             print(f"  ✓ 已生成 {output_dir}/{season_id}.html (中文, {season_data['file_count']} 个文件)", file=sys.stderr)
 
             # 生成英文页面
-            season_html_en = generate_season_page_template(season_data, lang='en')
             with open(f"{output_dir}/{season_id}-en.html", "w", encoding="utf-8") as f:
-                f.write(season_html_en)
+                generate_season_page_template(season_data, lang='en', out=f)
             print(f"  ✓ 已生成 {output_dir}/{season_id}-en.html (英文, {season_data['file_count']} 个文件)", file=sys.stderr)
 
         except Exception as e:
             print(f"  ✗ 生成 {season_id} 页面失败: {e}", file=sys.stderr)
             import traceback
             traceback.print_exc()
+            failed.append(season_id)
+
+    # 单独运行时也保存本次新增的缓存条目（完整构建最后还会统一清理）
+    save_summary_cache()
+    save_honor_cache()
 
     print("✓ S-League 页面生成完成\n", file=sys.stderr)
+    return failed
 
 
 def generate_season_page(season_id, lang='zh'):
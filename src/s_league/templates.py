@@ -306,16 +306,17 @@ def generate_index_template(seasons_summary, lang='zh'):
     return html
 
 
-def generate_season_page_template(season_data, lang='zh'):
+def generate_season_page_template(season_data, lang='zh', out=None):
     """
     生成单个赛季的统计页面
 
     参数:
         season_data: 赛季数据（from data_processor.process_season_data）
         lang: 语言
+        out: 输出文件对象（可选，指定后页面直接流式写入文件）
 
     返回:
-        str: HTML内容
+        str: HTML内容（指定 out 时返回None）
     """
     # S-League专用内容生成器（不含Rating/R值概念）
     from .content import (
@@ -346,7 +347,8 @@ def generate_season_page_template(season_data, lang='zh'):
     finals_data = process_finals_data(season_id)
     finals_content = generate_finals_content_s_league(finals_data, t, lang)
 
-    honor_games_raw = extract_honor_games(season_info['data_folder'])
+    # 荣誉牌谱在赛季数据扫描时已一并检测；旧调用方传入的赛季数据没有时再单独扫描
+    honor_games_raw = season_data.get('honor_games') or extract_honor_games(season_info['data_folder'])
     honor_games = {
         'yakuman_sanbaiman_games': honor_games_raw.get('yakuman_sanbaiman', []),
         'rare_yaku_games': honor_games_raw.get('rare_yaku', [])
@@ -386,7 +388,8 @@ def generate_season_page_template(season_data, lang='zh'):
         honor_content=honor_content,
         ranking_content=ranking_content,
         leaderboard_content=leaderboard_content,
-        finals_content=finals_content
+        finals_content=finals_content,
+        out=out
     )
 
     return html_content
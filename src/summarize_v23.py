@@ -7,6 +7,7 @@ Mahjong Soul v2.3 牌谱 → 对局总结 JSON
 - deal_in_targets, furo_then_win_hands, furo_then_deal_in_hands,
 - rank, final_points, deal_in_hands, deal_in_points_sum,
 - riichi_then_deal_in_hands, ippatsu_hands, ura_hands
+- riichi_wait_hands, riichi_wait_kinds_sum, riichi_wait_tiles_sum（立直时的待牌；剩余张数扣除宣言时所有玩家可见的牌）
 
 用法：
   python summarize_v23.py path/to/v23.json
@@ -22,7 +23,8 @@ from collections import defaultdict
 from typing import Any, Dict, List, Optional, Tuple
 
 # 导入手牌分析模块
-from mahjong_hand_analyzer import HandTracker
+from mahjong_hand_analyzer import HandTracker, TileCounts, replay_round
+from utils.file_cache import cache_path, content_hash, hash_bytes, load_json_cache, save_json_cache
 
 # ---------- 玩家别名映射 ----------
 def load_player_aliases():
@@ -268,15 +270,14 @@ def assign_pots_to_winners(
     return res
 
 # ---------- 主统计 ----------
-def summarize_log(v23: Dict[str, Any], uma_config: Optional[Dict[int, int]] = None) -> Dict[str, Any]:
+def summarize_log_raw(v23: Dict[str, Any]) -> Dict[str, Any]:
     """
-    统计牌谱数据
+    统计牌谱数据（与联赛规则无关的部分：素点、名次，同分玩家名次相同）
+
+    马点等规则相关字段由 apply_uma 计算，同一份总结可用于任意联赛规则
 
     参数:
     - v23: 天凤格式的牌谱数据
-    - uma_config: Uma配置字典，例如 {1: 45000, 2: 5000, 3: -15000, 4: -35000} (M-League)
-                 或 {1: 15000, 2: 5000, 3: -5000, 4: -15000} (EMA)
-                 默认为 None，使用 M-League 规则
     """
     # 保持原始玩家名（不转换），对局历史中显示原始ID
     names = v23.get("name", ["P0","P1","P2","P3"])
@@ -323,6 +324,10 @@ def summarize_log(v23: Dict[str, Any], uma_config: Optional[Dict[int, int]] = No
             "dama_state_deal_in": 0,     # 默听状态下放铳
             "dama_state_draw": 0,        # 默听状态下流局
             "dama_state_pass": 0,        # 默听状态下横移（别人和了）
+            # —— 新增：立直待牌统计（基于手牌追踪）——
+            "riichi_wait_hands": 0,      # 可计算待牌的立直次数
+            "riichi_wait_kinds_sum": 0,  # 立直时待牌种类数总和
+            "riichi_wait_tiles_sum": 0,  # 立直时待牌剩余张数总和
         })
 
     for hand in v23.get("log", []):
@@ -346,6 +351,8 @@ def summarize_log(v23: Dict[str, Any], uma_config: Optional[Dict[int, int]] = No
 
         player_blocks = []
         hand_trackers = [None] * N
+        # 四家共用的可见牌（宝牌指示牌、牌河、副露）
+        visible = TileCounts.from_tiles(hand[2] if isinstance(hand[2], list) else [])
 
         for seat in range(N):
             block = []
@@ -367,61 +374,19 @@ def summarize_log(v23: Dict[str, Any], uma_config: Optional[Dict[int, int]] = No
                     seat,
                     initial_hand,
                     seat_wind=seat_wind,
-                    prevalent_wind=prevalent_wind
+                    prevalent_wind=prevalent_wind,
+                    visible=visible
                 )
 
+        # 处理手牌追踪（按巡目顺序重放四家的摸打、鸣牌、立直和杠）
+        # block[0] = initial hand (already processed)
+        # block[1] = draw list (tiles drawn each turn)
+        # block[2] = discard list (tiles discarded each turn, 60 = tsumogiri)
+        replay_round(hand_trackers, [block[1] for block in player_blocks],
+                     [block[2] for block in player_blocks], dealer=east)
+
         for seat in range(N):
             block = player_blocks[seat]
-            tracker = hand_trackers[seat]
-
-            # block[0] = initial hand (already processed)
-            # block[1] = draw list (tiles drawn each turn)
-            # block[2] = discard list (tiles discarded each turn, 60 = tsumogiri)
-            draw_list = block[1] if len(block) > 1 else []
-            discard_list = block[2] if len(block) > 2 else []
-
-            # 处理手牌追踪
-            if tracker is not None and isinstance(draw_list, list) and isinstance(discard_list, list):
-                # 过滤出数字牌
-                draws = [t for t in draw_list if isinstance(t, int)]
-
-                # 处理打牌列表：将立直标记'rXX'转换为对应的牌和立直标记
-                discards = []
-                riichi_turns = set()
-                for i, item in enumerate(discard_list):
-                    if isinstance(item, str) and item.startswith('r'):
-                        # 立直标记，例如'r44'表示立直打44
-                        tile_str = item[1:]
-                        if tile_str.isdigit():
-                            discards.append(int(tile_str))
-                            riichi_turns.add(i)
-                        else:
-                            discards.append(60)
-                    elif isinstance(item, int):
-                        discards.append(item)
-                    else:
-                        discards.append(60)
-
-                # 处理每一轮的摸打
-                for i in range(max(len(draws), len(discards))):
-                    draw_tile = draws[i] if i < len(draws) else 60
-                    discard_tile = discards[i] if i < len(discards) else 60
-
-                    # 如果打出的是60（摸切），则打出摸到的牌
-                    if discard_tile == 60:
-                        discard_tile = draw_tile
-
-                    tracker.process_action_pair(draw_tile, discard_tile)
-
-                    # 如果这一巡是立直，只设置立直标志（牌已经在process_action_pair中打出了）
-                    if i in riichi_turns:
-                        tracker.riichi_declared = True
-                        tracker.dama_state = False
-
-                # 处理其他特殊动作（副露等）
-                for item in discard_list:
-                    if isinstance(item, str) and not item.startswith('r'):
-                        tracker.process_special_action(item)
 
             # 检查副露和立直标记（需要检查所有三个列表）
             for arr in block:
@@ -595,6 +560,9 @@ def summarize_log(v23: Dict[str, Any], uma_config: Optional[Dict[int, int]] = No
                 per[i]["dama_state_deal_in"] += stats['dama_deal_in']
                 per[i]["dama_state_draw"] += stats['dama_draw']
                 per[i]["dama_state_pass"] += stats['dama_pass']
+                per[i]["riichi_wait_hands"] += stats['riichi_wait_hands']
+                per[i]["riichi_wait_kinds_sum"] += stats['riichi_wait_kinds']
+                per[i]["riichi_wait_tiles_sum"] += stats['riichi_wait_tiles']
 
     # 写入素点与顺位
     sc = v23.get("sc", [])
@@ -614,46 +582,142 @@ def summarize_log(v23: Dict[str, Any], uma_config: Optional[Dict[int, int]] = No
             prev = finals[i]
         per[i]["rank"] = current_rank
 
+    return {
+        "ref": v23.get("ref"),
+        "title": v23.get("title", ["",""])[0],
+        "start_time": v23.get("title", ["",""])[1],
+        "players": names,
+        "summary": per
+    }
+
+
+def apply_uma(raw_summary: Dict[str, Any], uma_config: Optional[Dict[int, int]] = None) -> Dict[str, Any]:
+    """
+    在与规则无关的对局总结上应用马点规则，写入每位玩家的 avg_uma
+
+    不修改 raw_summary（同一份总结会被不同联赛规则共用），返回新的总结；
+    玩家统计中的嵌套字典与 raw_summary 共用，调用方只读不写
+
+    参数:
+    - raw_summary: summarize_log_raw 的结果
+    - uma_config: Uma配置字典，默认为 None，使用 M-League 规则
+    """
     # 计算平均马点（使用传入的uma配置，如果没有则使用M-League默认值）
     if uma_config is None:
         uma_config = {1: 45000, 2: 5000, 3: -15000, 4: -35000}  # M-League 默认
 
-    # 找出同分组，计算平均uma
-    score_groups = {}  # {分数: [玩家索引列表]}
-    for i in range(N):
-        score = finals[i]
-        if score not in score_groups:
-            score_groups[score] = []
-        score_groups[score].append(i)
+    per = [dict(p) for p in raw_summary["summary"]]
+
+    # 找出同分组（同分的玩家名次相同），计算平均uma
+    rank_groups = {}  # {名次: [玩家索引列表]}
+    for i, p in enumerate(per):
+        rank_groups.setdefault(p["rank"], []).append(i)
 
     # 为每个同分组计算平均uma
-    for score, group in score_groups.items():
+    for rank, group in rank_groups.items():
         if len(group) == 1:
             # 单独一人，直接按名次拿uma
-            i = group[0]
-            rank = per[i]["rank"]
-            per[i]["avg_uma"] = uma_config.get(rank, 0)
+            per[group[0]]["avg_uma"] = uma_config.get(rank, 0)
         else:
             # 多人同分，平分这些名次对应的uma
-            ranks = [per[i]["rank"] for i in group]
-            min_rank = min(ranks)
-            max_rank = min_rank + len(group) - 1
-
-            # 计算这几个名次的uma总和
-            total_uma = sum(uma_config.get(r, 0) for r in range(min_rank, max_rank + 1))
+            total_uma = sum(uma_config.get(r, 0) for r in range(rank, rank + len(group)))
             avg_uma = total_uma / len(group)
-
-            # 分配给每个人
             for i in group:
                 per[i]["avg_uma"] = avg_uma
 
-    return {
-        "ref": v23.get("ref"),
-        "title": v23.get("title", ["",""])[0],
-        "start_time": v23.get("title", ["",""])[1],
-        "players": names,
-        "summary": per
-    }
+    summary = dict(raw_summary)
+    summary["summary"] = per
+    return summary
+
+
+def summarize_log(v23: Dict[str, Any], uma_config: Optional[Dict[int, int]] = None) -> Dict[str, Any]:
+    """
+    统计牌谱数据（规则无关的总结 + 马点规则）
+
+    参数:
+    - v23: 天凤格式的牌谱数据
+    - uma_config: Uma配置字典，例如 {1: 45000, 2: 5000, 3: -15000, 4: -35000} (M-League)
+                 或 {1: 15000, 2: 5000, 3: -5000, 4: -15000} (EMA)
+                 默认为 None，使用 M-League 规则
+    """
+    return apply_uma(summarize_log_raw(v23), uma_config)
+
+
+# ---------- 对局总结缓存 ----------
+# 规则无关的总结按文件内容哈希缓存，M-League / EMA / S-League 共用一个缓存文件；
+# 统计代码（本文件和 mahjong_hand_analyzer.py）变化时整个缓存失效
+SUMMARY_CACHE_FILE = cache_path('summaries.json')
+SUMMARY_CACHE_VERSION = 1
+
+_summary_cache = None
+_summary_cache_version = None
+_summary_cache_used = set()
+_summary_cache_dirty = False
+
+
+def _summary_code_version():
+    global _summary_cache_version
+    if _summary_cache_version is None:
+        here = os.path.dirname(os.path.abspath(__file__))
+        sources = (os.path.abspath(__file__), os.path.join(here, 'mahjong_hand_analyzer.py'))
+        fingerprint = hash_bytes(''.join(content_hash(p) for p in sources).encode())
+        _summary_cache_version = f"{SUMMARY_CACHE_VERSION}:{fingerprint}"
+    return _summary_cache_version
+
+
+def _get_summary_cache():
+    global _summary_cache
+    if _summary_cache is None:
+        _summary_cache = load_json_cache(SUMMARY_CACHE_FILE, _summary_code_version())
+    return _summary_cache
+
+
+def cached_summary_raw(v23: Dict[str, Any], digest: str) -> Dict[str, Any]:
+    """
+    规则无关的对局总结，内容未变的文件直接使用缓存
+
+    返回的总结在多个联赛之间共用，调用方不要修改（用 apply_uma 生成带规则的副本）
+
+    参数:
+    - v23: 已解析的牌谱数据
+    - digest: 文件内容哈希（utils.file_cache.hash_bytes / content_hash）
+    """
+    global _summary_cache_dirty
+    cache = _get_summary_cache()
+    _summary_cache_used.add(digest)
+    raw = cache.get(digest)
+    if raw is None:
+        raw = cache[digest] = summarize_log_raw(v23)
+        _summary_cache_dirty = True
+    return raw
+
+
+def cached_summarize_log(v23: Dict[str, Any], digest: str, uma_config: Optional[Dict[int, int]] = None) -> Dict[str, Any]:
+    """带缓存的 summarize_log：缓存规则无关的总结，只重新应用马点规则"""
+    return apply_uma(cached_summary_raw(v23, digest), uma_config)
+
+
+def save_summary_cache(prune=False):
+    """
+    保存对局总结缓存
+
+    参数:
+        prune: 是否只保留本次运行用到的条目（完整构建扫描了所有联赛时使用）
+    """
+    global _summary_cache_dirty
+    if _summary_cache is None:
+        return
+    if prune:
+        stale = [key for key in _summary_cache if key not in _summary_cache_used]
+        for key in stale:
+            del _summary_cache[key]
+        _summary_cache_dirty = _summary_cache_dirty or bool(stale)
+        # 完整构建到此结束，常驻进程的下一次构建重新记录用到的条目
+        _summary_cache_used.clear()
+    if _summary_cache_dirty:
+        save_json_cache(SUMMARY_CACHE_FILE, _summary_cache, _summary_code_version())
+        _summary_cache_dirty = False
+
 
 # ---------- CLI ----------
 if __name__ == "__main__":
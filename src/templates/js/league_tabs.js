@@ -0,0 +1,42 @@
+// 联赛标签页切换（M-League / EMA / S-League 页面共用）
+// 当前标签保存在 localStorage 中，键名取自 <body data-tab-storage-key="...">
+
+function tabStorageKey() {
+    return document.body.dataset.tabStorageKey || 'activeTab';
+}
+
+// 标签页切换功能
+function switchTab(tabName) {
+    // 隐藏所有标签页内容
+    const allContents = document.querySelectorAll('.tab-content');
+    allContents.forEach(content => {
+        content.classList.remove('active');
+    });
+
+    // 移除所有按钮的active类
+    const allButtons = document.querySelectorAll('.tab-button');
+    allButtons.forEach(button => {
+        button.classList.remove('active');
+    });
+
+    // 显示选中的标签页
+    document.getElementById(`tab-${tabName}`).classList.add('active');
+    event.target.classList.add('active');
+
+    // 保存当前标签到localStorage
+    localStorage.setItem(tabStorageKey(), tabName);
+}
+
+// 页面加载时恢复上次选择的标签
+window.addEventListener('DOMContentLoaded', function() {
+    const savedTab = localStorage.getItem(tabStorageKey());
+    if (savedTab) {
+        const tabButton = document.querySelector(`.tab-button[onclick="switchTab('${savedTab}')"]`);
+        if (tabButton) {
+            document.querySelector('.tab-content.active').classList.remove('active');
+            document.querySelector('.tab-button.active').classList.remove('active');
+            document.getElementById(`tab-${savedTab}`).classList.add('active');
+            tabButton.classList.add('active');
+        }
+    }
+});
@@ -1,14 +1,100 @@
 # -*- coding: utf-8 -*-
 """
 模板加载器 - 用于加载HTML模板和CSS文件
+
+模板在进程内只解析一次：str.format 格式的模板被拆成 (字面文本, 字段) 片段序列，
+渲染时按顺序把片段直接写入输出文件，不再先拼出完整页面字符串。
+文件修改时间变化后缓存自动失效。
+
+CSS/JS 不再内联到页面中，而是以带内容指纹的文件名（如 m_league.3f2a9c1b0d.css）
+发布到 docs/assets/ 下，由各页面通过 <link>/<script src> 引用，浏览器和CDN可以跨页面、跨构建缓存。
 """
 
 import os
+import re
+from string import Formatter
+
+from utils.file_cache import hash_bytes
 
 # 模板和CSS文件的基础路径
 TEMPLATE_DIR = os.path.dirname(os.path.abspath(__file__))
 HTML_DIR = os.path.join(TEMPLATE_DIR, 'html')
 CSS_DIR = os.path.join(TEMPLATE_DIR, 'css')
+JS_DIR = os.path.join(TEMPLATE_DIR, 'js')
+
+# 静态资源的输出目录（相对构建时的工作目录）和页面中引用时的目录
+ASSET_OUTPUT_DIR = os.path.join('docs', 'assets')
+ASSET_URL_DIR = 'assets'
+
+# 进程内缓存：{文件路径: (修改时间, 内容)}
+_file_cache = {}
+_compiled_cache = {}
+# 已发布的静态资源：{资源名: (源内容, 指纹文件名)}
+_published_assets = {}
+
+
+def _read_cached(path, kind):
+    """读取文件内容，按修改时间缓存"""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"{kind}文件不存在: {path}")
+
+    cached = _file_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    _file_cache[path] = (mtime, content)
+    return content
+
+
+class CompiledTemplate:
+    """
+    预编译的HTML模板
+
+    与 str.format 使用相同的语法（{name}、{{ }} 转义、格式说明符），
+    渲染结果与 template.format(**kwargs) 完全一致
+    """
+
+    __slots__ = ('name', 'parts')
+
+    def __init__(self, name, source):
+        self.name = name
+        # [(字面文本, 字段名或None, 格式说明符, 转换标志), ...]
+        self.parts = [
+            (literal, field, spec or '', conversion)
+            for literal, field, spec, conversion in Formatter().parse(source)
+        ]
+
+    def iter_render(self, kwargs):
+        """按顺序生成渲染后的片段"""
+        for literal, field, spec, conversion in self.parts:
+            if literal:
+                yield literal
+            if field is None:
+                continue
+            if field not in kwargs:
+                raise KeyError(field)
+            value = kwargs[field]
+            if conversion == 'r':
+                value = repr(value)
+            elif conversion == 's':
+                value = str(value)
+            elif conversion == 'a':
+                value = ascii(value)
+            yield value if (not spec and isinstance(value, str)) else format(value, spec)
+
+    def render(self, **kwargs):
+        """渲染为字符串"""
+        return ''.join(self.iter_render(kwargs))
+
+    def stream(self, out, **kwargs):
+        """渲染并逐段写入 out（任何带 write 方法的对象）"""
+        write = out.write
+        for fragment in self.iter_render(kwargs):
+            write(fragment)
 
 
 def load_html_template(template_name):
@@ -21,12 +107,7 @@ def load_html_template(template_name):
     Returns:
         str: 模板内容
     """
-    template_path = os.path.join(HTML_DIR, template_name)
-    try:
-        with open(template_path, 'r', encoding='utf-8') as f:
-            return f.read()
-    except FileNotFoundError:
-        raise FileNotFoundError(f"模板文件不存在: {template_path}")
+    return _read_cached(os.path.join(HTML_DIR, template_name), '模板')
 
 
 def load_css(css_name):
@@ -39,33 +120,117 @@ def load_css(css_name):
     Returns:
         str: CSS内容
     """
-    css_path = os.path.join(CSS_DIR, css_name)
-    try:
-        with open(css_path, 'r', encoding='utf-8') as f:
-            return f.read()
-    except FileNotFoundError:
-        raise FileNotFoundError(f"CSS文件不存在: {css_path}")
+    return _read_cached(os.path.join(CSS_DIR, css_name), 'CSS')
+
+
+def load_js(js_name):
+    """
+    加载JS文件
+
+    Args:
+        js_name: JS文件名 (如 'league_tabs.js')
+
+    Returns:
+        str: JS内容
+    """
+    return _read_cached(os.path.join(JS_DIR, js_name), 'JS')
+
+
+def publish_asset(asset_name):
+    """
+    把CSS/JS发布为带内容指纹的静态文件（内容不变时不会重复写入）
+
+    同名资源的旧指纹文件会被删除
+
+    Args:
+        asset_name: 资源文件名 (如 'm_league.css'、'league_tabs.js')
+
+    Returns:
+        str: 发布后的文件名 (如 'm_league.3f2a9c1b0d.css')
+    """
+    stem, ext = os.path.splitext(asset_name)
+    content = load_css(asset_name) if ext == '.css' else load_js(asset_name)
+
+    cached = _published_assets.get(asset_name)
+    if cached is not None and cached[0] is content:
+        return cached[1]
+
+    digest = hash_bytes(content.encode('utf-8'))[:10]
+    filename = f"{stem}.{digest}{ext}"
+    path = os.path.join(ASSET_OUTPUT_DIR, filename)
+    if not os.path.exists(path):
+        os.makedirs(ASSET_OUTPUT_DIR, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+        # 清理同名资源的旧版本，连同输出阶段生成的 .gz/.br 预压缩副本
+        old_version = re.compile(re.escape(stem) + r'\.([0-9a-f]{10})' + re.escape(ext) + r'(\..*)?$')
+        for old in os.listdir(ASSET_OUTPUT_DIR):
+            match = old_version.match(old)
+            if match and match.group(1) != digest:
+                os.remove(os.path.join(ASSET_OUTPUT_DIR, old))
+
+    _published_assets[asset_name] = (content, filename)
+    return filename
+
+
+def asset_url(asset_name, prefix=''):
+    """
+    获取静态资源在页面中的引用URL（首次调用时发布该资源）
+
+    Args:
+        asset_name: 资源文件名 (如 'm_league.css')
+        prefix: 页面到 docs/ 根目录的相对路径前缀 (如 S-League 子目录中的页面为 '../')
+
+    Returns:
+        str: 引用URL (如 'assets/m_league.3f2a9c1b0d.css')
+    """
+    return f"{prefix}{ASSET_URL_DIR}/{publish_asset(asset_name)}"
+
+
+def get_template(template_name):
+    """
+    获取预编译的模板（每个进程只解析一次）
+
+    Args:
+        template_name: 模板文件名 (如 'm_league.html')
+
+    Returns:
+        CompiledTemplate: 预编译的模板
+    """
+    source = load_html_template(template_name)
+    cached = _compiled_cache.get(template_name)
+    if cached is not None and cached[0] is source:
+        return cached[1]
+
+    compiled = CompiledTemplate(template_name, source)
+    _compiled_cache[template_name] = (source, compiled)
+    return compiled
 
 
-def render_template(template_name, css_name=None, **kwargs):
+def render_template(template_name, css_name=None, out=None, asset_prefix='', **kwargs):
     """
     渲染模板
 
     Args:
         template_name: HTML模板文件名
-        css_name: CSS文件名 (可选,如果指定则会加载CSS并注入到模板中)
+        css_name: CSS文件名 (可选,如果指定则会发布CSS文件并把引用URL作为 css_href 注入到模板中)
+        out: 输出文件对象 (可选,指定后逐段写入该对象并返回None)
+        asset_prefix: 页面到 docs/ 根目录的相对路径前缀 (见 asset_url)
         **kwargs: 模板变量
 
     Returns:
-        str: 渲染后的HTML
+        str: 渲染后的HTML (指定 out 时返回None)
     """
-    # 加载HTML模板
-    html_template = load_html_template(template_name)
+    template = get_template(template_name)
 
-    # 如果指定了CSS文件,加载CSS内容
+    # 如果指定了CSS文件,发布为指纹文件并注入引用URL
     if css_name:
-        css_content = load_css(css_name)
-        kwargs['css_content'] = css_content
+        kwargs['css_href'] = asset_url(css_name, asset_prefix)
 
-    # 渲染模板
-    return html_template.format(**kwargs)
+    if out is not None:
+        template.stream(out, **kwargs)
+        return None
+    return template.render(**kwargs)
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+页面构建依赖图
+
+每个页面声明自己读取的输入：
+- corpus: 页面读取的牌谱文件夹（内容指纹来自牌谱清单，不需要重新读取牌谱）
+- aliases / honor / translations: 玩家别名、荣誉牌谱判定、界面翻译（按文件内容计算指纹）
+- code / templates: 生成该页面的代码模块，以及它的 HTML 模板和 CSS/JS
+  （按文件内容计算指纹；与页面无关的代码，例如印度扑克服务器，不会让页面重新生成）
+
+构建清单（.cache/build_manifest.json）记录每个页面上次生成时的输入指纹和输出文件状态；
+输入指纹都没有变化、输出文件也没有缺失或被改动的页面在下次构建时跳过。
+"""
+
+import os
+import glob
+
+from utils.file_cache import cache_path, content_hash, hash_bytes, load_json_cache, save_json_cache
+
+BUILD_MANIFEST_FILE = cache_path('build_manifest.json')
+BUILD_MANIFEST_VERSION = 1
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# 多个页面共用的非牌谱输入 → 文件（相对于仓库根目录的 glob）
+SOURCE_INPUTS = {
+    'aliases': ('src/player_aliases.json',),
+    'honor': ('src/extract_honor_games.py', 'src/mahjong_hand_analyzer.py'),
+    'translations': ('src/config/translations.py',),
+}
+
+# 读取牌谱的页面都依赖的输入
+DATA_PAGE_INPUTS = ('aliases', 'honor', 'translations')
+
+# 页面的生成代码（相对于仓库根目录的 glob）
+# 所有页面：构建入口、页面生成器、模板加载和构建工具
+CORE_CODE = ('src/generate_website.py', 'src/generators/__init__.py', 'src/generators/page_generators.py',
+             'src/templates/*.py', 'src/utils/*.py', 'src/config/__init__.py')
+# 读取牌谱并统计
+LOG_CODE = ('src/summarize_v23.py', 'src/batch_summarize_v23.py', 'src/player_stats.py')
+# 联赛标签页的内容（排名、统计、荣誉牌谱、牌谱列表）
+LEAGUE_TABS_CODE = ('src/generators/content_generators.py', 'src/generate_m_league_tabs.py')
+S_LEAGUE_CODE = ('src/s_league/*.py',)
+
+LEAGUE_PAGE_CODE = CORE_CODE + LOG_CODE + LEAGUE_TABS_CODE
+
+
+def _page_templates(*names, js=()):
+    """页面的 HTML 模板和同名 CSS，以及用到的 JS"""
+    return (tuple(f'src/templates/html/{name}.html' for name in names)
+            + tuple(f'src/templates/css/{name}.css' for name in names)
+            + tuple(f'src/templates/js/{name}.js' for name in js))
+
+# 页面 → 所属的页面分组（generate_website.PAGE_SECTIONS）、读取的牌谱文件夹、其他输入和输出文件
+# S-League 的赛季页面按配置中启用的赛季生成，见 page_graph()
+PAGES = {
+    'index': {
+        'section': 'index',
+        'corpus': (),
+        'inputs': ('translations',),
+        'code': CORE_CODE,
+        'templates': _page_templates('index'),
+        'outputs': ('docs/index.html', 'docs/index-en.html'),
+    },
+    'm-league': {
+        'section': 'm-league',
+        'corpus': ('game-logs/m-league',),
+        'inputs': DATA_PAGE_INPUTS,
+        'code': LEAGUE_PAGE_CODE,
+        'templates': _page_templates('m_league', js=('league_tabs',)),
+        'outputs': ('docs/m-league.html', 'docs/m-league-en.html', 'docs/honor_games.json',
+                    'docs/games/m-league/*.json'),
+    },
+    'ema': {
+        'section': 'ema',
+        'corpus': ('game-logs/ema',),
+        'inputs': DATA_PAGE_INPUTS,
+        'code': LEAGUE_PAGE_CODE,
+        # 没有牌谱时生成 ema 占位页面
+        'templates': _page_templates('m_league', 'ema', js=('league_tabs',)),
+        'outputs': ('docs/ema.html', 'docs/ema-en.html', 'docs/games/ema/*.json'),
+    },
+    'sanma': {
+        'section': 'sanma',
+        'corpus': ('game-logs/sanma',),
+        'inputs': DATA_PAGE_INPUTS,
+        'code': CORE_CODE + LOG_CODE,
+        'templates': _page_templates('sanma_honor'),
+        'outputs': ('docs/sanma-honor.html', 'docs/sanma-honor-en.html'),
+    },
+}
+
+
+def page_graph():
+    """
+    完整的依赖图
+
+    Returns:
+        dict: {页面: {'section', 'season', 'corpus', 'inputs', 'code', 'templates', 'outputs'}}；
+              S-League 主页为 's-league'（读取所有赛季的牌谱），赛季页面为 's-league/<赛季ID>'
+    """
+    from s_league.config import SEASONS
+
+    s_league_code = LEAGUE_PAGE_CODE + S_LEAGUE_CODE
+    s_league_templates = _page_templates('s_league', js=('league_tabs',))
+    graph = {page: dict(spec, season=None) for page, spec in PAGES.items()}
+    season_pages = {}
+    for season_id, season_info in SEASONS.items():
+        if not season_info['enabled']:
+            continue
+        season_pages[f's-league/{season_id}'] = {
+            'section': 's-league',
+            'season': season_id,
+            'corpus': tuple(f for f in (season_info['data_folder'], season_info.get('finals_folder')) if f),
+            'inputs': DATA_PAGE_INPUTS,
+            'code': s_league_code,
+            'templates': s_league_templates,
+            'outputs': (f'docs/s-league/{season_id}.html', f'docs/s-league/{season_id}-en.html'),
+        }
+    graph['s-league'] = {
+        'section': 's-league',
+        'season': None,
+        'corpus': tuple(folder for spec in season_pages.values() for folder in spec['corpus']),
+        'inputs': DATA_PAGE_INPUTS,
+        'code': s_league_code,
+        'templates': s_league_templates,
+        'outputs': ('docs/s-league/index.html', 'docs/s-league/index-en.html'),
+    }
+    graph.update(season_pages)
+    return graph
+
+
+def _expand(patterns):
+    return {path for pattern in patterns for path in glob.glob(os.path.join(REPO_ROOT, pattern))}
+
+
+def _files_fingerprint(paths):
+    lines = [f"{os.path.relpath(path, REPO_ROOT)}:{content_hash(path)}" for path in sorted(paths) if os.path.isfile(path)]
+    return hash_bytes('\n'.join(lines).encode('utf-8'))
+
+
+def source_fingerprints():
+    """共用的非牌谱输入的指纹 {输入名: 指纹}"""
+    return {name: _files_fingerprint(_expand(patterns)) for name, patterns in SOURCE_INPUTS.items()}
+
+
+def corpus_fingerprint(manifest, folders):
+    """牌谱文件夹的内容指纹（来自牌谱清单中的路径和内容哈希）"""
+    lines = [f"{record['path']}:{record['content_hash']}"
+             for folder in folders for record in manifest.records(folder=folder)]
+    return hash_bytes('\n'.join(lines).encode('utf-8'))
+
+
+def output_state(patterns):
+    """输出文件的 {路径: [修改时间, 大小]}（路径相对于当前目录，即仓库根目录）"""
+    state = {}
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            st = os.stat(path)
+            state[path] = [st.st_mtime_ns, st.st_size]
+    return state
+
+
+class BuildManifest:
+    """上次生成各页面时的输入指纹和输出文件状态"""
+
+    def __init__(self, path=BUILD_MANIFEST_FILE):
+        self.path = path
+        self.graph = page_graph()
+        self.recorded = load_json_cache(path, BUILD_MANIFEST_VERSION)
+        self.fingerprints = {}
+
+    def compute(self, manifest=None):
+        """
+        计算各页面当前的输入指纹
+
+        Args:
+            manifest: 牌谱清单（默认使用进程内共享的清单；常驻进程需要先自行更新）
+        """
+        if manifest is None:
+            from utils.corpus_manifest import get_manifest
+            manifest = get_manifest()
+        sources = source_fingerprints()
+        corpus = {}
+        files = {}
+        self.fingerprints = {}
+        for page, spec in self.graph.items():
+            inputs = {name: sources[name] for name in spec['inputs']}
+            for name in ('code', 'templates'):
+                if spec[name] not in files:
+                    files[spec[name]] = _files_fingerprint(_expand(spec[name]))
+                inputs[name] = files[spec[name]]
+            if spec['corpus']:
+                if spec['corpus'] not in corpus:
+                    corpus[spec['corpus']] = corpus_fingerprint(manifest, spec['corpus'])
+                inputs['corpus'] = corpus[spec['corpus']]
+            self.fingerprints[page] = inputs
+        return self.fingerprints
+
+    def stale_pages(self, manifest=None):
+        """
+        需要重新生成的页面
+
+        Returns:
+            dict: {页面: 原因}（按依赖图中的顺序）
+        """
+        self.compute(manifest)
+        stale = {}
+        for page, spec in self.graph.items():
+            entry = self.recorded.get(page)
+            if entry is None:
+                stale[page] = "没有构建记录"
+                continue
+            changed = [name for name, value in self.fingerprints[page].items() if entry['inputs'].get(name) != value]
+            if changed:
+                stale[page] = f"输入变化: {', '.join(changed)}"
+            elif output_state(spec['outputs']) != entry['outputs']:
+                stale[page] = "输出文件缺失或被修改"
+        return stale
+
+    def record(self, pages, failed=()):
+        """
+        记录这些页面已按 compute() 时的输入生成（在输出后处理之后调用），并保存构建清单
+
+        Args:
+            pages: 已生成的页面
+            failed: 生成失败的页面（删除原有记录，下次构建时一定重新生成）
+        """
+        for page in failed:
+            self.recorded.pop(page, None)
+        for page in pages:
+            self.recorded[page] = {
+                'inputs': self.fingerprints[page],
+                'outputs': output_state(self.graph[page]['outputs']),
+            }
+        # 已停用的赛季等不再属于依赖图的页面
+        for page in [page for page in self.recorded if page not in self.graph]:
+            del self.recorded[page]
+        save_json_cache(self.path, self.recorded, BUILD_MANIFEST_VERSION)
@@ -0,0 +1,443 @@
+# -*- coding: utf-8 -*-
+"""
+牌谱清单（SQLite）
+
+game-logs/ 下每个牌谱文件一行：路径、联赛、赛季、时间戳、牌谱编号(ref)、
+玩家（主ID）、局数、内容哈希和校验状态。清单存放在 .cache/corpus_manifest.sqlite，
+按 (修改时间, 大小) 增量更新：未变的文件只做一次 stat，新文件和修改过的文件才读取解析，
+已删除或被移走的文件从清单中删除。
+
+各工具通过 manifest_files() 获取文件列表，不再各自遍历目录。
+
+用法：
+  python -m utils.corpus_manifest            # 更新清单并打印统计
+  python -m utils.corpus_manifest --league s-league --season s0
+"""
+
+import os
+import sys
+import json
+import sqlite3
+
+from utils.file_cache import cache_path, hash_bytes, content_hash
+from utils.helpers import parse_title_timestamp
+
+MANIFEST_FILE = cache_path('corpus_manifest.sqlite')
+MANIFEST_VERSION = 1
+
+# 牌谱根目录（仓库根目录/game-logs）
+GAME_LOGS_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'game-logs'))
+
+# 有赛季子目录的联赛（game-logs/<联赛>/<赛季>/...）
+SEASON_LEAGUES = ('s-league',)
+
+# 校验状态
+STATUS_OK = 'ok'
+STATUS_INVALID_JSON = 'invalid_json'      # 无法读取或不是合法JSON
+STATUS_MISSING_FIELDS = 'missing_fields'  # 缺少 title/name/log 等必要字段
+STATUS_BAD_TIMESTAMP = 'bad_timestamp'    # title[1] 时间戳格式错误
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS logs (
+    path TEXT PRIMARY KEY,      -- 相对 game-logs/ 的路径（'/' 分隔）
+    league TEXT,
+    season TEXT,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    timestamp TEXT,             -- ISO 格式
+    ref TEXT,
+    names TEXT,                 -- 牌谱中的原始玩家名（JSON 列表）
+    players TEXT,               -- 玩家主ID（JSON 列表）
+    round_count INTEGER,
+    content_hash TEXT,
+    status TEXT NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS logs_league ON logs (league, season);
+"""
+
+_COLUMNS = ('path', 'league', 'season', 'mtime_ns', 'size', 'timestamp', 'ref',
+            'names', 'players', 'round_count', 'content_hash', 'status', 'error')
+
+_manifest = None
+
+
+def _load_alias_map():
+    """别名->主ID 映射；summarize_v23 不可用时不做转换"""
+    try:
+        from summarize_v23 import load_player_aliases
+    except ImportError:
+        return {}
+    return load_player_aliases()
+
+
+def _alias_fingerprint():
+    """别名配置文件的哈希，别名变化时需要重新计算所有记录的主ID"""
+    alias_file = os.path.join(os.path.dirname(__file__), '..', 'player_aliases.json')
+    try:
+        return content_hash(alias_file)
+    except OSError:
+        return ''
+
+
+def _league_and_season(rel_path):
+    """从相对路径推断联赛和赛季"""
+    parts = rel_path.split('/')
+    if len(parts) < 2:
+        return None, None
+    league = parts[0]
+    season = parts[1] if league in SEASON_LEAGUES and len(parts) > 2 else None
+    return league, season
+
+
+def _walk_json_files(root):
+    """
+    遍历目录下的所有 *.json 文件，返回 {相对路径: stat结果}
+
+    与 glob 一致，跳过以 '.' 开头的文件和目录
+    """
+    found = {}
+    stack = ['']
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            it = os.scandir(os.path.join(root, rel_dir) if rel_dir else root)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.name.startswith('.'):
+                    continue
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    if entry.is_dir():
+                        stack.append(rel)
+                    elif entry.name.endswith('.json') and entry.is_file():
+                        found[rel] = entry.stat()
+                except OSError:
+                    continue
+    return found
+
+
+def describe_log(raw, alias_map):
+    """
+    解析一个牌谱文件的内容，返回清单字段
+
+    Args:
+        raw: 文件内容（字节串）
+        alias_map: 别名->主ID 映射
+
+    Returns:
+        dict: timestamp/ref/names/players/round_count/content_hash/status/error
+    """
+    record = {
+        'timestamp': None, 'ref': None, 'names': None, 'players': None,
+        'round_count': None, 'content_hash': hash_bytes(raw),
+        'status': STATUS_OK, 'error': None,
+    }
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        record.update(status=STATUS_INVALID_JSON, error=f"JSON解析失败: {e}")
+        return record
+    if not isinstance(data, dict):
+        record.update(status=STATUS_INVALID_JSON, error="顶层不是JSON对象")
+        return record
+
+    ref = data.get('ref')
+    record['ref'] = ref if isinstance(ref, str) else None
+
+    names = data.get('name')
+    if isinstance(names, list):
+        record['names'] = json.dumps(names, ensure_ascii=False)
+        record['players'] = json.dumps([alias_map.get(n, n) for n in names], ensure_ascii=False)
+
+    rounds = data.get('log')
+    if isinstance(rounds, list):
+        record['round_count'] = len(rounds)
+
+    missing = [k for k, ok in (('name', isinstance(names, list)), ('log', isinstance(rounds, list))) if not ok]
+    title = data.get('title')
+    if not (isinstance(title, list) and len(title) > 1 and isinstance(title[1], str)):
+        missing.insert(0, 'title')
+    if missing:
+        record.update(status=STATUS_MISSING_FIELDS, error=f"缺少字段: {', '.join(missing)}")
+        return record
+
+    try:
+        record['timestamp'] = parse_title_timestamp(title[1]).isoformat()
+    except (ValueError, IndexError) as e:
+        record.update(status=STATUS_BAD_TIMESTAMP, error=f"时间戳格式错误: {e}")
+    return record
+
+
+class CorpusManifest:
+    """game-logs/ 的 SQLite 清单"""
+
+    def __init__(self, db_path=MANIFEST_FILE, root=GAME_LOGS_ROOT):
+        self.db_path = db_path
+        self.root = root
+        self._conn = self._connect()
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        try:
+            conn = self._open()
+        except sqlite3.DatabaseError:
+            # 清单损坏：删除后重建（只是缓存，可以从牌谱完整恢复）
+            os.remove(self.db_path)
+            conn = self._open()
+        return conn
+
+    def _open(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        conn.executescript(_SCHEMA)
+        if self._meta(conn, 'version') != str(MANIFEST_VERSION):
+            conn.execute("DELETE FROM logs")
+            self._set_meta(conn, 'version', str(MANIFEST_VERSION))
+            conn.commit()
+        return conn
+
+    @staticmethod
+    def _meta(conn, key):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_meta(conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def refresh(self):
+        """
+        按文件系统更新清单
+
+        Returns:
+            dict: {'added': n, 'updated': n, 'removed': n, 'unchanged': n}
+        """
+        conn = self._conn
+        stats = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0}
+        known = {row[0]: (row[1], row[2]) for row in conn.execute("SELECT path, mtime_ns, size FROM logs")}
+        found = _walk_json_files(self.root)
+
+        alias_map = None
+        rows = []
+        for rel, st in found.items():
+            old = known.get(rel)
+            if old == (st.st_mtime_ns, st.st_size):
+                stats['unchanged'] += 1
+                continue
+            if alias_map is None:
+                alias_map = _load_alias_map()
+            try:
+                with open(os.path.join(self.root, rel), 'rb') as f:
+                    raw = f.read()
+            except OSError as e:
+                record = {'timestamp': None, 'ref': None, 'names': None, 'players': None,
+                          'round_count': None, 'content_hash': None,
+                          'status': STATUS_INVALID_JSON, 'error': f"读取失败: {e}"}
+            else:
+                record = describe_log(raw, alias_map)
+            league, season = _league_and_season(rel)
+            record.update(path=rel, league=league, season=season, mtime_ns=st.st_mtime_ns, size=st.st_size)
+            rows.append(tuple(record[c] for c in _COLUMNS))
+            stats['added' if old is None else 'updated'] += 1
+
+        removed = [(rel,) for rel in known if rel not in found]
+        stats['removed'] = len(removed)
+
+        with conn:
+            if rows:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO logs ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                    rows)
+            if removed:
+                conn.executemany("DELETE FROM logs WHERE path = ?", removed)
+            self._refresh_players(conn, alias_map)
+        return stats
+
+    def _refresh_players(self, conn, alias_map):
+        """别名配置变化时，用记录中的原始玩家名重新计算主ID（不需要重新读取牌谱）"""
+        fingerprint = _alias_fingerprint()
+        if self._meta(conn, 'aliases') == fingerprint:
+            return
+        if alias_map is None:
+            alias_map = _load_alias_map()
+        updates = []
+        for row in conn.execute("SELECT path, names FROM logs WHERE names IS NOT NULL"):
+            names = json.loads(row[1])
+            updates.append((json.dumps([alias_map.get(n, n) for n in names], ensure_ascii=False), row[0]))
+        conn.executemany("UPDATE logs SET players = ? WHERE path = ?", updates)
+        self._set_meta(conn, 'aliases', fingerprint)
+
+    def _relative_folder(self, folder):
+        """调用方给出的文件夹 → 相对 game-logs/ 的前缀；不在 game-logs/ 下时返回None"""
+        rel = os.path.relpath(os.path.abspath(folder), self.root)
+        if rel == '.':
+            return ''
+        if rel == '..' or rel.startswith('..' + os.sep) or os.path.isabs(rel):
+            return None
+        return rel.replace(os.sep, '/')
+
+    def records(self, folder=None, league=None, season=None, status=None):
+        """
+        查询清单记录
+
+        Args:
+            folder: 只返回该文件夹（递归）下的记录
+            league / season / status: 按字段过滤
+
+        Returns:
+            list[dict]: 按路径排序的记录，players/names 已解析为列表
+        """
+        clauses, params = [], []
+        if folder is not None:
+            prefix = self._relative_folder(folder)
+            if prefix is None:
+                return []
+            if prefix:
+                clauses.append("substr(path, 1, ?) = ?")
+                params += [len(prefix) + 1, prefix + '/']
+        for column, value in (('league', league), ('season', season), ('status', status)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        sql = "SELECT * FROM logs"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY path"
+
+        result = []
+        for row in self._conn.execute(sql, params):
+            record = dict(row)
+            for key in ('names', 'players'):
+                if record[key] is not None:
+                    record[key] = json.loads(record[key])
+            result.append(record)
+        return result
+
+    def files(self, folder, recursive=True):
+        """
+        列出文件夹下的牌谱文件
+
+        返回的路径以调用方给出的 folder 为前缀（与 glob/os.walk 的结果一致），按路径排序；
+        folder 不在 game-logs/ 下时返回None
+        """
+        prefix = self._relative_folder(folder)
+        if prefix is None:
+            return None
+        start = len(prefix) + 1 if prefix else 0
+        sql = "SELECT path FROM logs"
+        params = []
+        if prefix:
+            sql += " WHERE substr(path, 1, ?) = ?"
+            params = [start, prefix + '/']
+        sql += " ORDER BY path"
+
+        files = []
+        for (path,) in self._conn.execute(sql, params):
+            sub = path[start:]
+            if not recursive and '/' in sub:
+                continue
+            files.append(os.path.join(folder, *sub.split('/')))
+        return files
+
+    def content_hashes(self, folder):
+        """{调用方路径: 内容哈希}，供按内容哈希缓存的工具跳过读取文件"""
+        prefix = self._relative_folder(folder)
+        if prefix is None:
+            return {}
+        start = len(prefix) + 1 if prefix else 0
+        return {
+            os.path.join(folder, *record['path'][start:].split('/')): record['content_hash']
+            for record in self.records(folder=folder)
+            if record['content_hash']
+        }
+
+    def close(self):
+        self._conn.close()
+
+
+def get_manifest():
+    """进程内共享的清单（首次使用时更新一次）"""
+    global _manifest
+    if _manifest is None:
+        manifest = CorpusManifest()
+        manifest.refresh()
+        _manifest = manifest
+    return _manifest
+
+
+def invalidate_manifest():
+    """文件被移动或修改后调用，下次查询时重新更新清单"""
+    global _manifest
+    if _manifest is not None:
+        _manifest.close()
+        _manifest = None
+
+
+def manifest_files(folder, recursive=True):
+    """
+    通过清单列出 folder 下的 *.json 牌谱文件
+
+    folder 不在 game-logs/ 下或清单不可用时返回None，调用方回退到直接遍历目录
+    """
+    if not os.path.isdir(folder):
+        return None
+    try:
+        return get_manifest().files(folder, recursive)
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️  牌谱清单不可用，直接遍历目录: {e}", file=sys.stderr)
+        return None
+
+
+def manifest_content_hashes(folder):
+    """通过清单获取 folder 下文件的内容哈希；清单不可用时返回空字典"""
+    if not os.path.isdir(folder):
+        return {}
+    try:
+        return get_manifest().content_hashes(folder)
+    except (sqlite3.Error, OSError):
+        return {}
+
+
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="更新并查询 game-logs/ 的牌谱清单")
+    ap.add_argument("--league", default=None, help="只统计指定联赛（如 m-league、s-league）")
+    ap.add_argument("--season", default=None, help="只统计指定赛季（如 s0）")
+    ap.add_argument("--invalid", action="store_true", help="列出校验未通过的文件")
+    args = ap.parse_args(argv)
+
+    manifest = CorpusManifest()
+    stats = manifest.refresh()
+    print(f"清单: {manifest.db_path}")
+    print(f"新增 {stats['added']}，更新 {stats['updated']}，删除 {stats['removed']}，未变 {stats['unchanged']}")
+
+    records = manifest.records(league=args.league, season=args.season)
+    by_league = {}
+    for record in records:
+        key = record['league'] + (f"/{record['season']}" if record['season'] else '') if record['league'] else '(根目录)'
+        counts = by_league.setdefault(key, {'files': 0, 'rounds': 0, 'invalid': 0})
+        counts['files'] += 1
+        counts['rounds'] += record['round_count'] or 0
+        if record['status'] != STATUS_OK:
+            counts['invalid'] += 1
+    for key in sorted(by_league):
+        counts = by_league[key]
+        print(f"  {key}: {counts['files']} 个文件，{counts['rounds']} 局，校验未通过 {counts['invalid']}")
+
+    if args.invalid:
+        for record in records:
+            if record['status'] != STATUS_OK:
+                print(f"  ❌ {record['path']}: {record['error']}")
+    manifest.close()
+
+
+if __name__ == '__main__':
+    main()
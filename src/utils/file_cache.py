@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+文件缓存辅助函数
+
+按文件内容哈希缓存处理结果，缓存统一存放在仓库根目录的 .cache/ 下
+"""
+
+import os
+import json
+import hashlib
+
+# 缓存目录（仓库根目录/.cache）
+CACHE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '.cache'))
+
+
+def hash_bytes(data):
+    """
+    计算字节串的哈希值（与 content_hash 使用相同算法）
+
+    Args:
+        data: 字节串
+
+    Returns:
+        str: sha1 十六进制摘要
+    """
+    return hashlib.sha1(data).hexdigest()
+
+
+def content_hash(filepath):
+    """
+    计算文件内容的哈希值
+
+    Args:
+        filepath: 文件路径
+
+    Returns:
+        str: 文件内容的 sha1 十六进制摘要
+    """
+    h = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_path(name):
+    """
+    获取缓存文件的完整路径
+
+    Args:
+        name: 缓存文件名 (如 'sc_verified.json')
+
+    Returns:
+        str: 缓存文件路径
+    """
+    return os.path.join(CACHE_DIR, name)
+
+
+def load_json_cache(path, version=1):
+    """
+    加载JSON缓存文件
+
+    缓存文件不存在、损坏或版本不一致时返回空字典（视为缓存失效）
+
+    Args:
+        path: 缓存文件路径
+        version: 期望的缓存格式版本
+
+    Returns:
+        dict: 缓存条目
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if not isinstance(data, dict) or data.get('version') != version:
+        return {}
+    entries = data.get('entries')
+    return entries if isinstance(entries, dict) else {}
+
+
+def save_json_cache(path, entries, version=1):
+    """
+    保存JSON缓存文件（先写临时文件再替换，避免中断时留下损坏的缓存）
+
+    Args:
+        path: 缓存文件路径
+        entries: 缓存条目字典
+        version: 缓存格式版本
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': version, 'entries': entries}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
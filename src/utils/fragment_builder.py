@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+HTML 片段构建器
+
+页面生成中的表格行、选项列表等都是在循环里逐段拼出来的。
+用 `s += fragment` 拼接时每次都可能复制整个已有字符串，数据量增大后耗时按平方增长；
+这里先把片段追加到列表，最后一次性 join，总耗时与输出长度成线性关系。
+"""
+
+
+class FragmentBuilder:
+    """
+    按顺序收集HTML片段，最后一次性拼接
+
+    用法:
+        rows = FragmentBuilder()
+        for item in items:
+            rows.add(f"<tr><td>{item}</td></tr>")
+        html = rows.build()
+    """
+
+    __slots__ = ('_parts',)
+
+    def __init__(self, initial=''):
+        self._parts = [initial] if initial else []
+
+    def add(self, fragment):
+        """追加一个片段，返回自身以便链式调用"""
+        self._parts.append(fragment)
+        return self
+
+    def extend(self, fragments):
+        """按顺序追加多个片段"""
+        self._parts.extend(fragments)
+        return self
+
+    def build(self):
+        """拼接所有片段并返回字符串（结果会被缓存为单个片段）"""
+        parts = self._parts
+        if len(parts) == 1:
+            return parts[0]
+        result = ''.join(parts)
+        self._parts = [result] if result else []
+        return result
+
+    def write_to(self, out):
+        """把所有片段依次写入 out（任何带 write 方法的对象）"""
+        write = out.write
+        for fragment in self._parts:
+            write(fragment)
+
+    def __bool__(self):
+        return any(self._parts)
+
+    def __len__(self):
+        return sum(len(p) for p in self._parts)
@@ -8,6 +8,116 @@ import re
 import json
 from datetime import datetime
 
+from utils.file_cache import cache_path, load_json_cache, save_json_cache
+
+
+# 牌谱时间戳索引：(路径, 修改时间, 大小) → 时间戳，文件未变时排序只需要 stat
+TIMESTAMP_INDEX_FILE = cache_path('file_timestamps.json')
+TIMESTAMP_INDEX_VERSION = 1
+
+# 快速读取时只看文件开头和结尾的这些字节（紧凑格式的 title 在开头，格式化输出的在结尾）
+_TITLE_SCAN_BYTES = 4096
+_TITLE_TIMESTAMP_RE = re.compile(rb'"title"\s*:\s*\[\s*"(?:[^"\\]|\\.)*"\s*,\s*"([^"\\]*)"')
+
+_timestamp_index = None
+_timestamp_index_dirty = False
+
+
+def parse_title_timestamp(timestamp_str):
+    """
+    解析牌谱 title[1] 中的时间戳
+
+    格式："MM/DD/YYYY, HH:MM:SS AM/PM"，或 "DD/MM/YYYY, HH:MM:SS"（24小时制）
+
+    Raises:
+        ValueError: 时间戳格式错误
+    """
+    if timestamp_str[-1] == 'M':
+        return datetime.strptime(timestamp_str, "%m/%d/%Y, %I:%M:%S %p")
+    return datetime.strptime(timestamp_str, "%d/%m/%Y, %H:%M:%S")
+
+
+def _scan_title_timestamp(fp, size):
+    """只读取文件开头和结尾查找 title[1]，找不到时返回None"""
+    with open(fp, 'rb') as f:
+        head = f.read(_TITLE_SCAN_BYTES)
+        match = _TITLE_TIMESTAMP_RE.search(head)
+        if match is None and size > _TITLE_SCAN_BYTES:
+            f.seek(max(size - _TITLE_SCAN_BYTES, _TITLE_SCAN_BYTES))
+            match = _TITLE_TIMESTAMP_RE.search(f.read())
+    return match.group(1).decode('utf-8') if match else None
+
+
+def read_file_timestamp(fp, size=None):
+    """
+    读取牌谱文件的时间戳（json['title'][1]）
+
+    先只扫描文件开头和结尾，找不到时再完整解析JSON
+
+    Returns:
+        tuple: (datetime 或 None, 失败原因 或 None)
+    """
+    try:
+        if size is None:
+            size = os.path.getsize(fp)
+        timestamp_str = _scan_title_timestamp(fp, size)
+        if timestamp_str is None:
+            with open(fp, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            # 获取 title[1] 中的时间戳
+            title = data.get('title', [])
+            if not (isinstance(title, list) and len(title) > 1):
+                return None, "title字段不存在或格式错误"
+            timestamp_str = title[1]
+        return parse_title_timestamp(timestamp_str), None
+    except json.JSONDecodeError as e:
+        return None, f"JSON解析失败: {str(e)}"
+    except ValueError as e:
+        return None, f"时间戳格式错误: {str(e)}"
+    except Exception as e:
+        return None, f"读取失败: {str(e)}"
+
+
+def _get_timestamp_index():
+    global _timestamp_index
+    if _timestamp_index is None:
+        _timestamp_index = load_json_cache(TIMESTAMP_INDEX_FILE, TIMESTAMP_INDEX_VERSION)
+    return _timestamp_index
+
+
+def cached_file_timestamp(fp):
+    """
+    带索引的牌谱时间戳：路径、修改时间和大小都未变时直接返回索引中的时间戳
+
+    Returns:
+        tuple: (datetime 或 None, 失败原因 或 None)
+    """
+    global _timestamp_index_dirty
+    try:
+        st = os.stat(fp)
+    except OSError as e:
+        return None, f"读取失败: {str(e)}"
+
+    index = _get_timestamp_index()
+    key = os.path.abspath(fp)
+    entry = index.get(key)
+    if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+        return datetime.fromisoformat(entry[2]), None
+
+    timestamp, error_reason = read_file_timestamp(fp, st.st_size)
+    if timestamp is not None:
+        index[key] = [st.st_mtime_ns, st.st_size, timestamp.isoformat()]
+        _timestamp_index_dirty = True
+    return timestamp, error_reason
+
+
+def save_timestamp_index():
+    """保存时间戳索引（有新条目时）"""
+    global _timestamp_index_dirty
+    if _timestamp_index_dirty:
+        save_json_cache(TIMESTAMP_INDEX_FILE, _timestamp_index, TIMESTAMP_INDEX_VERSION)
+        _timestamp_index_dirty = False
+
 
 def sort_files_by_date(files):
     """
@@ -18,36 +128,16 @@ def sort_files_by_date(files):
     格式："MM/DD/YYYY, HH:MM:SS AM/PM"
     例如："10/15/2025, 12:25:03 AM"
 
+    时间戳通过 (路径, 修改时间, 大小) 索引缓存在 .cache/file_timestamps.json，
+    未变的文件不需要打开；新文件只读取开头和结尾查找 title，找不到时才完整解析
+
     如果有任何文件缺失时间戳，会抛出ValueError异常并列出所有缺失时间戳的文件
     """
     file_with_dates = []
     files_without_timestamp = []
 
     for fp in files:
-        timestamp = None
-        error_reason = None
-
-        # 尝试从JSON文件中读取时间戳
-        try:
-            with open(fp, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                # 获取 title[1] 中的时间戳
-                title = data.get('title', [])
-                if isinstance(title, list) and len(title) > 1:
-                    timestamp_str = title[1]
-                    # 解析时间戳："MM/DD/YYYY, HH:MM:SS AM/PM"
-                    if timestamp_str[-1] == 'M':
-                        timestamp = datetime.strptime(timestamp_str, "%m/%d/%Y, %I:%M:%S %p")
-                    else:
-                        timestamp = datetime.strptime(timestamp_str, "%d/%m/%Y, %H:%M:%S")
-                else:
-                    error_reason = "title字段不存在或格式错误"
-        except json.JSONDecodeError as e:
-            error_reason = f"JSON解析失败: {str(e)}"
-        except ValueError as e:
-            error_reason = f"时间戳格式错误: {str(e)}"
-        except Exception as e:
-            error_reason = f"读取失败: {str(e)}"
+        timestamp, error_reason = cached_file_timestamp(fp)
 
         # 如果无法从JSON获取时间戳，记录错误
         if timestamp is None:
@@ -59,6 +149,8 @@ def sort_files_by_date(files):
         else:
             file_with_dates.append((fp, timestamp))
 
+    save_timestamp_index()
+
     # 如果有文件缺失时间戳，抛出异常
     if files_without_timestamp:
         error_msg = f"\n{'='*80}\n❌ 错误：发现 {len(files_without_timestamp)} 个牌谱文件缺失时间戳\n{'='*80}\n"
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+进程内牌谱缓存
+
+一次构建中同一个牌谱会被多个阶段读取（联赛统计、荣誉牌谱、各个排行榜……），
+这里把解析后的JSON和内容哈希按 (路径, 修改时间, 大小) 缓存在内存中，
+每个文件只读取和解析一次；常驻构建进程（build_daemon）在多次构建之间也复用这些结果。
+
+返回的牌谱数据在多个阶段之间共用，调用方只读不写。
+"""
+
+import os
+import json
+
+from utils.file_cache import hash_bytes
+
+# {绝对路径: (修改时间, 大小, 牌谱数据, 内容哈希)}
+_logs = {}
+
+
+def read_log(filepath):
+    """
+    读取并解析牌谱文件
+
+    Args:
+        filepath: 牌谱路径
+
+    Returns:
+        tuple: (牌谱数据, 文件内容哈希)
+
+    Raises:
+        OSError: 文件无法读取
+        ValueError: 不是合法的JSON
+    """
+    key = os.path.abspath(filepath)
+    st = os.stat(key)
+    cached = _logs.get(key)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2], cached[3]
+
+    with open(key, 'rb') as f:
+        raw = f.read()
+    data = json.loads(raw)
+    digest = hash_bytes(raw)
+    _logs[key] = (st.st_mtime_ns, st.st_size, data, digest)
+    return data, digest
+
+
+def load_log(filepath):
+    """读取并解析牌谱文件（只需要数据时使用）"""
+    return read_log(filepath)[0]
+
+
+def forget_missing():
+    """丢弃已不存在的文件的缓存（常驻进程在文件被移动或删除后调用）"""
+    for key in [key for key in _logs if not os.path.exists(key)]:
+        del _logs[key]
+
+
+def log_cache_info():
+    """缓存状态: {'files': 缓存的牌谱数}"""
+    return {'files': len(_logs)}
@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+"""
+输出后处理阶段
+
+页面渲染写入 docs/ 之后执行：
+- 压缩 HTML / CSS / JS（只去掉注释和多余空白，字符串、模板字符串、正则字面量和内嵌JSON原样保留）
+- 为每个文件生成 .gz（以及安装了 brotli 时的 .br）预压缩副本，供支持的静态托管直接返回
+- 统计每个文件处理前后的大小，作为页面体积指标输出并保存
+"""
+
+import os
+import re
+import sys
+import gzip
+
+from utils.file_cache import cache_path, load_json_cache, save_json_cache
+
+# brotli 为可选依赖，未安装时只生成 .gz
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 体积报告保存位置
+SIZE_REPORT_PATH = cache_path('page_sizes.json')
+
+# 需要生成预压缩副本的文件类型
+COMPRESSIBLE_EXTENSIONS = ('.html', '.css', '.js', '.json')
+
+_JS_WORD_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$')
+# 两侧空白可以直接去掉的标点（不含 + - / . < >，避免拼出 ++、//、1.toString、<!-- 之类的新记号）
+_JS_TIGHT_PUNCT = frozenset('{}()[];,:=!&|?*%^~')
+# 换行前后出现这些字符时，去掉换行不会影响自动分号插入
+_JS_NEWLINE_BEFORE_OK = frozenset('{;,([')
+_JS_NEWLINE_AFTER_OK = frozenset('});],')
+# 出现在这些字符或关键字之后的 / 是正则字面量的开始
+_JS_REGEX_AFTER = frozenset('(,=:[!&|?{};+-*%<>~^')
+_JS_REGEX_KEYWORDS = frozenset(('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void', 'throw'))
+
+_CSS_TIGHT_BEFORE = frozenset('{};,')
+_CSS_TIGHT_AFTER = frozenset('{};,:')
+
+_HTML_TOKEN = re.compile(
+    r'(<!--.*?-->)'
+    r'|(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\3\s*>)'
+    r'|(<[^>]*>)',
+    re.S | re.I
+)
+_HTML_SCRIPT_TYPE = re.compile(r'\btype\s*=\s*["\']?([^"\'\s>]+)', re.I)
+_JS_SCRIPT_TYPES = ('', 'text/javascript', 'application/javascript', 'module')
+_WHITESPACE_RUN = re.compile(r'\s+')
+
+
+def _copy_quoted(source, i, quote):
+    """从 source[i]（开引号）开始复制到对应的闭引号，返回 (片段, 结束位置)"""
+    n = len(source)
+    j = i + 1
+    while j < n:
+        ch = source[j]
+        if ch == '\\':
+            j += 2
+            continue
+        if ch == quote or (ch == '\n' and quote != '`'):
+            break
+        j += 1
+    return source[i:j + 1], j + 1
+
+
+def _copy_regex(source, i):
+    """从 source[i]（开头的 /）开始复制一个正则字面量（不含标志），返回 (片段, 结束位置)"""
+    n = len(source)
+    j = i + 1
+    in_class = False
+    while j < n:
+        ch = source[j]
+        if ch == '\\':
+            j += 2
+            continue
+        if ch == '\n':
+            break
+        if in_class:
+            if ch == ']':
+                in_class = False
+        elif ch == '[':
+            in_class = True
+        elif ch == '/':
+            break
+        j += 1
+    return source[i:j + 1], j + 1
+
+
+def minify_js(source):
+    """
+    压缩JS代码：去掉注释，合并空白
+
+    保守处理：字符串、模板字符串和正则字面量原样保留；
+    包含换行的空白只在不影响自动分号插入的位置去掉，否则保留为一个换行
+
+    Args:
+        source: JS源码
+
+    Returns:
+        str: 压缩后的JS
+    """
+    out = []
+    n = len(source)
+    i = 0
+    last = ''          # 最后输出的非空白字符
+    last_word = ''     # 最后输出的标识符/关键字
+    pending = None     # 待输出的空白：None / ' ' / '\n'
+    stack = []         # 花括号栈，'`' 表示模板字符串中的 ${ }
+
+    def flush(next_char):
+        nonlocal pending
+        if pending is not None and last:
+            if pending == '\n':
+                if last not in _JS_NEWLINE_BEFORE_OK and next_char not in _JS_NEWLINE_AFTER_OK:
+                    out.append('\n')
+            elif not (last in _JS_TIGHT_PUNCT or next_char in _JS_TIGHT_PUNCT):
+                out.append(' ')
+        pending = None
+
+    while i < n:
+        ch = source[i]
+
+        if ch in ' \t\r\n\f\v':
+            if ch == '\n':
+                pending = '\n'
+            elif pending is None:
+                pending = ' '
+            i += 1
+            continue
+
+        if ch == '/' and i + 1 < n and source[i + 1] == '/':
+            end = source.find('\n', i)
+            i = n if end == -1 else end
+            continue
+
+        if ch == '/' and i + 1 < n and source[i + 1] == '*':
+            end = source.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            if pending is None:
+                pending = ' '
+            continue
+
+        flush(ch)
+
+        if ch in '"\'':
+            fragment, i = _copy_quoted(source, i, ch)
+            out.append(fragment)
+            last, last_word = ch, ''
+            continue
+
+        if ch == '`' or (ch == '}' and stack and stack[-1] == '`'):
+            if ch == '}':
+                stack.pop()
+            # 复制模板字符串，直到闭合的 ` 或 ${
+            j = i + 1
+            while j < n:
+                c = source[j]
+                if c == '\\':
+                    j += 2
+                    continue
+                if c == '`':
+                    j += 1
+                    break
+                if c == '$' and j + 1 < n and source[j + 1] == '{':
+                    j += 2
+                    stack.append('`')
+                    break
+                j += 1
+            out.append(source[i:j])
+            last, last_word = source[j - 1], ''
+            i = j
+            continue
+
+        if ch == '/' and (not last or last in _JS_REGEX_AFTER or last_word in _JS_REGEX_KEYWORDS):
+            fragment, i = _copy_regex(source, i)
+            out.append(fragment)
+            last, last_word = '/', ''
+            continue
+
+        if ch in _JS_WORD_CHARS:
+            j = i + 1
+            while j < n and source[j] in _JS_WORD_CHARS:
+                j += 1
+            last_word = source[i:j]
+            out.append(last_word)
+            last = source[j - 1]
+            i = j
+            continue
+
+        if ch == '{':
+            stack.append('{')
+        elif ch == '}' and stack:
+            stack.pop()
+        out.append(ch)
+        last, last_word = ch, ''
+        i += 1
+
+    return ''.join(out)
+
+
+def minify_css(source):
+    """
+    压缩CSS：去掉注释，合并空白，去掉 { } ; , : 两侧多余的空白和块末尾的分号
+
+    Args:
+        source: CSS源码
+
+    Returns:
+        str: 压缩后的CSS
+    """
+    out = []
+    n = len(source)
+    i = 0
+    last = ''
+    pending = False
+
+    while i < n:
+        ch = source[i]
+
+        if ch.isspace():
+            pending = True
+            i += 1
+            continue
+
+        if ch == '/' and i + 1 < n and source[i + 1] == '*':
+            end = source.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            pending = True
+            continue
+
+        if pending and last and last not in _CSS_TIGHT_AFTER and ch not in _CSS_TIGHT_BEFORE:
+            out.append(' ')
+        pending = False
+
+        if ch in '"\'':
+            fragment, i = _copy_quoted(source, i, ch)
+            out.append(fragment)
+            last = ch
+            continue
+
+        if ch == '}' and last == ';':
+            out.pop()
+        out.append(ch)
+        last = ch
+        i += 1
+
+    return ''.join(out)
+
+
+def minify_html(source):
+    """
+    压缩HTML
+
+    - 去掉注释（保留 IE 条件注释）
+    - 标签之间的文本：连续空白合并为一个（含换行时保留一个换行）
+    - 标签本身（包括属性值）原样保留
+    - <script> / <style> 内容分别按JS/CSS压缩，非JS类型的 <script>（如 application/json）、
+      <pre>、<textarea> 原样保留
+
+    Args:
+        source: HTML源码
+
+    Returns:
+        str: 压缩后的HTML
+    """
+    out = []
+    text = []   # 尚未输出的文本（被删除的注释两侧的文本要合并后再处理空白）
+    pos = 0
+
+    def flush_text():
+        if text:
+            out.append(_WHITESPACE_RUN.sub(lambda m: '\n' if '\n' in m.group() else ' ', ''.join(text)))
+            text.clear()
+
+    for m in _HTML_TOKEN.finditer(source):
+        text.append(source[pos:m.start()])
+        pos = m.end()
+
+        comment, open_tag, tag_name, body, close_tag, tag = m.groups()
+        if comment is not None:
+            if comment.startswith('<!--[if'):
+                flush_text()
+                out.append(comment)
+            continue
+
+        flush_text()
+        if open_tag is not None:
+            name = tag_name.lower()
+            if name == 'script':
+                type_match = _HTML_SCRIPT_TYPE.search(open_tag)
+                script_type = type_match.group(1).lower() if type_match else ''
+                if script_type in _JS_SCRIPT_TYPES:
+                    body = minify_js(body)
+            elif name == 'style':
+                body = minify_css(body)
+            out.append(open_tag + body + close_tag)
+        else:
+            out.append(tag)
+
+    text.append(source[pos:])
+    flush_text()
+    return ''.join(out).strip() + '\n'
+
+
+_MINIFIERS = {
+    '.html': minify_html,
+    '.css': minify_css,
+    '.js': minify_js,
+}
+
+
+def _write_if_changed(path, data):
+    """内容变化时才写入（避免无谓地更新修改时间）"""
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return
+    except OSError:
+        pass
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def optimize_file(path):
+    """
+    压缩单个输出文件并写出预压缩副本
+
+    Args:
+        path: 文件路径（.html/.css/.js/.json）
+
+    Returns:
+        dict: {'original', 'minified', 'gzip', 'brotli'} 各阶段的字节数（未安装 brotli 时 'brotli' 为 None）
+    """
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, 'rb') as f:
+        raw = f.read()
+
+    data = raw
+    minifier = _MINIFIERS.get(ext)
+    if minifier is not None:
+        data = minifier(raw.decode('utf-8')).encode('utf-8')
+        if data != raw:
+            _write_if_changed(path, data)
+
+    sizes = {'original': len(raw), 'minified': len(data), 'gzip': None, 'brotli': None}
+    if ext in COMPRESSIBLE_EXTENSIONS:
+        # mtime=0 使相同内容的 .gz 字节完全一致
+        gz = gzip.compress(data, compresslevel=9, mtime=0)
+        _write_if_changed(path + '.gz', gz)
+        sizes['gzip'] = len(gz)
+        if brotli is not None:
+            br = brotli.compress(data, quality=11)
+            _write_if_changed(path + '.br', br)
+            sizes['brotli'] = len(br)
+    return sizes
+
+
+def _format_size(num_bytes):
+    if num_bytes is None:
+        return '-'
+    if num_bytes >= 1024 * 1024:
+        return f"{num_bytes / 1024 / 1024:.2f} MB"
+    return f"{num_bytes / 1024:.1f} KB"
+
+
+def optimize_outputs(paths, report_path=SIZE_REPORT_PATH, verbose_paths=None, merge_report=False):
+    """
+    对生成的文件执行输出后处理，并输出/保存体积报告
+
+    Args:
+        paths: 要处理的文件路径列表（只应包含本次构建生成的文件）
+        report_path: 体积报告保存路径（None 则不保存）
+        verbose_paths: 逐个打印体积的文件（默认打印所有 .html 页面），其余文件只计入合计
+        merge_report: 只处理了部分页面时为True，保存时保留报告中其他文件的体积
+
+    Returns:
+        dict: {文件路径: 各阶段字节数}
+    """
+    report = {}
+    for path in paths:
+        if os.path.isfile(path):
+            report[path] = optimize_file(path)
+
+    if verbose_paths is None:
+        verbose_paths = [p for p in report if p.endswith('.html')]
+
+    print("\n输出优化（原始 → 压缩后 / gzip / brotli）:", file=sys.stderr)
+    for path in verbose_paths:
+        sizes = report.get(path)
+        if sizes:
+            print(f"  {path}: {_format_size(sizes['original'])} → {_format_size(sizes['minified'])}"
+                  f" / {_format_size(sizes['gzip'])} / {_format_size(sizes['brotli'])}", file=sys.stderr)
+
+    totals = {key: sum(s[key] or 0 for s in report.values()) for key in ('original', 'minified', 'gzip', 'brotli')}
+    print(f"  合计 {len(report)} 个文件: {_format_size(totals['original'])} → {_format_size(totals['minified'])}"
+          f" / {_format_size(totals['gzip'])}"
+          f" / {_format_size(totals['brotli']) if brotli is not None else '-'}", file=sys.stderr)
+    if brotli is None:
+        print("  (未安装 brotli，仅生成 .gz)", file=sys.stderr)
+
+    if report_path:
+        saved = dict(load_json_cache(report_path), **report) if merge_report else report
+        save_json_cache(report_path, saved)
+    return report
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+牌谱监视模式
+
+监视 game-logs/ 的变化（Linux 上使用 inotify，不可用时定期扫描文件的修改时间和大小），
+一批连续的变化安静下来之后只处理受影响的部分：
+1. 新牌谱：自动分类到联赛文件夹，标准化命名并移动到日期文件夹（只处理发生变化的文件）
+2. 更新牌谱清单，按页面依赖图（utils.build_graph）只重新生成读取的牌谱有变化的联赛/赛季页面；
+   对局总结、荣誉牌谱和统计所用的解析结果都在本进程中按内容缓存，只有新牌谱需要重新计算
+
+只监视牌谱：修改玩家别名后会在下一批牌谱变化时一并生效（重新加载别名表），
+修改了代码或页面模板后请重新启动监视进程。
+
+用法:
+    python3 src/generate_website.py --watch
+    python3 src/watch_logs.py --debounce 5
+    python3 src/watch_logs.py --poll --interval 10   # 不使用 inotify
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import argparse
+import traceback
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(SRC_DIR)
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+# 监视的根目录（相对于仓库根目录，与各工具使用的路径写法一致）
+GAME_LOGS = 'game-logs'
+# 不参与分类和整理的文件夹（errors 中是被剔除的牌谱；三麻和 S-League 的文件夹由人工维护）
+UNMANAGED_FOLDERS = ('errors', 'sanma', 's-league')
+
+# inotify 事件（<sys/inotify.h>）
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+_EVENT = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+class InotifyWatcher:
+    """递归监视目录树（inotify 本身只监视单个目录，新建的子目录在事件中补上监视）"""
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+    def __init__(self, root):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, "inotify 不可用")
+        self._ctypes = ctypes
+        self._libc = libc
+        self._fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            raise self._error("inotify_init1")
+        self.root = root
+        self._dirs = {}  # {监视描述符: 目录路径}
+        try:
+            self._add_tree(root)
+        except OSError:
+            self.close()
+            raise
+
+    def _error(self, what):
+        err = self._ctypes.get_errno()
+        return OSError(err, f"{what}: {os.strerror(err)}")
+
+    def _add_tree(self, path):
+        """监视目录及其子目录，返回其中已有的文件（整体移入的目录不会为这些文件产生事件）"""
+        found = []
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dirpath), self.MASK)
+            if wd < 0:
+                # 通常是超出了 fs.inotify.max_user_watches
+                raise self._error(f"无法监视 {dirpath}")
+            self._dirs[wd] = dirpath
+            found.extend(os.path.join(dirpath, name) for name in filenames)
+        return found
+
+    def _forget_tree(self, path):
+        """目录被移出监视范围时取消其中的监视（移到范围内的另一处时会由 IN_MOVED_TO 重新添加）"""
+        prefix = path + os.sep
+        for wd, dirpath in list(self._dirs.items()):
+            if dirpath == path or dirpath.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._dirs[wd]
+
+    def wait(self, timeout=None):
+        """
+        等待变化
+
+        Args:
+            timeout: 最多等待的秒数（None 表示一直等到有变化）
+
+        Returns:
+            set: 发生变化的路径；事件队列溢出时包含根目录本身（需要全量扫描）
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        data = os.read(self._fd, 64 * 1024)
+
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                changed.add(self.root)
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or name.startswith('.'):
+                continue
+            path = os.path.join(directory, name) if name else directory
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        changed.update(self._add_tree(path))
+                    except OSError as e:
+                        print(f"⚠️  {e}", file=sys.stderr)
+                elif mask & IN_MOVED_FROM:
+                    self._forget_tree(path)
+            changed.add(path)
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    """定期比较文件的修改时间和大小（inotify 不可用或网络文件系统上使用）"""
+
+    def __init__(self, root, interval=2.0):
+        self.root = root
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        entries = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+            for name in filenames:
+                if name.startswith('.'):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries[path] = (st.st_mtime_ns, st.st_size)
+        return entries
+
+    def wait(self, timeout=None):
+        """与 InotifyWatcher.wait 相同（变化最多延迟 interval 秒才被发现）"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            if delay > 0:
+                time.sleep(delay)
+            current = self._scan()
+            changed = {path for path in current.keys() | self._snapshot.keys()
+                       if current.get(path) != self._snapshot.get(path)}
+            self._snapshot = current
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+
+def open_watcher(root, poll=False, interval=2.0):
+    """优先使用 inotify，不可用时退回到定期扫描"""
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(root)
+        except OSError as e:
+            print(f"⚠️  inotify 不可用（{e}），改为每 {interval:g} 秒扫描一次", file=sys.stderr)
+    return PollingWatcher(root, interval)
+
+
+def next_batch(watcher, debounce, max_wait):
+    """
+    等待一批变化：第一个变化之后，直到安静 debounce 秒（最多 max_wait 秒）才返回，
+    下载或复制大量牌谱时合并成一次处理
+    """
+    changed = watcher.wait()
+    deadline = time.monotonic() + max_wait
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        more = watcher.wait(min(debounce, remaining))
+        if not more:
+            break
+        changed |= more
+    return changed
+
+
+class IncrementalBuilder:
+    """在同一进程中处理新牌谱并重新生成受影响的页面（各种缓存在多次构建之间保持热状态）"""
+
+    def organize(self, paths):
+        """
+        对发生变化的牌谱执行自动分类和整理（organize_logs 的各阶段，只处理这些文件）
+
+        Returns:
+            int: 被移动或重命名的文件数
+        """
+        import organize_logs
+
+        if GAME_LOGS in paths:
+            # 事件队列溢出，无法知道哪些文件变化了：整理全部文件夹
+            organize_logs.auto_classify_files()
+            moved = 0
+            for folder in (organize_logs.M_LEAGUE_FOLDER, organize_logs.EMA_FOLDER):
+                moved += (organize_logs.organize_folder(folder) or (0, 0))[0]
+            return moved
+
+        by_folder = {organize_logs.M_LEAGUE_FOLDER: [], organize_logs.EMA_FOLDER: []}
+        moved = 0
+        for path in sorted(paths):
+            if not path.endswith('.json') or not os.path.isfile(path):
+                continue
+            parts = os.path.relpath(path, GAME_LOGS).split(os.sep)
+            if parts[0] in UNMANAGED_FOLDERS:
+                continue
+            status, path = organize_logs.classify_file(path)
+            if status == 'classified':
+                moved += 1
+            if path is None:
+                continue
+            for folder, files in by_folder.items():
+                if path.startswith(folder + os.sep) and not organize_logs.is_standard_filename(os.path.basename(path)):
+                    files.append(path)
+
+        for folder, files in by_folder.items():
+            if files:
+                moved += (organize_logs.organize_files(folder, files) or (0, 0))[0]
+        return moved
+
+    def stale_pages(self):
+        """更新牌谱清单，返回需要重新生成的页面 {页面: 原因}"""
+        from utils.build_graph import BuildManifest
+        from utils.corpus_manifest import get_manifest
+        from utils.log_cache import forget_missing
+        import summarize_v23
+
+        manifest = get_manifest()
+        manifest.refresh()
+        forget_missing()
+        # 别名有修改时依赖图会标记页面过期，同时更新 summarize_v23 在导入时加载的别名表（显示名用）
+        aliases = summarize_v23.load_player_aliases()
+        if aliases != summarize_v23.PLAYER_ALIAS_MAP:
+            summarize_v23.PLAYER_ALIAS_MAP = aliases
+        return BuildManifest().stale_pages(manifest)
+
+    def build(self):
+        """重新生成输入有变化的页面"""
+        import generate_website
+
+        start = time.perf_counter()
+        os.makedirs("docs", exist_ok=True)
+        try:
+            generate_website.main()
+        except Exception:
+            traceback.print_exc()
+            print("❌ 生成失败，下次有变化时重试", file=sys.stderr)
+            return False
+        print(f"✓ 用时 {time.perf_counter() - start:.2f}s", file=sys.stderr)
+        return True
+
+    def process(self, paths):
+        """处理一批变化"""
+        moved = self.organize(paths)
+        if not self.stale_pages():
+            # 通常是上一批整理移动文件产生的事件
+            if moved:
+                print("页面读取的牌谱没有变化，不需要重新生成", file=sys.stderr)
+            return
+        print(f"\n[{time.strftime('%H:%M:%S')}] 牌谱有变化", file=sys.stderr)
+        self.build()
+
+
+def watch(debounce=2.0, max_wait=30.0, poll=False, interval=2.0):
+    """监视 game-logs/ 并增量重新生成网站（Ctrl+C 退出）"""
+    os.chdir(REPO_ROOT)
+    watcher = open_watcher(GAME_LOGS, poll=poll, interval=interval)
+    mode = "inotify" if isinstance(watcher, InotifyWatcher) else f"每 {interval:g} 秒扫描"
+    builder = IncrementalBuilder()
+    try:
+        # 启动时先补上监视进程没有运行期间的变化
+        if builder.stale_pages():
+            builder.build()
+        print(f"\n👀 正在监视 {GAME_LOGS}/（{mode}，安静 {debounce:g} 秒后处理），Ctrl+C 退出", file=sys.stderr)
+
+        while True:
+            builder.process(next_batch(watcher, debounce, max_wait))
+    except KeyboardInterrupt:
+        print("\n已停止监视", file=sys.stderr)
+    finally:
+        watcher.close()
+    return 0
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="监视 game-logs/，有新牌谱时只整理新文件并重新生成受影响的页面")
+    ap.add_argument("--debounce", type=float, default=2.0, help="最后一个变化之后等待多少秒再处理（默认2）")
+    ap.add_argument("--max-wait", type=float, default=30.0, help="持续有变化时最多等待多少秒就开始处理（默认30）")
+    ap.add_argument("--poll", action="store_true", help="不使用 inotify，定期扫描文件")
+    ap.add_argument("--interval", type=float, default=2.0, help="定期扫描的间隔秒数（默认2）")
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    return watch(debounce=args.debounce, max_wait=args.max_wait, poll=args.poll, interval=args.interval)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
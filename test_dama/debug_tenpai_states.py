@@ -127,52 +127,10 @@ def process_draw_and_discard_lists(tracker: HandTracker, draw_list: List, discar
     """
     处理摸牌列表和打牌列表
 
-    draw_list: 每轮摸到的牌
-    discard_list: 每轮打出的牌（60表示摸切，'rXX'表示立直打XX）
+    draw_list: 每轮摸到的牌（吃/碰/大明杠为字符串）
+    discard_list: 每轮打出的牌（60表示摸切，'rXX'表示立直打XX，暗杠/加杠为字符串）
     """
-    if not isinstance(draw_list, list) or not isinstance(discard_list, list):
-        return
-
-    # 过滤出数字牌
-    draws = [t for t in draw_list if isinstance(t, int)]
-
-    # 处理打牌列表：将立直标记'rXX'转换为对应的牌和立直标记
-    discards = []
-    riichi_turns = set()
-    for i, item in enumerate(discard_list):
-        if isinstance(item, str) and item.startswith('r'):
-            # 立直标记，例如'r44'表示立直打44
-            tile_str = item[1:]
-            if tile_str.isdigit():
-                discards.append(int(tile_str))
-                riichi_turns.add(i)
-            else:
-                discards.append(60)
-        elif isinstance(item, int):
-            discards.append(item)
-        else:
-            discards.append(60)
-
-    # 处理每一轮的摸打
-    for i in range(max(len(draws), len(discards))):
-        draw_tile = draws[i] if i < len(draws) else 60
-        discard_tile = discards[i] if i < len(discards) else 60
-
-        # 如果打出的是60（摸切），则打出摸到的牌
-        if discard_tile == 60:
-            discard_tile = draw_tile
-
-        tracker.process_action_pair(draw_tile, discard_tile)
-
-        # 如果这一巡是立直，只设置立直标志（牌已经在process_action_pair中打出了）
-        if i in riichi_turns:
-            tracker.riichi_declared = True
-            tracker.dama_state = False
-
-    # 处理其他特殊动作（副露等）
-    for item in discard_list:
-        if isinstance(item, str) and not item.startswith('r'):
-            tracker.process_special_action(item)
+    tracker.replay(draw_list, discard_list)
 
 
 def main():
@@ -13,9 +13,11 @@ NC='\033[0m' # No Color
 # 默认规则类型
 RULE_TYPE=""
 RULE_FOLDER=""
+# 是否通过常驻构建进程生成网站（-d）
+USE_DAEMON=""
 
 # 解析参数
-while getopts "me" opt; do
+while getopts "med" opt; do
     case $opt in
         m)
             RULE_TYPE="m-league"
@@ -25,10 +27,14 @@ while getopts "me" opt; do
             RULE_TYPE="ema"
             RULE_FOLDER="ema"
             ;;
+        d)
+            USE_DAEMON=1
+            ;;
         \?)
-            echo "Usage: $0 [-m|-e]"
+            echo "Usage: $0 [-m|-e] [-d]"
             echo "  -m    M-League 规则"
             echo "  -e    EMA 规则"
+            echo "  -d    通过常驻构建进程生成网站（保持热缓存，第一次运行时自动启动）"
             exit 1
             ;;
     esac
@@ -92,7 +98,11 @@ echo ""
 
 # 步骤 4: 生成网站
 echo -e "${BLUE}[$([ -n "$RULE_FOLDER" ] && echo "5/5" || echo "4/4")] 生成网站...${NC}"
-python3 src/generate_website.py
+if [ -n "$USE_DAEMON" ]; then
+    python3 src/build_daemon.py build
+else
+    python3 src/generate_website.py
+fi
 if [ $? -ne 0 ]; then
     echo -e "${RED}✗ 生成网站失败${NC}"
     exit 1